@@ -15,7 +15,6 @@ sudo apt-get install -y \
     python3 \
     python3-gi \
     python3-requests \
-    python3-gpxpy \
     python3-cairo \
     python3-pkg-resources
 
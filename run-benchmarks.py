@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the ingestion, storage and export hot paths
+
+Generates synthetic drives, feeds them through DataManager without any
+hardware and reports wall time and peak memory as JSON. Each size runs in
+its own process so peak RSS figures don't influence each other.
+
+    python3 run-benchmarks.py                          # 1k, 10k and 100k networks, 1-day track
+    python3 run-benchmarks.py --full                   # adds 1M networks and a 1-week track
+    python3 run-benchmarks.py --sizes 1000 1000000     # pick sizes
+    python3 run-benchmarks.py --tracks 3600            # pick track lengths in fixes
+    python3 run-benchmarks.py --output results.json    # save results
+    python3 run-benchmarks.py --baseline results.json  # compare, exit 1 on regressions
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+RESULTS_VERSION = 1
+DEFAULT_SIZES = (1000, 10000, 100000)
+FULL_SIZES = DEFAULT_SIZES + (1000000,)
+
+# Lengths of the fixes-only long track cases, one fix per second
+DEFAULT_TRACKS = (86400,)  # a day
+FULL_TRACKS = DEFAULT_TRACKS + (7 * 86400,)  # and a week
+
+# Position lookups timed on a long track
+TRACK_QUERIES = 100000
+
+# Shape of the synthetic drive
+NEW_NETWORKS_PER_FIX = 10
+SIGHTINGS_PER_NETWORK = 5
+FIX_INTERVAL = 1.0  # seconds
+START_TIME = 1700000000.0
+
+# Time differences below this are noise rather than regressions
+MIN_SIGNIFICANT = 0.01  # seconds
+
+SECURITY_LABELS = (
+    # (security label as reported by the scanner, weight)
+    ('WPA2', 55), ('WPA2/WPA3-Transition', 10), ('WPA3-SAE', 5),
+    ('WPA2-Enterprise', 8), ('Open', 15), ('OWE', 2), ('WEP', 5),
+)
+FREQUENCIES = ((2412, 1), (2437, 6), (2462, 11), (5180, 36), (5500, 100), (5955, 1))
+
+def generate_drive(networks, seed=1):
+    """Yield a synthetic drive in time order.
+
+    Items are ('fix', timestamp, latitude, longitude, accuracy) once per
+    second and ('network', network_data) for each sighting. The route runs
+    north-east; every fix brings NEW_NETWORKS_PER_FIX new networks into
+    view and each stays visible for SIGHTINGS_PER_NETWORK fixes.
+    """
+    rng = random.Random(seed)
+    securities = [security for security, weight in SECURITY_LABELS for _ in range(weight)]
+    visible = []  # [network template, sightings left]
+    created = 0
+    fix = 0
+    latitude, longitude = 52.0, 13.0
+
+    while created < networks or visible:
+        timestamp = START_TIME + fix * FIX_INTERVAL
+        latitude += 0.00012 + rng.gauss(0, 0.00001)
+        longitude += 0.00008 + rng.gauss(0, 0.00001)
+        yield ('fix', timestamp, latitude, longitude, rng.uniform(3.0, 15.0))
+
+        for _ in range(min(NEW_NETWORKS_PER_FIX, networks - created)):
+            frequency, channel = rng.choice(FREQUENCIES)
+            template = {
+                'ssid': f"net-{created % (networks // 3 + 1)}",
+                'bssid': '02:%02x:%02x:%02x:%02x:%02x' % tuple(
+                    (created >> shift) & 0xff for shift in (32, 24, 16, 8, 0)),
+                'frequency': frequency,
+                'channel': channel,
+                'security': rng.choice(securities),
+                'device_interface': 'wlan0',
+            }
+            visible.append([template, SIGHTINGS_PER_NETWORK])
+            created += 1
+
+        # Sightings land between this fix and the next one
+        still_visible = []
+        for entry in visible:
+            template, left = entry
+            network_data = dict(template)
+            network_data['signal_strength'] = rng.randint(10, 95)
+            network_data['timestamp'] = network_data['last_seen'] = (
+                timestamp + rng.uniform(0.0, FIX_INTERVAL))
+            yield ('network', network_data)
+            entry[1] = left - 1
+            if entry[1]:
+                still_visible.append(entry)
+        visible = still_visible
+        fix += 1
+
+def generate_track(fixes, seed=1):
+    """Yield (timestamp, latitude, longitude, accuracy) for a long drive.
+
+    The heading wanders, speed varies between stops and motorway pace, and
+    every fix carries a little GPS noise, so simplification has to work
+    for what it drops.
+    """
+    rng = random.Random(seed)
+    latitude, longitude = 52.0, 13.0
+    heading = 0.0
+    speed = 0.0  # metres per second
+    for fix in range(fixes):
+        heading += rng.gauss(0, 0.05)
+        if fix % 600 < 30:
+            speed = 0.0  # A stop every ten minutes
+        else:
+            speed = min(35.0, max(2.0, speed + rng.gauss(0.1, 1.0)))
+        latitude += speed * math.cos(heading) / 111195.0
+        longitude += speed * math.sin(heading) / (111195.0 * math.cos(math.radians(latitude)))
+        yield (START_TIME + fix * FIX_INTERVAL,
+               latitude + rng.gauss(0, 0.00002), longitude + rng.gauss(0, 0.00002),
+               rng.uniform(3.0, 15.0))
+
+class Memory:
+    """Peak resident set size measurement for a phase of the benchmark"""
+
+    def reset(self):
+        """Start a new phase, resetting the kernel's peak RSS where supported"""
+        try:
+            with open('/proc/self/clear_refs', 'w') as clear_refs:
+                clear_refs.write('5')
+        except OSError:
+            pass
+
+    def peak_kb(self):
+        """Peak RSS in KiB since the last reset (since process start without /proc)"""
+        try:
+            with open('/proc/self/status') as status:
+                for line in status:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def run_size(networks, with_store):
+    """Run every benchmark for one drive size, returning the result records"""
+    from data_manager import DataManager
+    from session_store import SessionStore
+
+    memory = Memory()
+    results = []
+    workdir = tempfile.mkdtemp(prefix='wardrive-bench-')
+
+    def record(case, seconds, **extra):
+        result = {'case': case, 'size': networks, 'seconds': round(seconds, 6),
+                  'peak_rss_kb': memory.peak_kb()}
+        result.update(extra)
+        results.append(result)
+
+    store = SessionStore(os.path.join(workdir, 'sessions.db')) if with_store else None
+    data_manager = DataManager(store=store)
+    data_manager.open_session(resume=False)
+    now = [START_TIME]
+    data_manager.clock = lambda: now[0]
+
+    # Ingest: add_network and update_location, timed separately from generation
+    memory.reset()
+    sightings = fixes = 0
+    add_time = fix_time = flush_time = 0.0
+    clock = time.perf_counter
+    for item in generate_drive(networks):
+        if item[0] == 'fix':
+            _, timestamp, latitude, longitude, accuracy = item
+            now[0] = timestamp
+            started = clock()
+            data_manager.update_location(latitude, longitude, accuracy)
+            fix_time += clock() - started
+            started = clock()
+            data_manager.flush()
+            flush_time += clock() - started
+            fixes += 1
+        else:
+            started = clock()
+            data_manager.add_network(item[1])
+            add_time += clock() - started
+            sightings += 1
+    started = clock()
+    data_manager.tag_deferred(final=True)
+    data_manager.flush()
+    flush_time += clock() - started
+    record('ingest', add_time + fix_time + flush_time,
+           sightings=sightings, fixes=fixes,
+           sightings_per_second=round(sightings / add_time) if add_time else None,
+           add_network_seconds=round(add_time, 6),
+           update_location_seconds=round(fix_time, 6),
+           flush_seconds=round(flush_time, 6))
+
+    # Statistics, polled the way a live view would
+    memory.reset()
+    calls = 1000
+    started = clock()
+    for _ in range(calls):
+        data_manager.get_statistics()
+    elapsed = clock() - started
+    record('get_statistics', elapsed, calls=calls,
+           microseconds_per_call=round(elapsed / calls * 1e6, 3))
+
+    # Position estimation that precedes every export
+    memory.reset()
+    started = clock()
+    refined = data_manager.estimate_ap_positions()
+    record('estimate_ap_positions', clock() - started, refined=refined)
+
+    for format_type in ('csv', 'kml', 'gpx'):
+        path = os.path.join(workdir, f'export.{format_type}')
+        memory.reset()
+        started = clock()
+        data_manager.export_data(path, format_type)
+        record(f'export_{format_type}', clock() - started, bytes=os.path.getsize(path))
+        os.remove(path)
+
+    data_manager.close()
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+    return results
+
+def run_track(fixes, with_store):
+    """Time a fixes-only long track: recording it and looking up positions on it"""
+    from data_manager import DataManager
+    from session_store import SessionStore
+
+    memory = Memory()
+    results = []
+    workdir = tempfile.mkdtemp(prefix='wardrive-bench-')
+
+    def record(case, seconds, **extra):
+        result = {'case': case, 'size': fixes, 'seconds': round(seconds, 6),
+                  'peak_rss_kb': memory.peak_kb()}
+        result.update(extra)
+        results.append(result)
+
+    store = SessionStore(os.path.join(workdir, 'sessions.db')) if with_store else None
+    data_manager = DataManager(store=store)
+    data_manager.open_session(resume=False)
+    now = [START_TIME]
+    data_manager.clock = lambda: now[0]
+
+    # Fixes arrive once a second; the store is flushed with every one as in the app
+    memory.reset()
+    fix_time = flush_time = 0.0
+    clock = time.perf_counter
+    for timestamp, latitude, longitude, accuracy in generate_track(fixes):
+        now[0] = timestamp
+        started = clock()
+        data_manager.update_location(latitude, longitude, accuracy)
+        fix_time += clock() - started
+        if store:
+            started = clock()
+            data_manager.flush()
+            flush_time += clock() - started
+    track = data_manager.track
+    record('track_update_location', fix_time + flush_time,
+           update_location_seconds=round(fix_time, 6), flush_seconds=round(flush_time, 6),
+           kept_points=len(track))
+
+    # Random lookups, as for sightings tagged late, and one sorted batch
+    rng = random.Random(2)
+    end = START_TIME + (fixes - 1) * FIX_INTERVAL
+    queries = [rng.uniform(START_TIME, end) for _ in range(TRACK_QUERIES)]
+    memory.reset()
+    started = clock()
+    for timestamp in queries:
+        track.position_at(timestamp)
+    elapsed = clock() - started
+    record('track_position_at', elapsed, calls=TRACK_QUERIES,
+           microseconds_per_call=round(elapsed / TRACK_QUERIES * 1e6, 3))
+
+    queries.sort()
+    memory.reset()
+    started = clock()
+    track.positions_at(queries)
+    elapsed = clock() - started
+    record('track_positions_at', elapsed, calls=TRACK_QUERIES,
+           microseconds_per_call=round(elapsed / TRACK_QUERIES * 1e6, 3))
+
+    data_manager.close()
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+    return results
+
+def compare(results, baseline, threshold):
+    """Print a comparison with a baseline, returning the number of regressions"""
+    previous = {(entry['case'], entry['size']): entry for entry in baseline['results']}
+    regressions = 0
+    print(f"\n{'case':<24}{'size':>9}{'time':>10}{'ratio':>8}{'rss':>10}{'ratio':>8}")
+    for entry in results:
+        old = previous.get((entry['case'], entry['size']))
+        if old is None:
+            continue
+        time_ratio = entry['seconds'] / old['seconds'] if old['seconds'] else 1.0
+        rss_ratio = entry['peak_rss_kb'] / old['peak_rss_kb'] if old['peak_rss_kb'] else 1.0
+        flag = ''
+        slower = (time_ratio > threshold
+                  and entry['seconds'] - old['seconds'] > MIN_SIGNIFICANT)
+        if slower or rss_ratio > threshold:
+            regressions += 1
+            flag = '  ❌ regression'
+        print(f"{entry['case']:<24}{entry['size']:>9}{entry['seconds']:>9.3f}s"
+              f"{time_ratio:>8.2f}{entry['peak_rss_kb'] // 1024:>8}MB{rss_ratio:>8.2f}{flag}")
+    return regressions
+
+def main():
+    """Run the benchmarks"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='*',
+                        help='numbers of networks to generate (default: 1000 10000 100000)')
+    parser.add_argument('--tracks', type=int, nargs='*',
+                        help='lengths in fixes of the long track cases (default: 86400)')
+    parser.add_argument('--full', action='store_true',
+                        help='also run 1000000 networks and a week-long track of 604800 fixes')
+    parser.add_argument('--store', action='store_true',
+                        help='write to an SQLite session store as the app does')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='compare against results from an earlier run')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='time or memory ratio counted as a regression (default: 1.25)')
+    parser.add_argument('--run-size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--run-track', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_size or args.run_track:
+        # Child process: run one case and hand the results back on stdout
+        if args.run_size:
+            results = run_size(args.run_size, args.store)
+        else:
+            results = run_track(args.run_track, args.store)
+        sys.stdout = sys.__stdout__
+        print(json.dumps(results))
+        return 0
+
+    sizes = args.sizes if args.sizes is not None else (FULL_SIZES if args.full else DEFAULT_SIZES)
+    tracks = args.tracks if args.tracks is not None else (FULL_TRACKS if args.full else DEFAULT_TRACKS)
+    runs = ([('--run-size', size, f"{size} networks") for size in sizes]
+            + [('--run-track', fixes, f"{fixes} fix track") for fixes in tracks])
+
+    results = []
+    for option, size, label in runs:
+        print(f"⏱️  {label}...", flush=True)
+        command = [sys.executable, os.path.abspath(__file__), option, str(size)]
+        if args.store:
+            command.append('--store')
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        for entry in json.loads(output.strip().splitlines()[-1]):
+            results.append(entry)
+            print(f"   {entry['case']:<24}{entry['seconds']:>10.3f} s"
+                  f"{entry['peak_rss_kb'] / 1024:>10.1f} MB peak")
+
+    report = {
+        'version': RESULTS_VERSION,
+        'created': time.time(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'store': args.store,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get('store') != args.store:
+            print("⚠️  Baseline was run with a different --store setting")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {regressions} regression(s) beyond {args.threshold:.2f}×")
+            return 1
+        print("✅ No regressions")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+AP Locator
+Estimates access point positions from their sighting history
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EARTH_RADIUS = 6371000.0  # metres
+METRES_PER_DEGREE = EARTH_RADIUS * math.pi / 180
+
+def strength_to_dbm(strength):
+    """Convert a NetworkManager signal quality (0-100) back to dBm"""
+    # Inverse of NM's mapping of -100..-40 dBm onto 0..100%
+    return -100.0 + 0.6 * min(max(strength, 0), 100)
+
+class APLocator:
+    """Signal-weighted AP position estimation.
+
+    Every sighting contributes to a weighted centroid, with weights derived
+    from the distance implied by the RSSI through a log-distance path loss
+    model. The centroid is maintained incrementally in O(1) per sighting.
+    With NumPy available, refine() additionally runs a few Gauss-Newton
+    trilateration steps for all APs that received new sightings, batched
+    across BSSIDs.
+    """
+
+    def __init__(self, path_loss_exponent=2.7, reference_dbm=-40.0):
+        self.path_loss_exponent = path_loss_exponent
+        self.reference_dbm = reference_dbm
+
+        self.sums = {}  # BSSID -> [sum_w, sum_w_lat, sum_w_lon, count]
+        self.positions = {}  # BSSID -> (lat, lon) from trilateration
+        self.dirty = set()  # BSSIDs with sightings newer than their position
+        self.gathered = None  # Sightings copied for refine(), see copy()
+
+    def distance(self, strength):
+        """Estimate the distance in metres implied by a signal strength"""
+        dbm = strength_to_dbm(strength)
+        return 10 ** ((self.reference_dbm - dbm) / (10 * self.path_loss_exponent))
+
+    def add_sighting(self, bssid, latitude, longitude, strength):
+        """Fold a single sighting into the AP's estimate"""
+        if latitude is None or longitude is None:
+            return
+
+        weight = 1.0 / self.distance(strength) ** 2
+        sums = self.sums.get(bssid)
+        if sums is None:
+            self.sums[bssid] = [weight, weight * latitude, weight * longitude, 1]
+        else:
+            sums[0] += weight
+            sums[1] += weight * latitude
+            sums[2] += weight * longitude
+            sums[3] += 1
+        self.dirty.add(bssid)
+
+    def centroid(self, bssid):
+        """Get the weighted centroid of an AP's sightings"""
+        sums = self.sums.get(bssid)
+        if not sums:
+            return None
+        return sums[1] / sums[0], sums[2] / sums[0]
+
+    def estimate(self, bssid):
+        """Get the best available position estimate for an AP"""
+        position = self.positions.get(bssid)
+        if position is not None and bssid not in self.dirty:
+            return position
+        return self.centroid(bssid)
+
+    def refine(self, observations, iterations=5, min_sightings=3):
+        """Trilaterate all APs with new sightings.
+
+        observations maps BSSID to ObservationLog, unless the sightings were
+        already gathered by copy(). Returns the number of APs whose position
+        was refined.
+        """
+        if np is None or not self.dirty:
+            self.dirty.clear()
+            return 0
+
+        gathered = self.gathered or self.gather(observations, min_sightings)
+        self.gathered = None
+        self.dirty.clear()
+        bssids, counts, latitudes, longitudes, signals = gathered
+        if not bssids:
+            return 0
+
+        # Columns of every sighting of every AP, with a group index
+        groups = np.repeat(np.arange(len(bssids)), counts)
+        latitudes = np.frombuffer(latitudes, dtype=np.float64)
+        longitudes = np.frombuffer(longitudes, dtype=np.float64)
+        signals = np.frombuffer(signals, dtype=np.int8).astype(np.float64)
+
+        valid = np.isfinite(latitudes) & np.isfinite(longitudes)
+        groups = groups[valid]
+        latitudes = latitudes[valid]
+        longitudes = longitudes[valid]
+        signals = signals[valid]
+
+        n = len(bssids)
+        centroids = np.array([self.centroid(bssid) for bssid in bssids])
+        lat0 = centroids[:, 0]
+        lon0 = centroids[:, 1]
+
+        # Local planar coordinates (metres) around each AP's centroid
+        scale_x = METRES_PER_DEGREE * np.cos(np.radians(lat0))
+        xs = (longitudes - lon0[groups]) * scale_x[groups]
+        ys = (latitudes - lat0[groups]) * METRES_PER_DEGREE
+
+        dbm = -100.0 + 0.6 * np.clip(signals, 0, 100)
+        distances = 10 ** ((self.reference_dbm - dbm) / (10 * self.path_loss_exponent))
+        weights = 1.0 / distances ** 2
+
+        # Gauss-Newton on sum(w * (|s - p| - d)^2), one 2x2 system per AP
+        px = np.zeros(n)
+        py = np.zeros(n)
+        for _ in range(iterations):
+            dx = px[groups] - xs
+            dy = py[groups] - ys
+            ranges = np.maximum(np.hypot(dx, dy), 1e-3)
+            residuals = ranges - distances
+            jx = dx / ranges
+            jy = dy / ranges
+
+            a11 = np.bincount(groups, weights * jx * jx, n)
+            a12 = np.bincount(groups, weights * jx * jy, n)
+            a22 = np.bincount(groups, weights * jy * jy, n)
+            b1 = np.bincount(groups, weights * jx * residuals, n)
+            b2 = np.bincount(groups, weights * jy * residuals, n)
+
+            det = a11 * a22 - a12 * a12
+            solvable = np.abs(det) > 1e-9 * a11 * a22
+            safe_det = np.where(solvable, det, 1.0)
+            px -= np.where(solvable, (a22 * b1 - a12 * b2) / safe_det, 0.0)
+            py -= np.where(solvable, (a11 * b2 - a12 * b1) / safe_det, 0.0)
+
+        # Discard solutions that ran away from every sighting
+        limits = np.zeros(n)
+        np.maximum.at(limits, groups, distances)
+        runaway = ~np.isfinite(px) | ~np.isfinite(py) | (np.hypot(px, py) > limits)
+        px[runaway] = 0.0
+        py[runaway] = 0.0
+
+        latitudes = lat0 + py / METRES_PER_DEGREE
+        longitudes = lon0 + px / scale_x
+        for bssid, latitude, longitude in zip(bssids, latitudes.tolist(), longitudes.tolist()):
+            self.positions[bssid] = (latitude, longitude)
+
+        return n
+
+    def gather(self, observations, min_sightings=3):
+        """Copy the sightings of the APs with new sightings into flat columns.
+
+        Returns (bssids, counts, latitudes, longitudes, signals), the last
+        three as bytes in the layout of ObservationLog's arrays.
+        """
+        bssids = [bssid for bssid in self.dirty
+                  if bssid in observations and self.sums[bssid][3] >= min_sightings]
+        logs = [observations[bssid] for bssid in bssids]
+        return (
+            bssids,
+            [len(log) for log in logs],
+            b''.join(log.latitudes for log in logs),
+            b''.join(log.longitudes for log in logs),
+            b''.join(log.signals for log in logs),
+        )
+
+    def copy(self, observations=None):
+        """Get an independent copy of the estimates.
+
+        Given the sighting histories, the copy takes what it needs to refine
+        the APs with new sightings, so it can do that in another thread.
+        """
+        locator = APLocator(self.path_loss_exponent, self.reference_dbm)
+        locator.sums = {bssid: sums[:] for bssid, sums in self.sums.items()}
+        locator.positions = dict(self.positions)
+        locator.dirty = set(self.dirty)
+        if observations is not None and np is not None:
+            locator.gathered = self.gather(observations)
+        return locator
+
+    def clear(self):
+        """Forget all estimates"""
+        self.sums.clear()
+        self.positions.clear()
+        self.dirty.clear()
+        self.gathered = None
@@ -3,6 +3,7 @@ GNOME Wardrive Application Class
 Main application controller handling initialization and lifecycle
 """
 
+import signal
 import gi
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
@@ -10,11 +11,16 @@ gi.require_version('Adw', '1')
 from gi.repository import Gtk, Adw, Gio, GLib
 try:
     from .window import WardriveWindow
+    from .log import dump_recent, get_logger
 except ImportError:
     try:
         from gnome_wardrive.window import WardriveWindow
+        from gnome_wardrive.log import dump_recent, get_logger
     except ImportError:
         from window import WardriveWindow
+        from log import dump_recent, get_logger
+
+logger = get_logger('application')
 
 class WardriveApplication(Adw.Application):
     """Main application class"""
@@ -40,6 +46,9 @@ class WardriveApplication(Adw.Application):
         # Load CSS styling
         self.load_css()
         
+        # SIGUSR1 writes the most recent log records to stderr
+        GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGUSR1, self.on_dump_signal)
+        
     def on_activate(self, app):
         """Activate the application - create and present main window"""
         if not self.main_window:
@@ -47,6 +56,11 @@ class WardriveApplication(Adw.Application):
         
         self.main_window.present()
         
+    def on_dump_signal(self):
+        """Dump the recent log records for a post-mortem"""
+        dump_recent()
+        return GLib.SOURCE_CONTINUE
+        
     def setup_actions(self):
         """Set up application-wide actions"""
         # Quit action
@@ -67,6 +81,9 @@ class WardriveApplication(Adw.Application):
         
     def on_quit_action(self, action, param):
         """Handle quit action"""
+        # Close the window first so the current session is finished cleanly
+        if self.main_window:
+            self.main_window.close()
         self.quit()
         
     def on_about_action(self, action, param):
@@ -106,4 +123,4 @@ class WardriveApplication(Adw.Application):
                     Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
                 )
         except Exception as e:
-            print(f"Could not load CSS: {e}")
\ No newline at end of file
+            logger.warning("Could not load CSS: %s", e)
\ No newline at end of file
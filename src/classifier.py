@@ -0,0 +1,127 @@
+"""
+Network Classifier
+Lookup tables for channel numbers and security types of access points
+"""
+
+try:
+    import gi
+    gi.require_version('NM', '1.0')
+    from gi.repository import NM
+except (ImportError, ValueError):
+    NM = None
+
+# NM80211ApFlags and NM80211ApSecurityFlags bit values from libnm, used
+# when the NM typelib isn't available
+DEFAULT_AP_FLAGS = {
+    'PRIVACY': 0x1,
+}
+DEFAULT_SECURITY_FLAGS = {
+    'KEY_MGMT_PSK': 0x100,
+    'KEY_MGMT_802_1X': 0x200,
+    'KEY_MGMT_SAE': 0x400,
+    'KEY_MGMT_OWE': 0x800,
+    'KEY_MGMT_OWE_TM': 0x1000,
+    'KEY_MGMT_EAP_SUITE_B_192': 0x2000,
+}
+
+def resolve_flags(enum_name, defaults):
+    """Resolve flag values from an NM enum once, falling back to libnm's values"""
+    enum = getattr(NM, enum_name, None) if NM is not None else None
+    return {name: int(getattr(enum, name, value)) for name, value in defaults.items()}
+
+_ap_flags = resolve_flags('80211ApFlags', DEFAULT_AP_FLAGS)
+_security_flags = resolve_flags('80211ApSecurityFlags', DEFAULT_SECURITY_FLAGS)
+
+PRIVACY = _ap_flags['PRIVACY']
+KEY_MGMT_PSK = _security_flags['KEY_MGMT_PSK']
+KEY_MGMT_802_1X = _security_flags['KEY_MGMT_802_1X']
+KEY_MGMT_SAE = _security_flags['KEY_MGMT_SAE']
+KEY_MGMT_OWE = _security_flags['KEY_MGMT_OWE']
+KEY_MGMT_OWE_TM = _security_flags['KEY_MGMT_OWE_TM']
+KEY_MGMT_SUITE_B = _security_flags['KEY_MGMT_EAP_SUITE_B_192']
+
+def _build_channel_table():
+    """Map the centre frequency (MHz) of every 2.4, 5 and 6 GHz channel to its number"""
+    table = {}
+
+    # 2.4 GHz: channels 1-13 every 5 MHz, channel 14 is the Japanese exception
+    for channel in range(1, 14):
+        table[2407 + 5 * channel] = channel
+    table[2484] = 14
+
+    # 4.9 GHz public safety / Japan: channels 183-196
+    for channel in range(183, 197):
+        table[4000 + 5 * channel] = channel
+
+    # 5 GHz: channels 32-177
+    for channel in range(32, 178):
+        table[5000 + 5 * channel] = channel
+
+    # 6 GHz: 20 MHz channels 1-233 every 4 channels, plus channel 2 at 5935 MHz
+    for channel in range(1, 234, 4):
+        table[5950 + 5 * channel] = channel
+    table[5935] = 2
+
+    return table
+
+CHANNELS = _build_channel_table()
+
+def frequency_to_channel(frequency):
+    """Convert a centre frequency in MHz to a WiFi channel number, 0 if unknown"""
+    return CHANNELS.get(frequency, 0)
+
+def _classify(flags, wpa_flags, rsn_flags):
+    """Classify the security of an AP from its flags"""
+    if rsn_flags & KEY_MGMT_SUITE_B:
+        return 'WPA3-Enterprise'
+    if rsn_flags & KEY_MGMT_SAE:
+        if rsn_flags & KEY_MGMT_PSK:
+            return 'WPA2/WPA3-Transition'
+        return 'WPA3-SAE'
+    if rsn_flags & KEY_MGMT_OWE:
+        return 'OWE'
+    if rsn_flags & KEY_MGMT_802_1X:
+        return 'WPA2-Enterprise'
+    if rsn_flags & KEY_MGMT_PSK:
+        return 'WPA/WPA2' if wpa_flags & KEY_MGMT_PSK else 'WPA2'
+    if wpa_flags & KEY_MGMT_802_1X:
+        return 'WPA-Enterprise'
+    if wpa_flags & KEY_MGMT_PSK:
+        return 'WPA'
+    if flags & PRIVACY:
+        return 'WEP'
+    if (rsn_flags | wpa_flags) & KEY_MGMT_OWE_TM:
+        # Open half of an OWE transition pair
+        return 'OWE-Transition'
+    return 'Open'
+
+_security_cache = {}
+
+def classify_security(flags, wpa_flags, rsn_flags):
+    """Get the security label for an AP's (flags, wpa_flags, rsn_flags)"""
+    key = (flags, wpa_flags, rsn_flags)
+    label = _security_cache.get(key)
+    if label is None:
+        label = _security_cache[key] = _classify(int(flags), int(wpa_flags), int(rsn_flags))
+    return label
+
+# Coarse category of every security label, for map styles and statistics
+SECURITY_CATEGORIES = {
+    'Open': 'open',
+    'OWE-Transition': 'open',
+    'WEP': 'wep',
+    'WPA': 'wpa',
+    'WPA-Enterprise': 'wpa',
+    'WPA/WPA2': 'wpa',
+    'WPA2': 'wpa',
+    'WPA2-Enterprise': 'wpa',
+    'WPA2/WPA3-Transition': 'wpa',
+    'WPA3': 'wpa',
+    'WPA3-SAE': 'wpa',
+    'WPA3-Enterprise': 'wpa',
+    'OWE': 'wpa',
+}
+
+def security_category(security):
+    """Get the category (open, wep, wpa or unknown) of a security label"""
+    return SECURITY_CATEGORIES.get(security, 'unknown')
@@ -0,0 +1,268 @@
+"""
+Headless Collector
+Runs scanning, location tracking and storage without a user interface
+"""
+
+import argparse
+import signal
+import sys
+import time
+
+import gi
+gi.require_version('NM', '1.0')
+gi.require_version('Geoclue', '2.0')
+
+from gi.repository import GLib
+try:
+    from .wifi_scanner import WiFiScanner
+    from .location_service import LocationService
+    from .data_manager import DataManager
+    from .network_stats import format_summary
+    from .session_store import SessionStore, default_database_path
+    from .replay import ReplaySource, TraceRecorder
+    from .metrics_reporter import MetricsReporter
+    from .log import setup_logging, dump_recent, get_logger
+    from .collector_link import CollectorServer, default_socket_path
+except ImportError:
+    try:
+        from gnome_wardrive.wifi_scanner import WiFiScanner
+        from gnome_wardrive.location_service import LocationService
+        from gnome_wardrive.data_manager import DataManager
+        from gnome_wardrive.network_stats import format_summary
+        from gnome_wardrive.session_store import SessionStore, default_database_path
+        from gnome_wardrive.replay import ReplaySource, TraceRecorder
+        from gnome_wardrive.metrics_reporter import MetricsReporter
+        from gnome_wardrive.log import setup_logging, dump_recent, get_logger
+        from gnome_wardrive.collector_link import CollectorServer, default_socket_path
+    except ImportError:
+        from wifi_scanner import WiFiScanner
+        from location_service import LocationService
+        from data_manager import DataManager
+        from network_stats import format_summary
+        from session_store import SessionStore, default_database_path
+        from replay import ReplaySource, TraceRecorder
+        from metrics_reporter import MetricsReporter
+        from log import setup_logging, dump_recent, get_logger
+        from collector_link import CollectorServer, default_socket_path
+
+# Seconds between status lines
+STATUS_INTERVAL = 60
+
+logger = get_logger('collector')
+
+class HeadlessCollector:
+    """Collects networks and locations straight into the session store"""
+    
+    def __init__(self, db_path, replay=None, speed=0, record=None, metrics=None, serve=None):
+        self.loop = GLib.MainLoop()
+        self.exit_code = 0
+        
+        # Services, or a recorded trace standing in for them
+        self.data_manager = DataManager(store=SessionStore(db_path))
+        self.replay = None
+        if replay:
+            self.replay = ReplaySource(replay, speed)
+            self.replay.connect('replay-finished', self.on_replay_finished)
+            self.wifi_scanner = self.replay.scanner
+            self.location_service = self.replay
+            self.data_manager.clock = self.replay.clock
+        else:
+            self.wifi_scanner = WiFiScanner()
+            self.location_service = LocationService()
+            
+        self.recorder = None
+        if record:
+            self.recorder = TraceRecorder(record)
+            self.wifi_scanner.recorder = self.recorder
+            
+        # Optional socket feeding user interfaces in other processes
+        self.server = None
+        if serve:
+            self.server = CollectorServer(
+                serve, self.wifi_scanner, self.location_service, self.data_manager)
+            
+        # Optional hot-path metrics, as a JSON-lines file or over D-Bus
+        self.data_manager.watch_queues()
+        if metrics:
+            self.metrics_reporter = MetricsReporter.from_target(metrics)
+        else:
+            self.metrics_reporter = MetricsReporter.from_environment()
+        
+        # Connect service signals
+        self.wifi_scanner.connect('network-found', self.on_network_found)
+        self.wifi_scanner.connect('aps-expired', self.on_aps_expired)
+        self.wifi_scanner.connect('scan-tick', self.on_scan_tick)
+        self.wifi_scanner.connect('scan-error', self.on_scan_error)
+        self.location_service.connect('location-updated', self.on_location_updated)
+        self.location_service.connect('location-error', self.on_location_error)
+        
+    def run(self):
+        """Collect until interrupted, returning the exit code"""
+        self.data_manager.open_session(resume=self.replay is None)
+        if self.metrics_reporter:
+            self.metrics_reporter.start()
+        
+        if self.replay:
+            logger.info("▶️  Replaying %s, writing to %s", self.replay.path,
+                        self.data_manager.store.db_path)
+            self.started = time.perf_counter()
+            if not self.replay.speed:
+                # Plays the whole trace synchronously, no main loop needed
+                self.replay.start()
+                return self.exit_code
+        
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            GLib.unix_signal_add(GLib.PRIORITY_HIGH, signum, self.on_quit_signal)
+        GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal.SIGUSR1, self.on_dump_signal)
+        GLib.timeout_add_seconds(STATUS_INTERVAL, self.log_status)
+        
+        if self.server and not self.replay:
+            logger.info("📡 Waiting for a user interface to start scanning, writing to %s",
+                        self.data_manager.store.db_path)
+        elif not self.replay:
+            logger.info("📡 Starting headless collection, writing to %s",
+                        self.data_manager.store.db_path)
+            
+        # Services may fail synchronously and quit, which needs a running loop
+        GLib.idle_add(self.start_services)
+        self.loop.run()
+        return self.exit_code
+        
+    def start_services(self):
+        """Start scanning and locating, or the replay.
+
+        A collector serving user interfaces only locates until one of them
+        asks it to scan, as the window does on its own.
+        """
+        if self.replay:
+            self.replay.start()
+        else:
+            self.location_service.start()
+            if not self.server:
+                self.wifi_scanner.start_scan()
+        return GLib.SOURCE_REMOVE
+        
+    def quit(self):
+        """Stop all services and finish the session"""
+        if self.wifi_scanner.is_scanning:
+            self.wifi_scanner.stop_scan()
+        self.location_service.stop()
+        self.data_manager.close()
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+        if self.metrics_reporter:
+            self.metrics_reporter.stop()
+        if self.server:
+            self.server.close()
+            self.server = None
+        if self.loop.is_running():
+            self.loop.quit()
+            
+    def on_replay_finished(self, source):
+        """Report on a finished replay and stop"""
+        elapsed = time.perf_counter() - self.started
+        logger.info("⏹️  Replayed %d scan ticks and %d location fixes in %.2f s",
+                    source.ticks, source.fixes, elapsed)
+        self.log_status()
+        self.quit()
+        
+    def on_quit_signal(self):
+        """Handle SIGINT/SIGTERM"""
+        logger.info("Stopping headless collection...")
+        self.quit()
+        return GLib.SOURCE_REMOVE
+        
+    def on_dump_signal(self):
+        """Handle SIGUSR1 by writing the recent log records to stderr"""
+        dump_recent()
+        return GLib.SOURCE_CONTINUE
+        
+    def on_network_found(self, scanner, network_data):
+        """Store a sighting"""
+        self.data_manager.add_network(network_data)
+        
+    def on_aps_expired(self, scanner, expired):
+        """Record networks that are no longer visible"""
+        self.data_manager.expire_networks(expired)
+        
+    def on_scan_tick(self, scanner):
+        """Persist everything collected during this scan tick"""
+        self.data_manager.flush()
+        
+    def on_scan_error(self, scanner, message):
+        """Stop when scanning cannot run, unless a user interface may retry"""
+        logger.error("❌ Scan error: %s", message)
+        dump_recent()
+        if self.server:
+            return
+        self.exit_code = 1
+        self.quit()
+        
+    def on_location_updated(self, service, latitude, longitude, accuracy):
+        """Store a location fix"""
+        if self.recorder:
+            self.recorder.record_location(self.wifi_scanner.clock(), latitude, longitude, accuracy)
+        self.data_manager.update_location(latitude, longitude, accuracy)
+        self.wifi_scanner.update_location(latitude, longitude)
+        
+    def on_location_error(self, service, message):
+        """Keep collecting without positions when GeoClue is unavailable"""
+        logger.warning("⚠️  %s, continuing without location", message)
+        
+    def log_status(self):
+        """Log a periodic status line"""
+        logger.info("📊 %d networks, %d location fixes\n   %s",
+                    self.data_manager.get_network_count(), self.data_manager.track.received,
+                    format_summary(self.data_manager.get_statistics()))
+        if len(self.wifi_scanner.wifi_devices) > 1:
+            self.wifi_scanner.log_interface_yield()
+        return True  # Continue timeout
+
+def main(argv=None):
+    """Run the headless collector"""
+    parser = argparse.ArgumentParser(
+        prog='gnome-wardrive --headless',
+        description='Collect WiFi networks and locations without a user interface')
+    parser.add_argument('--headless', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument(
+        '--database',
+        help='session database to write to (default: %s, or in memory '
+             'when replaying)' % default_database_path())
+    parser.add_argument(
+        '--record', metavar='TRACE',
+        help='also record access point snapshots and location fixes to a trace file')
+    parser.add_argument(
+        '--replay', metavar='TRACE',
+        help='play a recorded trace instead of using NetworkManager and GeoClue')
+    parser.add_argument(
+        '--speed', type=float, default=0,
+        help='replay speed relative to real time, 0 for as fast as possible (default: 0)')
+    parser.add_argument(
+        '--metrics', metavar='FILE|dbus',
+        help='report hot-path metrics every 10 s as JSON lines to FILE, or over D-Bus')
+    parser.add_argument(
+        '--serve', metavar='SOCKET', nargs='?', const=default_socket_path(),
+        help='feed the user interface over a Unix socket (default: %s)' % default_socket_path())
+    parser.add_argument(
+        '--log-level', choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'),
+        help='least severe log messages to show (default: INFO); SIGUSR1 '
+             'dumps the most recent ones')
+    args = parser.parse_args(argv[1:] if argv else sys.argv[1:])
+    setup_logging(args.log_level)
+    
+    database = args.database
+    if database is None:
+        database = ':memory:' if args.replay else default_database_path()
+        
+    try:
+        collector = HeadlessCollector(
+            database, args.replay, args.speed, args.record, args.metrics, args.serve)
+    except RuntimeError as e:
+        logger.error("❌ %s", e)
+        return 1
+    return collector.run()
+
+if __name__ == '__main__':
+    # Started directly by a window that wants a collector process
+    sys.exit(main())
@@ -0,0 +1,547 @@
+"""
+Collector Link
+Streams sightings and location fixes from a collector process to the user
+interface over a Unix socket, in the frames of collector_protocol
+"""
+
+import math
+import os
+import socket
+import struct
+import sys
+
+from gi.repository import GObject, GLib, Gio
+try:
+    from .collector_protocol import (
+        KIND_SIGHTINGS, KIND_FIXES, KIND_EXPIRED, KIND_TICK, KIND_DEVICES, KIND_SCANNING,
+        KIND_ERROR, KIND_SNAPSHOT, FIX, EXPIRED, DEVICE, SCANNING, ERROR, MAX_BATCH,
+        pack_frame, pack_records, pack_snapshot, pack_text, unpack_text, pack_bssid, unpack_bssid,
+        optional, pack_sighting, unpack_sighting, split_frames)
+    from .log import get_logger
+except ImportError:
+    try:
+        from gnome_wardrive.collector_protocol import (
+            KIND_SIGHTINGS, KIND_FIXES, KIND_EXPIRED, KIND_TICK, KIND_DEVICES, KIND_SCANNING,
+            KIND_ERROR, KIND_SNAPSHOT, FIX, EXPIRED, DEVICE, SCANNING, ERROR, MAX_BATCH,
+            pack_frame, pack_records, pack_snapshot, pack_text, unpack_text, pack_bssid, unpack_bssid,
+            optional, pack_sighting, unpack_sighting, split_frames)
+        from gnome_wardrive.log import get_logger
+    except ImportError:
+        from collector_protocol import (
+            KIND_SIGHTINGS, KIND_FIXES, KIND_EXPIRED, KIND_TICK, KIND_DEVICES, KIND_SCANNING,
+            KIND_ERROR, KIND_SNAPSHOT, FIX, EXPIRED, DEVICE, SCANNING, ERROR, MAX_BATCH,
+            pack_frame, pack_records, pack_snapshot, pack_text, unpack_text, pack_bssid, unpack_bssid,
+            optional, pack_sighting, unpack_sighting, split_frames)
+        from log import get_logger
+
+# Environment variable making the window use a collector process: a socket
+# path, or "default" for default_socket_path()
+COLLECTOR_ENVIRONMENT = 'GNOME_WARDRIVE_COLLECTOR'
+COLLECTOR_DEFAULT = 'default'
+
+# A client that falls this far behind is disconnected rather than buffered for
+MAX_CLIENT_BACKLOG = 4 * 1024 * 1024  # bytes
+
+# A new client's snapshot is packed as its backlog drains below this, so a
+# large session never counts against MAX_CLIENT_BACKLOG
+SNAPSHOT_WATERMARK = 256 * 1024  # bytes
+
+# Seconds between attempts to reach a collector that is starting or has gone
+RECONNECT_INTERVAL = 2
+SPAWN_TIMEOUT = 10
+
+logger = get_logger('collector_link')
+
+def default_socket_path():
+    """Get the collector socket in the user's runtime directory"""
+    return os.path.join(GLib.get_user_runtime_dir(), 'gnome-wardrive', 'collector.sock')
+
+class CollectorServer:
+    """Publishes a collector's sightings and fixes to connected user interfaces.
+
+    Records are batched until the end of each scan tick or location fix,
+    then written as one frame per kind. Sockets are non-blocking; a client
+    that can't keep up is disconnected instead of slowing the collector.
+    Clients send "start" or "stop" lines to control scanning.
+    """
+
+    def __init__(self, path, scanner, location_service, data_manager):
+        self.path = path
+        self.scanner = scanner
+        self.location_service = location_service
+        self.data_manager = data_manager
+        self.clients = {}  # socket -> {'out': bytearray, 'in': bytearray, 'watches': [ids]}
+
+        self.sightings = []
+        self.fixes = []
+        self.expired = []
+
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except OSError:
+                os.unlink(path)  # Left behind by a collector that didn't exit cleanly
+            else:
+                raise RuntimeError(f"Another collector is already serving {path}")
+            finally:
+                probe.close()
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.bind(path)
+        self.socket.listen(4)
+        self.socket.setblocking(False)
+        self.accept_id = GLib.io_add_watch(
+            self.socket.fileno(), GLib.PRIORITY_DEFAULT, GLib.IO_IN, self.on_accept)
+
+        scanner.connect('network-found', self.on_network_found)
+        scanner.connect('aps-expired', self.on_aps_expired)
+        scanner.connect('scan-tick', self.on_scan_tick)
+        scanner.connect('scan-completed', self.on_scanning_changed)
+        scanner.connect('scan-error', self.on_scan_error)
+        scanner.connect('devices-changed', self.on_devices_changed)
+        location_service.connect('location-updated', self.on_location_updated)
+        logger.info("🔗 Serving user interfaces on %s", path)
+
+    def close(self):
+        """Disconnect every client and remove the socket"""
+        self.flush()
+        for client in list(self.clients):
+            self.drop(client)
+        if self.accept_id:
+            GLib.source_remove(self.accept_id)
+            self.accept_id = None
+        self.socket.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def on_accept(self, fd, condition):
+        """Take a new client and bring it up to date"""
+        try:
+            client, _ = self.socket.accept()
+        except BlockingIOError:
+            return True
+        client.setblocking(False)
+        self.clients[client] = {
+            'out': bytearray(),
+            'in': bytearray(),
+            'watches': [GLib.io_add_watch(
+                client.fileno(), GLib.PRIORITY_DEFAULT,
+                GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR, self.on_client_readable, client)],
+            # Everything collected so far, as summaries rather than new
+            # sightings so a reconnecting client doesn't record them twice.
+            # It is streamed as the client reads it, then followed by the state.
+            'snapshot': pack_snapshot(self.data_manager.get_networks_list()),
+        }
+        logger.info("🔗 User interface connected")
+        self.send(client, b'')
+        return True  # Keep accepting
+
+    def fill_snapshot(self, state):
+        """Queue more of a new client's snapshot while its backlog is small"""
+        snapshot = state.get('snapshot')
+        while snapshot is not None and len(state['out']) < SNAPSHOT_WATERMARK:
+            frame = next(snapshot, None)
+            if frame is not None:
+                state['out'] += frame
+                continue
+
+            del state['snapshot']
+            snapshot = None
+            location = self.data_manager.current_location
+            if location:
+                state['out'] += pack_frame(KIND_FIXES, FIX.pack(
+                    location['timestamp'], location['latitude'], location['longitude'],
+                    optional(location['accuracy'])), 1)
+            state['out'] += self.pack_devices() + self.pack_scanning() + pack_frame(KIND_TICK)
+
+    def on_client_readable(self, fd, condition, client):
+        """Handle commands from a client, or its disconnection"""
+        state = self.clients.get(client)
+        if state is None:
+            return False
+        try:
+            data = client.recv(4096)
+        except BlockingIOError:
+            return True
+        except OSError:
+            data = b''
+        if not data:
+            logger.info("🔗 User interface disconnected")
+            self.drop(client)
+            return False
+
+        state['in'] += data
+        while b'\n' in state['in']:
+            line, _, rest = bytes(state['in']).partition(b'\n')
+            state['in'] = bytearray(rest)
+            self.on_command(line.strip().decode('ascii', 'replace'))
+        return True
+
+    def on_command(self, command):
+        """Start or stop scanning on a client's request"""
+        if command == 'start' and not self.scanner.is_scanning:
+            self.scanner.start_scan()
+            self.broadcast(self.pack_scanning())
+        elif command == 'stop' and self.scanner.is_scanning:
+            self.scanner.stop_scan()
+
+    def on_client_writable(self, fd, condition, client):
+        """Continue writing a backlog the socket couldn't take at once, or a snapshot"""
+        state = self.clients.get(client)
+        if state is None:
+            return False
+        self.write(client, state)
+        if client not in self.clients:
+            return False
+        self.fill_snapshot(state)
+        if state['out']:
+            return True
+        state['watches'].remove(state.pop('write_watch'))
+        return False
+
+    def send(self, client, data):
+        """Queue data for a client and write as much as the socket takes"""
+        state = self.clients[client]
+        state['out'] += data
+        if len(state['out']) > MAX_CLIENT_BACKLOG:
+            logger.warning("⚠️  User interface is not keeping up, disconnecting it")
+            self.drop(client)
+            return
+        if 'write_watch' not in state:
+            self.fill_snapshot(state)
+            self.write(client, state)
+            if client in self.clients and (state['out'] or 'snapshot' in state):
+                state['write_watch'] = GLib.io_add_watch(
+                    client.fileno(), GLib.PRIORITY_DEFAULT, GLib.IO_OUT,
+                    self.on_client_writable, client)
+                state['watches'].append(state['write_watch'])
+
+    def write(self, client, state):
+        """Write queued data without blocking"""
+        try:
+            sent = client.send(state['out'])
+        except BlockingIOError:
+            return
+        except OSError:
+            self.drop(client)
+            return
+        del state['out'][:sent]
+
+    def drop(self, client):
+        """Forget a client"""
+        state = self.clients.pop(client, None)
+        if state:
+            for watch in state['watches']:
+                GLib.source_remove(watch)
+        client.close()
+
+    def broadcast(self, data):
+        """Send data to every client"""
+        for client in list(self.clients):
+            self.send(client, data)
+
+    def pack_devices(self):
+        """Build a DEVICES frame of the scanner's interfaces"""
+        ifaces = [device.get_iface() for device in self.scanner.wifi_devices]
+        return pack_frame(
+            KIND_DEVICES, b''.join(DEVICE.pack(pack_text(iface, 16)) for iface in ifaces),
+            len(ifaces))
+
+    def pack_scanning(self):
+        """Build a SCANNING frame of the scanner's state"""
+        return pack_frame(KIND_SCANNING, SCANNING.pack(self.scanner.is_scanning), 1)
+
+    def flush(self, tick=False):
+        """Send the records batched since the last flush"""
+        if not self.clients:
+            self.sightings.clear()
+            self.fixes.clear()
+            self.expired.clear()
+            return
+
+        frames = b''
+        if self.fixes:
+            frames += pack_records(KIND_FIXES, self.fixes)
+            self.fixes.clear()
+        if self.sightings:
+            frames += pack_records(KIND_SIGHTINGS, self.sightings)
+            self.sightings.clear()
+        if self.expired:
+            frames += pack_records(KIND_EXPIRED, self.expired)
+            self.expired.clear()
+        if tick:
+            frames += pack_frame(KIND_TICK)
+        if frames:
+            self.broadcast(frames)
+
+    def on_network_found(self, scanner, network_data):
+        """Batch a sighting"""
+        if self.clients:
+            try:
+                self.sightings.append(pack_sighting(network_data))
+            except (KeyError, TypeError, ValueError, struct.error) as e:
+                logger.warning("Can't publish sighting: %s", e)
+            if len(self.sightings) >= MAX_BATCH:
+                self.flush()
+
+    def on_aps_expired(self, scanner, expired):
+        """Batch access points that dropped out of view"""
+        if self.clients:
+            for entry in expired:
+                try:
+                    self.expired.append(EXPIRED.pack(
+                        pack_bssid(entry['bssid']),
+                        pack_text(entry.get('device_interface'), 16),
+                        entry.get('last_seen') or 0.0))
+                except (KeyError, ValueError, struct.error) as e:
+                    logger.warning("Can't publish expired access point: %s", e)
+
+    def on_scan_tick(self, scanner):
+        """Send everything collected during the tick"""
+        self.flush(tick=True)
+
+    def on_location_updated(self, service, latitude, longitude, accuracy):
+        """Send a fix right away so the location display stays current"""
+        if self.clients:
+            self.fixes.append(FIX.pack(self.scanner.clock(), latitude, longitude, accuracy))
+            self.flush()
+
+    def on_scanning_changed(self, scanner):
+        """Tell clients that scanning stopped"""
+        self.flush(tick=True)
+        self.broadcast(self.pack_scanning())
+
+    def on_scan_error(self, scanner, message):
+        """Pass scan errors on to clients"""
+        self.broadcast(pack_frame(KIND_ERROR, ERROR.pack(pack_text(message, 200)), 1))
+
+    def on_devices_changed(self, scanner):
+        """Send the new interface list"""
+        self.broadcast(self.pack_devices())
+
+class CollectorClient(GObject.Object):
+    """Stand-in for WiFiScanner and LocationService fed by a collector process.
+
+    It emits the signals of both services, so the window connects to it as
+    it would to them, plus scan-started when the collector starts scanning
+    and network-restored for each network the collector already had when
+    the connection was made.
+    clock() returns the collector's time; hand it to the window's
+    DataManager so sightings are tagged against the collector's fixes.
+
+    The collector owns the session store and keeps collecting when the
+    window closes. If none is running, one is started.
+    """
+
+    __gsignals__ = {
+        'network-found': (GObject.SIGNAL_RUN_FIRST, None, (object,)),
+        'network-restored': (GObject.SIGNAL_RUN_FIRST, None, (object,)),
+        'aps-expired': (GObject.SIGNAL_RUN_FIRST, None, (object,)),
+        'scan-tick': (GObject.SIGNAL_RUN_FIRST, None, ()),
+        'scan-started': (GObject.SIGNAL_RUN_FIRST, None, ()),
+        'scan-completed': (GObject.SIGNAL_RUN_FIRST, None, ()),
+        'scan-error': (GObject.SIGNAL_RUN_FIRST, None, (str,)),
+        'devices-changed': (GObject.SIGNAL_RUN_FIRST, None, ()),
+        'location-updated': (GObject.SIGNAL_RUN_FIRST, None, (float, float, float)),
+        'location-error': (GObject.SIGNAL_RUN_FIRST, None, (str,)),
+    }
+
+    def __init__(self, path=None, spawn=True):
+        super().__init__()
+        self.path = path or default_socket_path()
+        self.spawn = spawn
+        self.socket = None
+        self.buffer = bytearray()
+        self.watch_id = None
+        self.retry_id = None
+        self.spawned_at = None
+        self.is_active = False
+        self.pending_command = None  # start or stop asked for while not connected
+
+        # State mirrored from the collector
+        self.is_scanning = False
+        self.wifi_devices = []
+        self.now = None  # newest collector timestamp received
+
+    @classmethod
+    def from_environment(cls):
+        """Create a client as configured by GNOME_WARDRIVE_COLLECTOR, or None"""
+        target = os.environ.get(COLLECTOR_ENVIRONMENT)
+        if not target:
+            return None
+        return cls(None if target == COLLECTOR_DEFAULT else target)
+
+    def clock(self):
+        """Get the collector's current time"""
+        return self.now if self.now is not None else GLib.get_real_time() / 1e6
+
+    def start(self):
+        """Connect to the collector, starting one if needed"""
+        if self.is_active:
+            return
+        self.is_active = True
+        self.connect_collector()
+
+    def stop(self):
+        """Disconnect, leaving the collector running"""
+        self.is_active = False
+        self.pending_command = None
+        if self.retry_id:
+            GLib.source_remove(self.retry_id)
+            self.retry_id = None
+        self.disconnect_collector()
+
+    def connect_collector(self):
+        """Try to reach the collector socket"""
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.connect(self.path)
+        except OSError:
+            client.close()
+            self.on_unreachable()
+            return False
+
+        client.setblocking(False)
+        self.socket = client
+        self.spawned_at = None
+        self.watch_id = GLib.io_add_watch(
+            client.fileno(), GLib.PRIORITY_DEFAULT,
+            GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR, self.on_readable)
+        logger.info("🔗 Connected to the collector at %s", self.path)
+        if self.pending_command:
+            command, self.pending_command = self.pending_command, None
+            self.command(command)
+        return True
+
+    def on_unreachable(self):
+        """Start a collector, or retry later"""
+        now = GLib.get_monotonic_time() / 1e6
+        if self.spawn and self.spawned_at is None:
+            self.spawned_at = now
+            collector = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'collector.py')
+            argv = [sys.executable, collector, '--serve', self.path]
+            logger.info("🔗 Starting a collector: %s", ' '.join(argv))
+            try:
+                Gio.Subprocess.new(argv, Gio.SubprocessFlags.NONE)
+            except GLib.Error as e:
+                self.pending_command = None
+                self.emit('scan-error', f'Failed to start the collector: {e.message}')
+                return
+        elif self.spawned_at is not None and now - self.spawned_at > SPAWN_TIMEOUT:
+            self.spawned_at = None
+            self.pending_command = None
+            self.emit('scan-error', 'The collector did not start')
+
+        if not self.retry_id:
+            self.retry_id = GLib.timeout_add_seconds(RECONNECT_INTERVAL, self.on_retry)
+
+    def on_retry(self):
+        """Try to reconnect"""
+        self.retry_id = None
+        if self.is_active and not self.socket:
+            self.connect_collector()
+        return False  # Don't repeat
+
+    def disconnect_collector(self):
+        """Close the connection"""
+        if self.watch_id:
+            GLib.source_remove(self.watch_id)
+            self.watch_id = None
+        if self.socket:
+            self.socket.close()
+            self.socket = None
+        self.buffer.clear()
+
+    def on_readable(self, fd, condition):
+        """Read and dispatch whatever the collector sent"""
+        try:
+            data = self.socket.recv(65536)
+        except BlockingIOError:
+            return True
+        except OSError:
+            data = b''
+        if not data:
+            return self.on_disconnected()
+
+        self.buffer += data
+        try:
+            frames = split_frames(self.buffer)
+        except ValueError as e:
+            logger.error("❌ Bad data from the collector: %s", e)
+            return self.on_disconnected()
+        for kind, records in frames:
+            self.dispatch(kind, records)
+        return True
+
+    def on_disconnected(self):
+        """Handle the collector going away"""
+        logger.warning("⚠️  Lost the connection to the collector")
+        self.watch_id = None
+        self.disconnect_collector()
+        if self.is_scanning:
+            self.is_scanning = False
+            self.emit('scan-completed')
+        if self.is_active and not self.retry_id:
+            self.retry_id = GLib.timeout_add_seconds(RECONNECT_INTERVAL, self.on_retry)
+        return False
+
+    def dispatch(self, kind, records):
+        """Re-emit a frame's records as service signals"""
+        if kind == KIND_SIGHTINGS:
+            for fields in records:
+                network_data = unpack_sighting(fields)
+                if self.now is None or network_data['timestamp'] > self.now:
+                    self.now = network_data['timestamp']
+                self.emit('network-found', network_data)
+        elif kind == KIND_SNAPSHOT:
+            for fields in records:
+                self.emit('network-restored', unpack_sighting(fields))
+        elif kind == KIND_FIXES:
+            for timestamp, latitude, longitude, accuracy in records:
+                self.now = max(self.now or timestamp, timestamp)
+                self.emit('location-updated', latitude, longitude,
+                          0.0 if math.isnan(accuracy) else accuracy)
+        elif kind == KIND_EXPIRED:
+            self.emit('aps-expired', [
+                {'bssid': unpack_bssid(bssid), 'device_interface': unpack_text(iface),
+                 'last_seen': last_seen}
+                for bssid, iface, last_seen in records
+            ])
+        elif kind == KIND_TICK:
+            self.emit('scan-tick')
+        elif kind == KIND_DEVICES:
+            self.wifi_devices = [unpack_text(iface) for iface, in records]
+            self.emit('devices-changed')
+        elif kind == KIND_SCANNING:
+            scanning = bool(records[0][0])
+            if scanning != self.is_scanning:
+                self.is_scanning = scanning
+                self.emit('scan-started' if scanning else 'scan-completed')
+        elif kind == KIND_ERROR:
+            self.emit('scan-error', unpack_text(records[0][0]))
+
+    def command(self, command):
+        """Send a command line to the collector, or once connected to it"""
+        if not self.socket:
+            self.pending_command = command
+            return
+        try:
+            self.socket.send(command.encode('ascii') + b'\n')
+        except OSError as e:
+            logger.warning("⚠️  Can't reach the collector: %s", e)
+            self.pending_command = command
+
+    def start_scan(self):
+        """Ask the collector to start scanning"""
+        self.command('start')
+
+    def stop_scan(self):
+        """Ask the collector to stop scanning"""
+        self.command('stop')
+
+    def refresh_wifi_devices(self):
+        """The collector reports its devices as they change"""
+
+    def update_location(self, latitude, longitude):
+        """The collector schedules its own scans"""
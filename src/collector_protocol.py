@@ -0,0 +1,176 @@
+"""
+Collector Protocol
+Frames of fixed-size binary records exchanged between a collector process
+and the user interface
+"""
+
+from itertools import islice
+import math
+import struct
+
+try:
+    from .classifier import SECURITY_CATEGORIES
+except ImportError:
+    try:
+        from gnome_wardrive.classifier import SECURITY_CATEGORIES
+    except ImportError:
+        from classifier import SECURITY_CATEGORIES
+
+# Frame header: magic, protocol version, record kind, record count
+HEADER = struct.Struct('<2sBBI')
+MAGIC = b'WD'
+PROTOCOL_VERSION = 2
+
+# Record kinds and their fixed-size layouts
+KIND_SIGHTINGS = 1  # one per network-found
+KIND_FIXES = 2  # one per location fix
+KIND_EXPIRED = 3  # one per access point that dropped out of view
+KIND_TICK = 4  # end of a scan tick, no records
+KIND_DEVICES = 5  # the collector's WiFi interfaces, replacing the previous list
+KIND_SCANNING = 6  # whether the collector is scanning
+KIND_ERROR = 7  # a scan error message
+KIND_SNAPSHOT = 8  # one per network collected before the client connected
+
+SIGHTING = struct.Struct('<6sB32sBHHB16sdddd')  # bssid, ssid length, ssid, signal,
+                                                # frequency, channel, security, iface,
+                                                # timestamp, latitude, longitude, accuracy
+FIX = struct.Struct('<dddd')  # timestamp, latitude, longitude, accuracy
+EXPIRED = struct.Struct('<6s16sd')  # bssid, iface, last seen
+DEVICE = struct.Struct('<16s')  # iface
+SCANNING = struct.Struct('<B')
+ERROR = struct.Struct('<200s')
+
+RECORDS = {
+    KIND_SIGHTINGS: SIGHTING,
+    KIND_FIXES: FIX,
+    KIND_EXPIRED: EXPIRED,
+    KIND_DEVICES: DEVICE,
+    KIND_SCANNING: SCANNING,
+    KIND_ERROR: ERROR,
+    KIND_SNAPSHOT: SIGHTING,
+}
+
+# Security labels by their one-byte code
+SECURITY_LABELS = ('Unknown',) + tuple(SECURITY_CATEGORIES)
+SECURITY_CODES = {label: code for code, label in enumerate(SECURITY_LABELS)}
+
+# Records per frame; larger batches are split
+MAX_BATCH = 1024
+
+def pack_frame(kind, records=b'', count=0):
+    """Build a frame from already packed records"""
+    return HEADER.pack(MAGIC, PROTOCOL_VERSION, kind, count) + records
+
+def pack_records(kind, records):
+    """Build frames of at most MAX_BATCH packed records"""
+    return b''.join(
+        pack_frame(kind, b''.join(records[start:start + MAX_BATCH]),
+                   len(records[start:start + MAX_BATCH]))
+        for start in range(0, len(records), MAX_BATCH))
+
+def pack_text(value, size):
+    """Encode a string into a fixed-size field"""
+    return value.encode('utf-8')[:size] if value else b''
+
+def unpack_text(value):
+    """Decode a fixed-size string field"""
+    return value.rstrip(b'\0').decode('utf-8', 'replace')
+
+def pack_bssid(bssid):
+    """Pack an AA:BB:CC:DD:EE:FF BSSID into 6 bytes"""
+    return bytes.fromhex(bssid.replace(':', ''))
+
+def unpack_bssid(value):
+    """Format 6 bytes as an AA:BB:CC:DD:EE:FF BSSID"""
+    return ':'.join(f'{byte:02X}' for byte in value)
+
+def optional(value):
+    """Use NaN for missing floating point fields"""
+    return math.nan if value is None else value
+
+def pack_sighting(network_data):
+    """Pack a network-found dict into a SIGHTING record"""
+    ssid = network_data.get('ssid') or ''
+    ssid_bytes = b'' if ssid.startswith('Hidden_') else pack_text(ssid, 32)
+    return SIGHTING.pack(
+        pack_bssid(network_data['bssid']),
+        len(ssid_bytes),
+        ssid_bytes,
+        max(0, min(255, network_data.get('signal_strength') or 0)),
+        network_data.get('frequency') or 0,
+        network_data.get('channel') or 0,
+        SECURITY_CODES.get(network_data.get('security'), 0),
+        pack_text(network_data.get('device_interface'), 16),
+        network_data['timestamp'],
+        optional(network_data.get('latitude')),
+        optional(network_data.get('longitude')),
+        optional(network_data.get('accuracy')),
+    )
+
+def unpack_sighting(fields):
+    """Turn SIGHTING fields back into a network-found dict"""
+    (bssid, ssid_length, ssid, signal, frequency, channel, security, iface,
+     timestamp, latitude, longitude, accuracy) = fields
+    bssid = unpack_bssid(bssid)
+    network_data = {
+        'ssid': ssid[:ssid_length].decode('utf-8', 'replace') or f"Hidden_{bssid}",
+        'bssid': bssid,
+        'signal_strength': signal,
+        'frequency': frequency,
+        'channel': channel,
+        'security': SECURITY_LABELS[security] if security < len(SECURITY_LABELS) else 'Unknown',
+        'device_interface': unpack_text(iface),
+        'timestamp': timestamp,
+        'last_seen': timestamp,
+    }
+    if not math.isnan(latitude):
+        network_data['latitude'] = latitude
+        network_data['longitude'] = longitude
+        network_data['accuracy'] = None if math.isnan(accuracy) else accuracy
+    return network_data
+
+def pack_snapshot(networks):
+    """Yield SNAPSHOT frames of at most MAX_BATCH networks each.
+
+    Each frame is packed only when asked for, so a sender can stream a large
+    session without holding all of it in memory, and every frame reflects
+    the networks as they are when it is sent.
+    """
+    networks = iter(networks)
+    while True:
+        batch = list(islice(networks, MAX_BATCH))
+        if not batch:
+            return
+        records = []
+        for network in batch:
+            try:
+                records.append(pack_sighting(network))
+            except (KeyError, TypeError, ValueError, struct.error):
+                pass  # Not a sighting the scanner could have produced
+        if records:
+            yield pack_frame(KIND_SNAPSHOT, b''.join(records), len(records))
+
+def split_frames(buffer):
+    """Take the complete frames off the front of a bytearray.
+
+    Returns a list of (kind, [record fields]) and removes what it parsed.
+    Raises ValueError on a stream that is not speaking this protocol.
+    """
+    frames = []
+    offset = 0
+    while len(buffer) - offset >= HEADER.size:
+        magic, version, kind, count = HEADER.unpack_from(buffer, offset)
+        if magic != MAGIC or version != PROTOCOL_VERSION:
+            raise ValueError("not a collector stream")
+        record = RECORDS.get(kind)
+        if record is None and count:
+            raise ValueError(f"unknown record kind {kind}")
+        size = record.size * count if record else 0
+        end = offset + HEADER.size + size
+        if len(buffer) < end:
+            break
+        records = list(record.iter_unpack(buffer[offset + HEADER.size:end])) if record else []
+        frames.append((kind, records))
+        offset = end
+    del buffer[:offset]
+    return frames
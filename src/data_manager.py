@@ -3,67 +3,351 @@ Data Manager
 Handles storage, management, and export of wardriving data
 """
 
+import os
 import json
 import csv
-import xml.etree.ElementTree as ET
 import time
 from datetime import datetime
-import gpxpy
-import gpxpy.gpx
+try:
+    from .observations import ObservationLog
+    from .track import LocationTrack
+    from .spatial_index import SpatialIndex
+    from .ap_locator import APLocator
+    from .network_stats import NetworkStatistics
+    from .metrics import metrics
+    from .exporters import GPXWriter, KMLWriter, KMZStream, open_text_stream
+    from .log import get_logger
+except ImportError:
+    try:
+        from gnome_wardrive.observations import ObservationLog
+        from gnome_wardrive.track import LocationTrack
+        from gnome_wardrive.spatial_index import SpatialIndex
+        from gnome_wardrive.ap_locator import APLocator
+        from gnome_wardrive.network_stats import NetworkStatistics
+        from gnome_wardrive.metrics import metrics
+        from gnome_wardrive.exporters import GPXWriter, KMLWriter, KMZStream, open_text_stream
+        from gnome_wardrive.log import get_logger
+    except ImportError:
+        from observations import ObservationLog
+        from track import LocationTrack
+        from spatial_index import SpatialIndex
+        from ap_locator import APLocator
+        from network_stats import NetworkStatistics
+        from metrics import metrics
+        from exporters import GPXWriter, KMLWriter, KMZStream, open_text_stream
+        from log import get_logger
+
+logger = get_logger('data_manager')
+
+# Number of exported items between progress reports and cancellation checks
+EXPORT_CHUNK = 1024
+
+class ExportCancelled(Exception):
+    """Raised when an export is cancelled before it completes"""
+
+# Seconds a sighting waits for a later fix before it is tagged without one
+MAX_TAG_DELAY = 10.0
+
+# Fields of the summary record that describe the best (strongest) sighting
+BEST_SIGHTING_FIELDS = (
+    'signal_strength', 'frequency', 'channel', 'device_interface',
+    'timestamp', 'latitude', 'longitude', 'accuracy',
+)
 
 class DataManager:
     """Manages wardriving data collection and export"""
     
-    def __init__(self):
+    def __init__(self, store=None):
         # Data storage
         self.networks = {}  # BSSID -> network data
-        self.locations = []  # Location history
+        self.observations = {}  # BSSID -> ObservationLog
+        self.track = LocationTrack()  # Location history
         self.current_location = None
         
+        # Sightings newer than the last fix, waiting to be tagged (time order).
+        # The first deferred_stored of them are already in the store untagged.
+        self.deferred = []
+        self.deferred_stored = 0
+        
+        # AP position estimates from the sighting history, and a grid of them
+        self.locator = APLocator()
+        self.index = SpatialIndex()
+        
+        # Optional durable session storage (SessionStore)
+        self.store = store
+        
+        # Progress callback and cancellation of the running export
+        self.export_progress = None
+        self.export_cancel_event = None
+        
+        # Source of timestamps, replaced by the trace clock during replay
+        self.clock = time.time
+        
         # Statistics
+        self.stats = NetworkStatistics()
         self.scan_start_time = None
         self.total_networks = 0
         
+    def watch_queues(self):
+        """Report the sightings and writes waiting to be processed as metrics"""
+        metrics.watch('deferred_sightings', lambda: len(self.deferred))
+        metrics.watch('store_pending', lambda: len(self.store.pending_observations) if self.store else 0)
+        
+    def open_session(self, resume=True):
+        """Start or resume a session in the attached store"""
+        if not self.store:
+            return False
+            
+        session_id, resumed = self.store.start_session(resume)
+        if resumed:
+            for network in self.store.load_networks():
+                self.networks[network['bssid']] = network
+                self.stats.add(network, new=False)
+            for bssid, timestamp, lat, lon, accuracy, signal, iface in self.store.load_observations():
+                if bssid not in self.observations:
+                    self.observations[bssid] = ObservationLog()
+                self.observations[bssid].append(timestamp, lat, lon, accuracy, signal or 0, iface)
+                self.locator.add_sighting(bssid, lat, lon, signal or 0)
+            for bssid in self.locator.sums:
+                self.index.update(bssid, *self.locator.centroid(bssid))
+            for location in self.store.load_track():
+                self.track.append(
+                    location['timestamp'], location['latitude'],
+                    location['longitude'], location['accuracy'])
+                self.current_location = location
+            self.total_networks = len(self.networks)
+            logger.info("✅ Resumed session %s with %d networks", session_id, len(self.networks))
+            
+        return resumed
+        
+    def flush(self):
+        """Commit sightings and track points collected since the last flush.
+
+        Sightings still waiting for a fix are stored untagged, and get their
+        position in the store once they are tagged, so a crash loses at
+        most the current scan tick.
+        """
+        self.tag_deferred()
+        if self.store:
+            started = metrics.start()
+            for network_data in self.deferred[self.deferred_stored:]:
+                self.store.add_observation(network_data)
+            self.deferred_stored = len(self.deferred)
+            self.store.flush()
+            metrics.stop('store_flush', started)
+            
+    def close(self):
+        """Finish the current session and close the attached store"""
+        self.tag_deferred(final=True)
+        if self.store:
+            self.store.end_session()
+            self.store.close()
+            self.store = None
+        
     def add_network(self, network_data):
         """Add or update network data"""
         bssid = network_data.get('bssid')
         if not bssid:
             return
+        started = metrics.start()
             
-        # Add current location to network data
-        if self.current_location:
-            network_data.update({
-                'latitude': self.current_location['latitude'],
-                'longitude': self.current_location['longitude'],
-                'accuracy': self.current_location['accuracy']
-            })
-            
-        # Update or add network
-        if bssid in self.networks:
-            # Update existing network (better signal, more recent timestamp)
-            existing = self.networks[bssid]
-            if (network_data.get('signal_strength', -100) > 
-                existing.get('signal_strength', -100)):
-                # Keep the better signal strength data
-                existing.update(network_data)
-            existing['last_seen'] = network_data.get('timestamp', time.time())
+        timestamp = network_data.get('timestamp')
+        if timestamp is None:
+            timestamp = network_data['timestamp'] = self.clock()
+        
+        # Update or add the summary record
+        existing = self.networks.get(bssid)
+        if existing is not None:
+            counted = self.stats.key(existing)
+            existing['ssid'] = network_data.get('ssid', existing.get('ssid'))
+            existing['security'] = network_data.get('security', existing.get('security'))
+            existing['last_seen'] = timestamp
+            self.stats.update(counted, existing)
         else:
             # New network
-            self.networks[bssid] = network_data
+            network = dict(network_data)
+            network['first_seen'] = timestamp
+            network['last_seen'] = timestamp
+            self.networks[bssid] = network
             self.total_networks += 1
+            self.stats.add(network, timestamp)
+            
+        if self.store:
+            self.store.update_network(self.networks[bssid])
+            
+        # Tag the sighting with the position at its time, or wait for the next fix
+        last_fix = self.track.last_time()
+        if self.deferred or last_fix is None or timestamp > last_fix:
+            self.deferred.append(network_data)
+        else:
+            self.record_sighting(network_data, self.track.position_at(timestamp))
+        metrics.stop('add_network', started)
+            
+    def restore_network(self, network):
+        """Add or refresh the summary of a network collected elsewhere, without a sighting"""
+        bssid = network.get('bssid')
+        if not bssid:
+            return
+            
+        existing = self.networks.get(bssid)
+        if existing is not None:
+            counted = self.stats.key(existing)
+            last_seen = existing.get('last_seen')
+            existing.update(network)
+            if last_seen and last_seen > existing.get('last_seen', 0):
+                existing['last_seen'] = last_seen
+            self.stats.update(counted, existing)
+        else:
+            self.networks[bssid] = dict(network)
+            self.total_networks += 1
+            self.stats.add(network, new=False)
+            
+        # Place it by the summary until sightings give an estimate
+        if bssid not in self.locator.sums and 'latitude' in network and 'longitude' in network:
+            self.index.update(bssid, network['latitude'], network['longitude'])
+            
+    def record_sighting(self, network_data, position, stored=False):
+        """Store a sighting tagged with its (latitude, longitude, accuracy), or None.
+
+        stored says the sighting was already written to the store untagged.
+        """
+        bssid = network_data['bssid']
+        if position:
+            network_data['latitude'], network_data['longitude'], network_data['accuracy'] = position
+            latitude, longitude, accuracy = position
+        else:
+            latitude = longitude = accuracy = None
+        
+        # Append the sighting to the network's observation history
+        log = self.observations.get(bssid)
+        if log is None:
+            log = self.observations[bssid] = ObservationLog()
+        is_best = log.append(
+            network_data['timestamp'],
+            latitude,
+            longitude,
+            accuracy,
+            network_data.get('signal_strength', 0),
+            network_data.get('device_interface'),
+        )
+        if position:
+            self.locator.add_sighting(
+                bssid, latitude, longitude, network_data.get('signal_strength', 0))
+            self.index.update(bssid, *self.locator.estimate(bssid))
+        
+        network = self.networks[bssid]
+        if is_best:
+            counted = self.stats.key(network)
+            for field in BEST_SIGHTING_FIELDS:
+                if field in network_data:
+                    network[field] = network_data[field]
+            self.stats.update(counted, network)
+                    
+        if self.store:
+            if not stored:
+                self.store.add_observation(network_data)
+            elif position:
+                self.store.update_position(network_data)
+            self.store.update_network(network)
+            
+    def tag_deferred(self, final=False):
+        """Tag waiting sightings that a fix now covers, or that waited too long.
+
+        Sightings are kept in time order, so the ones that can be resolved
+        form a prefix of the queue and are interpolated as one batch.
+        """
+        if not self.deferred:
+            return
+            
+        last_fix = self.track.last_time()
+        oldest_allowed = self.clock() - MAX_TAG_DELAY
+        count = 0
+        for network_data in self.deferred:
+            timestamp = network_data['timestamp']
+            if not (final or timestamp < oldest_allowed
+                    or (last_fix is not None and timestamp <= last_fix)):
+                break
+            count += 1
+            
+        if not count:
+            return
             
+        ready = self.deferred[:count]
+        del self.deferred[:count]
+        stored = min(count, self.deferred_stored)
+        self.deferred_stored -= stored
+        positions = self.track.positions_at([network_data['timestamp'] for network_data in ready])
+        for index, (network_data, position) in enumerate(zip(ready, positions)):
+            self.record_sighting(network_data, position, index < stored)
+            
+    def expire_networks(self, expired):
+        """Record when networks dropped out of view"""
+        for entry in expired:
+            network = self.networks.get(entry.get('bssid'))
+            if network and entry.get('last_seen'):
+                network['last_seen'] = max(network.get('last_seen', 0), entry['last_seen'])
+                
     def update_location(self, latitude, longitude, accuracy):
         """Update current location"""
         location_data = {
             'latitude': latitude,
             'longitude': longitude,
             'accuracy': accuracy,
-            'timestamp': time.time()
+            'timestamp': self.clock()
         }
         
         self.current_location = location_data
-        self.locations.append(location_data)
+        self.track.append(location_data['timestamp'], latitude, longitude, accuracy)
+        
+        if self.store:
+            self.store.add_track_point(location_data)
+            
+        # Resolve the sightings that were waiting for this fix
+        self.tag_deferred()
+        
+    def estimate_ap_positions(self):
+        """Refine the position estimates of APs with new sightings"""
+        changed = list(self.locator.dirty)
+        refined = self.locator.refine(self.observations)
+        for bssid in changed:
+            position = self.locator.estimate(bssid)
+            if position is not None:
+                self.index.update(bssid, *position)
+        return refined
+        
+    def get_ap_position(self, network):
+        """Get the estimated (latitude, longitude) of a network's AP"""
+        position = self.locator.estimate(network.get('bssid'))
+        if position is None and 'latitude' in network and 'longitude' in network:
+            position = (network['latitude'], network['longitude'])
+        return position
         
+    def snapshot(self):
+        """Get a detached copy of the collected data for exporting from another thread.
+
+        The positions of APs with new sightings are refined when the snapshot
+        is exported, off the main thread; adopt_positions() takes them back.
+        """
+        snapshot = DataManager()
+        snapshot.networks = {bssid: dict(network) for bssid, network in self.networks.items()}
+        snapshot.track = self.track.copy()
+        snapshot.current_location = self.current_location
+        snapshot.locator = self.locator.copy(self.observations)
+        return snapshot
+        
+    def adopt_positions(self, snapshot):
+        """Take the positions refined in a snapshot for APs not seen since"""
+        positions = self.locator.positions
+        for bssid, position in snapshot.locator.positions.items():
+            # Positions the snapshot didn't refine are the ones it copied
+            if position is positions.get(bssid) or bssid not in self.locator.dirty:
+                continue
+            if self.locator.sums[bssid][3] != snapshot.locator.sums[bssid][3]:
+                continue  # Sighted again since
+            positions[bssid] = position
+            self.locator.dirty.discard(bssid)
+            self.index.update(bssid, *position)
+            
     def get_network_count(self):
         """Get total number of unique networks"""
         return len(self.networks)
@@ -72,20 +356,74 @@ class DataManager:
         """Get list of all networks"""
         return list(self.networks.values())
         
-    def export_data(self, file_path, format_type):
-        """Export data in specified format"""
+    def get_networks_in_bbox(self, south, west, north, east):
+        """Get the networks whose estimated position lies in a bounding box"""
+        return [self.networks[bssid] for bssid in self.index.in_bbox(south, west, north, east)]
+        
+    def get_networks_within(self, latitude, longitude, radius):
+        """Get (distance in metres, network) within a radius of a point, nearest first"""
+        return [(distance, self.networks[bssid])
+                for distance, bssid in self.index.within(latitude, longitude, radius)]
+        
+    def get_nearest_networks(self, latitude, longitude, count=1):
+        """Get (distance in metres, network) of the nearest networks to a point"""
+        return [(distance, self.networks[bssid])
+                for distance, bssid in self.index.nearest(latitude, longitude, count)]
+        
+    def export_data(self, file_path, format_type, progress=None, cancel_event=None):
+        """Export data in specified format
+        
+        progress is called with the completed fraction (0.0-1.0) as the
+        export advances. Setting cancel_event (a threading.Event) aborts the
+        export with ExportCancelled and removes the partial file.
+        """
+        self.export_progress = progress
+        self.export_cancel_event = cancel_event
+        started = metrics.start()
         try:
+            self.estimate_ap_positions()
+            
             if format_type == 'csv':
                 return self.export_csv(file_path)
             elif format_type == 'kml':
                 return self.export_kml(file_path)
+            elif format_type == 'kmz':
+                return self.export_kmz(file_path)
             elif format_type == 'gpx':
                 return self.export_gpx(file_path)
             else:
                 return False
+        except ExportCancelled:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
         except Exception as e:
-            print(f"Export error: {e}")
+            logger.error("Export error: %s", e)
             return False
+        finally:
+            self.export_progress = None
+            self.export_cancel_event = None
+            metrics.stop('export', started)
+            
+    def iter_export(self, items, done=0, total=None):
+        """Iterate over items being exported, reporting progress and checking for cancellation"""
+        progress = self.export_progress
+        cancel_event = self.export_cancel_event
+        if total is None:
+            total = len(items)
+            
+        for count, item in enumerate(items, done + 1):
+            if count % EXPORT_CHUNK == 0:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ExportCancelled()
+                if progress:
+                    progress(count / total)
+            yield item
+            
+        if cancel_event is not None and cancel_event.is_set():
+            raise ExportCancelled()
+        if progress and total:
+            progress((done + len(items)) / total)
             
     def export_csv(self, file_path):
         """Export data to CSV format"""
@@ -99,7 +437,8 @@ class DataManager:
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
             writer.writeheader()
             
-            for network in self.networks.values():
+            for network in self.iter_export(self.networks.values()):
+                position = self.get_ap_position(network) or ('', '')
                 writer.writerow({
                     'SSID': network.get('ssid', ''),
                     'BSSID': network.get('bssid', ''),
@@ -107,14 +446,14 @@ class DataManager:
                     'Signal_Strength': network.get('signal_strength', ''),
                     'Frequency': network.get('frequency', ''),
                     'Channel': network.get('channel', ''),
-                    'Latitude': network.get('latitude', ''),
-                    'Longitude': network.get('longitude', ''),
+                    'Latitude': position[0],
+                    'Longitude': position[1],
                     'Accuracy': network.get('accuracy', ''),
                     'Timestamp': datetime.fromtimestamp(
                         network.get('timestamp', 0)).isoformat(),
                     'Device_Interface': network.get('device_interface', ''),
                     'First_Seen': datetime.fromtimestamp(
-                        network.get('timestamp', 0)).isoformat(),
+                        network.get('first_seen', network.get('timestamp', 0))).isoformat(),
                     'Last_Seen': datetime.fromtimestamp(
                         network.get('last_seen', 0)).isoformat(),
                 })
@@ -123,161 +462,94 @@ class DataManager:
         
     def export_kml(self, file_path):
         """Export data to KML format for Google Earth"""
-        # Create KML structure
-        kml = ET.Element('kml', xmlns='http://www.opengis.net/kml/2.2')
-        document = ET.SubElement(kml, 'Document')
+        with open_text_stream(file_path) as stream:
+            self.write_kml(stream)
+            
+        return True
         
-        # Add document info
-        ET.SubElement(document, 'name').text = 'WiFi Wardriving Data'
-        ET.SubElement(document, 'description').text = f'WiFi networks found during wardriving session. Total networks: {len(self.networks)}'
+    def export_kmz(self, file_path):
+        """Export data to KMZ (zipped KML) format"""
+        with KMZStream(file_path) as stream:
+            self.write_kml(stream)
+            
+        return True
         
-        # Add styles for different security types
-        self.add_kml_styles(document)
+    def write_kml(self, stream):
+        """Stream network placemarks as KML"""
+        writer = KMLWriter(stream)
+        writer.begin(
+            'WiFi Wardriving Data',
+            f'WiFi networks found during wardriving session. Total networks: {len(self.networks)}'
+        )
         
-        # Add network placemarks
-        for network in self.networks.values():
-            if 'latitude' not in network or 'longitude' not in network:
+        for network in self.iter_export(self.networks.values()):
+            position = self.get_ap_position(network)
+            if position is None:
                 continue
-                
-            placemark = ET.SubElement(document, 'Placemark')
-            ET.SubElement(placemark, 'name').text = network.get('ssid', 'Hidden Network')
-            
-            # Description with network details
-            description = f"""
-            <![CDATA[
-            <b>SSID:</b> {network.get('ssid', 'Hidden')}<br/>
-            <b>BSSID:</b> {network.get('bssid', 'Unknown')}<br/>
-            <b>Security:</b> {network.get('security', 'Unknown')}<br/>
-            <b>Signal Strength:</b> {network.get('signal_strength', 'Unknown')} dBm<br/>
-            <b>Frequency:</b> {network.get('frequency', 'Unknown')} MHz<br/>
-            <b>Channel:</b> {network.get('channel', 'Unknown')}<br/>
-            <b>First Seen:</b> {datetime.fromtimestamp(network.get('timestamp', 0)).strftime('%Y-%m-%d %H:%M:%S')}<br/>
-            <b>Accuracy:</b> ±{network.get('accuracy', 'Unknown')}m
-            ]]>
-            """
-            ET.SubElement(placemark, 'description').text = description
-            
-            # Style based on security
-            security = network.get('security', 'Unknown')
-            if security == 'Open':
-                ET.SubElement(placemark, 'styleUrl').text = '#open_style'
-            elif security in ['WEP']:
-                ET.SubElement(placemark, 'styleUrl').text = '#wep_style'
-            elif security in ['WPA', 'WPA2', 'WPA3']:
-                ET.SubElement(placemark, 'styleUrl').text = '#wpa_style'
-            else:
-                ET.SubElement(placemark, 'styleUrl').text = '#unknown_style'
-                
-            # Point coordinates
-            point = ET.SubElement(placemark, 'Point')
-            coordinates = f"{network['longitude']},{network['latitude']},0"
-            ET.SubElement(point, 'coordinates').text = coordinates
+            writer.add_network(network, position)
             
-        # Write KML file
-        tree = ET.ElementTree(kml)
-        tree.write(file_path, encoding='utf-8', xml_declaration=True)
-        
-        return True
-        
-    def add_kml_styles(self, document):
-        """Add KML styles for different security types"""
-        # Open networks (red)
-        style = ET.SubElement(document, 'Style', id='open_style')
-        icon_style = ET.SubElement(style, 'IconStyle')
-        ET.SubElement(icon_style, 'color').text = 'ff0000ff'  # Red
-        icon = ET.SubElement(icon_style, 'Icon')
-        ET.SubElement(icon, 'href').text = 'http://maps.google.com/mapfiles/kml/pushpin/red-pushpin.png'
-        
-        # WEP networks (orange)
-        style = ET.SubElement(document, 'Style', id='wep_style')
-        icon_style = ET.SubElement(style, 'IconStyle')
-        ET.SubElement(icon_style, 'color').text = 'ff0080ff'  # Orange
-        icon = ET.SubElement(icon_style, 'Icon')
-        ET.SubElement(icon, 'href').text = 'http://maps.google.com/mapfiles/kml/pushpin/orange-pushpin.png'
-        
-        # WPA/WPA2/WPA3 networks (green)
-        style = ET.SubElement(document, 'Style', id='wpa_style')
-        icon_style = ET.SubElement(style, 'IconStyle')
-        ET.SubElement(icon_style, 'color').text = 'ff00ff00'  # Green
-        icon = ET.SubElement(icon_style, 'Icon')
-        ET.SubElement(icon, 'href').text = 'http://maps.google.com/mapfiles/kml/pushpin/grn-pushpin.png'
-        
-        # Unknown security (yellow)
-        style = ET.SubElement(document, 'Style', id='unknown_style')
-        icon_style = ET.SubElement(style, 'IconStyle')
-        ET.SubElement(icon_style, 'color').text = 'ff00ffff'  # Yellow
-        icon = ET.SubElement(icon_style, 'Icon')
-        ET.SubElement(icon, 'href').text = 'http://maps.google.com/mapfiles/kml/pushpin/ylw-pushpin.png'
+        writer.end()
         
     def export_gpx(self, file_path):
         """Export data to GPX format"""
-        # Create GPX object
-        gpx = gpxpy.gpx.GPX()
-        gpx.name = 'WiFi Wardriving Session'
-        gpx.description = f'WiFi networks found during wardriving. Total: {len(self.networks)}'
-        
-        # Add networks as waypoints
-        for network in self.networks.values():
-            if 'latitude' not in network or 'longitude' not in network:
-                continue
-                
-            waypoint = gpxpy.gpx.GPXWaypoint(
-                latitude=network['latitude'],
-                longitude=network['longitude'],
-                name=network.get('ssid', 'Hidden Network')
+        with open_text_stream(file_path) as stream:
+            writer = GPXWriter(stream)
+            writer.begin(
+                'WiFi Wardriving Session',
+                f'WiFi networks found during wardriving. Total: {len(self.networks)}'
             )
             
-            # Add description
-            waypoint.description = (
-                f"BSSID: {network.get('bssid', 'Unknown')}, "
-                f"Security: {network.get('security', 'Unknown')}, "
-                f"Signal: {network.get('signal_strength', 'Unknown')} dBm"
-            )
-            
-            # Add timestamp
-            if 'timestamp' in network:
-                waypoint.time = datetime.fromtimestamp(network['timestamp'])
-                
-            gpx.waypoints.append(waypoint)
-            
-        # Add track from location history if available
-        if self.locations:
-            track = gpxpy.gpx.GPXTrack()
-            track.name = 'Wardriving Route'
-            
-            segment = gpxpy.gpx.GPXTrackSegment()
+            total = len(self.networks) + len(self.track)
             
-            for location in self.locations:
-                point = gpxpy.gpx.GPXTrackPoint(
-                    latitude=location['latitude'],
-                    longitude=location['longitude'],
-                    time=datetime.fromtimestamp(location['timestamp'])
+            # Add networks as waypoints
+            for network in self.iter_export(self.networks.values(), 0, total):
+                position = self.get_ap_position(network)
+                if position is None:
+                    continue
+                    
+                writer.add_waypoint(
+                    position[0],
+                    position[1],
+                    network.get('ssid', 'Hidden Network'),
+                    f"BSSID: {network.get('bssid', 'Unknown')}, "
+                    f"Security: {network.get('security', 'Unknown')}, "
+                    f"Signal: {network.get('signal_strength', 'Unknown')} dBm",
+                    network.get('timestamp'),
                 )
-                segment.points.append(point)
                 
-            track.segments.append(segment)
-            gpx.tracks.append(track)
-            
-        # Write GPX file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(gpx.to_xml())
+            # Add track from location history if available
+            if len(self.track):
+                writer.begin_track('Wardriving Route')
+                points = self.iter_export(self.track, len(self.networks), total)
+                for timestamp, latitude, longitude, _ in points:
+                    writer.add_track_point(latitude, longitude, timestamp)
+                writer.end_track()
+                
+            writer.end()
             
         return True
         
     def clear_data(self):
         """Clear all collected data"""
         self.networks.clear()
-        self.locations.clear()
+        self.observations.clear()
+        self.locator.clear()
+        self.index.clear()
+        self.track.clear()
+        self.deferred.clear()
+        self.deferred_stored = 0
         self.current_location = None
+        self.stats.clear()
         self.total_networks = 0
         
+        # Cleared data starts a fresh session
+        if self.store:
+            self.store.end_session()
+            self.store.start_session(resume=False)
+        
     def get_statistics(self):
-        """Get scanning statistics"""
-        return {
-            'total_networks': len(self.networks),
-            'open_networks': len([n for n in self.networks.values() if n.get('security') == 'Open']),
-            'wep_networks': len([n for n in self.networks.values() if n.get('security') == 'WEP']),
-            'wpa_networks': len([n for n in self.networks.values() if n.get('security', '').startswith('WPA')]),
-            'locations_recorded': len(self.locations),
-            'scan_duration': time.time() - self.scan_start_time if self.scan_start_time else 0
-        }
\ No newline at end of file
+        """Get scanning statistics from the running counters"""
+        statistics = self.stats.snapshot(self.clock())
+        statistics['locations_recorded'] = self.track.received
+        statistics['scan_duration'] = time.time() - self.scan_start_time if self.scan_start_time else 0
+        return statistics
@@ -0,0 +1,160 @@
+"""
+Exporters
+Streaming writers for the export formats
+"""
+
+import io
+import zipfile
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+try:
+    from .classifier import security_category
+except ImportError:
+    try:
+        from gnome_wardrive.classifier import security_category
+    except ImportError:
+        from classifier import security_category
+
+# Buffer size used for export files
+BUFFER_SIZE = 64 * 1024
+
+# KML style per security category: (style id, icon colour, pushpin)
+KML_STYLES = (
+    ('open_style', 'ff0000ff', 'red'),  # Red
+    ('wep_style', 'ff0080ff', 'orange'),  # Orange
+    ('wpa_style', 'ff00ff00', 'grn'),  # Green
+    ('unknown_style', 'ff00ffff', 'ylw'),  # Yellow
+)
+
+def kml_style_for(security):
+    """Get the KML style id for a security type"""
+    return security_category(security) + '_style'
+
+def cdata(text):
+    """Wrap text in a CDATA section, splitting any embedded terminator"""
+    return '<![CDATA[' + text.replace(']]>', ']]]]><![CDATA[>') + ']]>'
+
+def format_time(timestamp, fmt='%Y-%m-%d %H:%M:%S'):
+    """Format a Unix timestamp for display"""
+    return datetime.fromtimestamp(timestamp or 0).strftime(fmt)
+
+class KMLWriter:
+    """Writes KML placemarks one at a time to a text stream"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def begin(self, name, description):
+        """Write the document header and styles"""
+        write = self.stream.write
+        write('<?xml version="1.0" encoding="utf-8"?>\n')
+        write('<kml xmlns="http://www.opengis.net/kml/2.2">\n<Document>\n')
+        write(f'<name>{escape(name)}</name>\n')
+        write(f'<description>{escape(description)}</description>\n')
+
+        for style_id, color, pushpin in KML_STYLES:
+            write(
+                f'<Style id="{style_id}"><IconStyle><color>{color}</color><Icon>'
+                f'<href>http://maps.google.com/mapfiles/kml/pushpin/{pushpin}-pushpin.png</href>'
+                f'</Icon></IconStyle></Style>\n'
+            )
+
+    def add_network(self, network, position):
+        """Write a single network placemark"""
+        ssid = str(network.get('ssid', 'Hidden Network'))
+        security = network.get('security', 'Unknown')
+        accuracy = network.get('accuracy')
+
+        # Description with network details, as HTML inside CDATA
+        description = (
+            f"<b>SSID:</b> {escape(str(network.get('ssid', 'Hidden')))}<br/>"
+            f"<b>BSSID:</b> {escape(str(network.get('bssid', 'Unknown')))}<br/>"
+            f"<b>Security:</b> {escape(str(security))}<br/>"
+            f"<b>Signal Strength:</b> {network.get('signal_strength', 'Unknown')} dBm<br/>"
+            f"<b>Frequency:</b> {network.get('frequency', 'Unknown')} MHz<br/>"
+            f"<b>Channel:</b> {network.get('channel', 'Unknown')}<br/>"
+            f"<b>First Seen:</b> {format_time(network.get('first_seen', network.get('timestamp', 0)))}<br/>"
+            f"<b>Accuracy:</b> {'Unknown' if accuracy is None else f'±{accuracy}m'}"
+        )
+
+        self.stream.write(
+            f'<Placemark><name>{escape(ssid)}</name>'
+            f'<description>{cdata(description)}</description>'
+            f'<styleUrl>#{kml_style_for(security)}</styleUrl>'
+            f'<Point><coordinates>{position[1]},{position[0]},0</coordinates></Point>'
+            f'</Placemark>\n'
+        )
+
+    def end(self):
+        """Close the document"""
+        self.stream.write('</Document>\n</kml>\n')
+
+def format_gpx_time(timestamp):
+    """Format a Unix timestamp as a GPX (UTC ISO 8601) time"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+class GPXWriter:
+    """Writes GPX waypoints and track points one at a time to a text stream"""
+
+    def __init__(self, stream, segment_gap=120):
+        self.stream = stream
+        self.segment_gap = segment_gap  # seconds without a fix that start a new segment
+        self.last_track_time = None
+
+    def begin(self, name, description):
+        """Write the document header"""
+        write = self.stream.write
+        write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        write('<gpx xmlns="http://www.topografix.com/GPX/1/1" version="1.1" creator="GNOME Wardrive">\n')
+        write(f'<metadata><name>{escape(name)}</name><desc>{escape(description)}</desc></metadata>\n')
+
+    def add_waypoint(self, latitude, longitude, name, description, timestamp=None):
+        """Write a single waypoint"""
+        time_element = f'<time>{format_gpx_time(timestamp)}</time>' if timestamp else ''
+        self.stream.write(
+            f'<wpt lat="{latitude}" lon="{longitude}">{time_element}'
+            f'<name>{escape(name)}</name><desc>{escape(description)}</desc></wpt>\n'
+        )
+
+    def begin_track(self, name):
+        """Open a track and its first segment"""
+        self.stream.write(f'<trk><name>{escape(name)}</name>\n<trkseg>\n')
+        self.last_track_time = None
+
+    def add_track_point(self, latitude, longitude, timestamp):
+        """Write a track point, starting a new segment after a time gap"""
+        if (self.last_track_time is not None
+                and timestamp - self.last_track_time > self.segment_gap):
+            self.stream.write('</trkseg>\n<trkseg>\n')
+        self.last_track_time = timestamp
+
+        self.stream.write(
+            f'<trkpt lat="{latitude}" lon="{longitude}"><time>{format_gpx_time(timestamp)}</time></trkpt>\n'
+        )
+
+    def end_track(self):
+        """Close the current segment and track"""
+        self.stream.write('</trkseg>\n</trk>\n')
+
+    def end(self):
+        """Close the document"""
+        self.stream.write('</gpx>\n')
+
+def open_text_stream(file_path):
+    """Open a buffered UTF-8 text stream for writing"""
+    return open(file_path, 'w', encoding='utf-8', buffering=BUFFER_SIZE)
+
+class KMZStream(io.TextIOWrapper):
+    """Buffered text stream writing doc.kml into a KMZ (zip) archive"""
+
+    def __init__(self, file_path):
+        self.archive = zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED)
+        entry = self.archive.open('doc.kml', 'w', force_zip64=True)
+        super().__init__(io.BufferedWriter(entry, BUFFER_SIZE), encoding='utf-8')
+
+    def close(self):
+        """Finish the archive entry and the archive itself"""
+        if self.closed:
+            return
+        super().close()
+        self.archive.close()
@@ -7,6 +7,28 @@ import gi
 gi.require_version('Geoclue', '2.0')
 
 from gi.repository import GObject, Geoclue, Gio, GLib
+try:
+    from .metrics import metrics
+except ImportError:
+    try:
+        from gnome_wardrive.metrics import metrics
+    except ImportError:
+        from metrics import metrics
+try:
+    from .log import get_logger
+except ImportError:
+    try:
+        from gnome_wardrive.log import get_logger
+    except ImportError:
+        from log import get_logger
+
+GEOCLUE_BUS_NAME = 'org.freedesktop.GeoClue2'
+GEOCLUE_MANAGER_PATH = '/org/freedesktop/GeoClue2/Manager'
+GEOCLUE_MANAGER_INTERFACE = 'org.freedesktop.GeoClue2.Manager'
+GEOCLUE_CLIENT_INTERFACE = 'org.freedesktop.GeoClue2.Client'
+GEOCLUE_LOCATION_INTERFACE = 'org.freedesktop.GeoClue2.Location'
+
+logger = get_logger('location_service')
 
 class LocationService(GObject.GObject):
     """Location service using GeoClue"""
@@ -19,10 +41,11 @@ class LocationService(GObject.GObject):
     def __init__(self):
         super().__init__()
         
-        # GeoClue objects
-        self.manager = None
-        self.client = None
-        self.location = None
+        # D-Bus state, set up asynchronously by start()
+        self.bus = None
+        self.client_path = None
+        self.signal_subscription_id = None
+        self.is_starting = False
         
         # Location state
         self.is_active = False
@@ -31,178 +54,169 @@ class LocationService(GObject.GObject):
         self.current_accuracy = 0.0
         
     def start(self):
-        """Start location services"""
-        if self.is_active:
+        """Start location services without blocking the main loop"""
+        if self.is_active or self.is_starting:
             return
             
+        logger.info("🌍 Starting location services...")
+        self.is_starting = True
+        
+        # The system bus connection is cached and reused for every call
+        if self.bus:
+            self._request_client()
+        else:
+            Gio.bus_get(Gio.BusType.SYSTEM, None, self._on_bus_ready)
+            
+    def _call(self, object_path, interface, method, parameters, reply_type, callback, *user_data):
+        """Make an asynchronous GeoClue method call on the cached bus"""
+        self.bus.call(
+            GEOCLUE_BUS_NAME,
+            object_path,
+            interface,
+            method,
+            parameters,
+            GLib.VariantType(reply_type) if reply_type else None,
+            Gio.DBusCallFlags.NONE,
+            -1,
+            None,
+            callback,
+            *user_data,
+        )
+        
+    def _finish_call(self, result, step):
+        """Finish an asynchronous call, reporting failures as location errors"""
         try:
-            print("🌍 Starting location services...")
-            # Use the simpler direct D-Bus approach
-            self.setup_dbus_connection()
-        except Exception as e:
-            print(f"❌ Failed to connect to GeoClue: {e}")
-            self.emit('location-error', f'Failed to connect to GeoClue: {e}')
-    
-    def setup_dbus_connection(self):
-        """Set up D-Bus connection to GeoClue"""
+            return self.bus.call_finish(result)
+        except GLib.Error as e:
+            logger.error("❌ GeoClue %s failed: %s", step, e.message)
+            self.is_starting = False
+            self.emit('location-error', f'Failed to connect to GeoClue: {e.message}')
+            return None
+            
+    def _on_bus_ready(self, source, result):
+        """Handle the system bus connection"""
         try:
-            # Connect to system bus
-            bus = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
-            
-            # Create GeoClue Manager proxy
-            self.manager_proxy = Gio.DBusProxy.new_sync(
-                bus,
-                Gio.DBusProxyFlags.NONE,
-                None,
-                'org.freedesktop.GeoClue2',
-                '/org/freedesktop/GeoClue2/Manager',
-                'org.freedesktop.GeoClue2.Manager',
-                None
-            )
-            
-            print("✅ Connected to GeoClue Manager")
-            
-            # Get client
-            result = self.manager_proxy.call_sync(
-                'GetClient',
-                None,
-                Gio.DBusCallFlags.NONE,
-                -1,
-                None
-            )
-            
-            client_path = result.get_child_value(0).get_string()
-            print(f"✅ Got client path: {client_path}")
-            
-            # Create client proxy
-            self.client_proxy = Gio.DBusProxy.new_sync(
-                bus,
-                Gio.DBusProxyFlags.NONE,
-                None,
-                'org.freedesktop.GeoClue2',
-                client_path,
-                'org.freedesktop.GeoClue2.Client',
-                None
-            )
-            
-            # Set properties using D-Bus property interface
-            props_proxy = Gio.DBusProxy.new_sync(
-                bus,
-                Gio.DBusProxyFlags.NONE,
-                None,
-                'org.freedesktop.GeoClue2',
-                client_path,
-                'org.freedesktop.DBus.Properties',
-                None
-            )
-            
-            # Set DesktopId
-            props_proxy.call_sync(
-                'Set',
-                GLib.Variant('(ssv)', [
-                    'org.freedesktop.GeoClue2.Client',
-                    'DesktopId',
-                    GLib.Variant('s', 'com.andrewstclair.Wardrive')
-                ]),
-                Gio.DBusCallFlags.NONE,
-                -1,
-                None
-            )
-            
-            # Set RequestedAccuracyLevel
-            props_proxy.call_sync(
-                'Set',
-                GLib.Variant('(ssv)', [
-                    'org.freedesktop.GeoClue2.Client',
-                    'RequestedAccuracyLevel',
-                    GLib.Variant('u', 8)  # EXACT
-                ]),
-                Gio.DBusCallFlags.NONE,
-                -1,
-                None
-            )
+            self.bus = Gio.bus_get_finish(result)
+        except GLib.Error as e:
+            logger.error("❌ Failed to connect to the system bus: %s", e.message)
+            self.is_starting = False
+            self.emit('location-error', f'Failed to connect to GeoClue: {e.message}')
+            return
             
-            print("✅ Set client properties via D-Bus")
+        self._request_client()
+        
+    def _request_client(self):
+        """Ask the GeoClue manager for a client"""
+        self._call(
+            GEOCLUE_MANAGER_PATH, GEOCLUE_MANAGER_INTERFACE, 'GetClient',
+            None, '(o)', self._on_client_ready)
+        
+    def _on_client_ready(self, bus, result):
+        """Configure the client once GeoClue has created it"""
+        reply = self._finish_call(result, 'GetClient')
+        if reply is None:
+            return
             
-            # Connect to LocationUpdated signal
-            self.client_proxy.connect('g-signal', self.on_location_signal)
+        self.client_path = reply.unpack()[0]
+        logger.info("✅ Got client path: %s", self.client_path)
+        
+        # Subscribe directly on the connection instead of creating a proxy
+        self.signal_subscription_id = self.bus.signal_subscribe(
+            GEOCLUE_BUS_NAME,
+            GEOCLUE_CLIENT_INTERFACE,
+            'LocationUpdated',
+            self.client_path,
+            None,
+            Gio.DBusSignalFlags.NONE,
+            self.on_location_signal,
+        )
+        
+        self._set_client_property(
+            'DesktopId', GLib.Variant('s', 'com.andrewstclair.Wardrive'), self._on_desktop_id_set)
+        
+    def _set_client_property(self, name, value, callback):
+        """Set a GeoClue client property asynchronously"""
+        self._call(
+            self.client_path, 'org.freedesktop.DBus.Properties', 'Set',
+            GLib.Variant('(ssv)', (GEOCLUE_CLIENT_INTERFACE, name, value)),
+            None, callback)
+        
+    def _on_desktop_id_set(self, bus, result):
+        """Request exact accuracy once the desktop id is set"""
+        if self._finish_call(result, 'setting DesktopId') is None:
+            return
             
-            # Start the client
-            self.client_proxy.call_sync(
-                'Start',
-                None,
-                Gio.DBusCallFlags.NONE,
-                -1,
-                None
-            )
+        self._set_client_property(
+            'RequestedAccuracyLevel', GLib.Variant('u', 8), self._on_accuracy_set)  # EXACT
+        
+    def _on_accuracy_set(self, bus, result):
+        """Start the client once its properties are set"""
+        if self._finish_call(result, 'setting RequestedAccuracyLevel') is None:
+            return
             
-            self.is_active = True
-            print("✅ Location service started successfully")
+        logger.info("✅ Set client properties via D-Bus")
+        self._call(
+            self.client_path, GEOCLUE_CLIENT_INTERFACE, 'Start',
+            None, None, self._on_client_started)
+        
+    def _on_client_started(self, bus, result):
+        """Handle the client start reply"""
+        self.is_starting = False
+        if self._finish_call(result, 'Start') is None:
+            return
             
-        except Exception as e:
-            print(f"❌ D-Bus setup failed: {e}")
-            import traceback
-            traceback.print_exc()
-    
-    def on_location_signal(self, proxy, sender_name, signal_name, parameters):
+        self.is_active = True
+        logger.info("✅ Location service started successfully")
+        
+    def on_location_signal(self, bus, sender_name, object_path, interface_name, signal_name, parameters):
         """Handle location update signals"""
-        if signal_name == 'LocationUpdated':
-            old_path = parameters.get_child_value(0).get_string()
-            new_path = parameters.get_child_value(1).get_string()
-            print(f"📍 Location updated signal: {old_path} -> {new_path}")
-            
-            if new_path and new_path != '/':
-                self.get_location_from_path(new_path)
+        old_path, new_path = parameters.unpack()
+        if new_path and new_path != '/':
+            self.get_location_from_path(new_path)
     
     def get_location_from_path(self, location_path):
-        """Get location data from D-Bus path"""
+        """Read all properties of a location object in one asynchronous call"""
+        self._call(
+            location_path, 'org.freedesktop.DBus.Properties', 'GetAll',
+            GLib.Variant('(s)', (GEOCLUE_LOCATION_INTERFACE,)),
+            '(a{sv})', self._on_location_properties, metrics.start())
+        
+    def _on_location_properties(self, bus, result, requested):
+        """Handle the properties of a new location"""
+        metrics.stop('geoclue_call', requested)
         try:
-            bus = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
-            
-            location_proxy = Gio.DBusProxy.new_sync(
-                bus,
-                Gio.DBusProxyFlags.NONE,
-                None,
-                'org.freedesktop.GeoClue2',
-                location_path,
-                'org.freedesktop.GeoClue2.Location',
-                None
-            )
-            
-            # Get location properties
-            latitude = location_proxy.get_cached_property('Latitude').get_double()
-            longitude = location_proxy.get_cached_property('Longitude').get_double()
-            accuracy = location_proxy.get_cached_property('Accuracy').get_double()
-            
-            # Update current location
-            self.current_latitude = latitude
-            self.current_longitude = longitude
-            self.current_accuracy = accuracy
-            
-            # Emit location update (latitude, longitude, accuracy only)
-            self.emit('location-updated', latitude, longitude, accuracy)
-            
-            print(f"✅ Location updated: coordinates available (±{accuracy:.1f}m accuracy)")
+            properties = bus.call_finish(result).unpack()[0]
+            latitude = properties['Latitude']
+            longitude = properties['Longitude']
+            accuracy = properties['Accuracy']
+        except (GLib.Error, KeyError) as e:
+            logger.warning("❌ Error getting location from path: %s", e)
+            return
             
-        except Exception as e:
-            print(f"❌ Error getting location from path: {e}")
+        # Update current location
+        self.current_latitude = latitude
+        self.current_longitude = longitude
+        self.current_accuracy = accuracy
+        
+        # Emit location update (latitude, longitude, accuracy only)
+        started = metrics.start()
+        self.emit('location-updated', latitude, longitude, accuracy)
+        metrics.stop('location_fix', started)
             
     def stop(self):
         """Stop location services"""
         if not self.is_active:
             return
             
-        try:
-            if self.client:
-                self.client.call_stop(None, None, None)
-                self.client = None
-                
-            self.is_active = False
-            
-        except Exception as e:
-            print(f"Error stopping location service: {e}")
+        if self.signal_subscription_id is not None:
+            self.bus.signal_unsubscribe(self.signal_subscription_id)
+            self.signal_subscription_id = None
             
-
+        # Fire and forget: nothing waits on the reply
+        self._call(
+            self.client_path, GEOCLUE_CLIENT_INTERFACE, 'Stop', None, None, None)
+        self.client_path = None
+        self.is_active = False
             
     def get_current_location(self):
         """Get current location data"""
@@ -211,4 +225,4 @@ class LocationService(GObject.GObject):
             'longitude': self.current_longitude,
             'accuracy': self.current_accuracy,
             'active': self.is_active
-        }
\ No newline at end of file
+        }
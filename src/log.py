@@ -0,0 +1,190 @@
+"""
+Logging
+Rate-limited logging through a background handler, with a ring buffer of
+recent records for post-mortem dumps
+"""
+
+from collections import deque
+import atexit
+import logging
+import logging.handlers
+import math
+import os
+import queue
+import sys
+import threading
+import time
+
+LOGGER_NAME = 'gnome_wardrive'
+
+# Environment variable overriding the log level (DEBUG, INFO, WARNING, ...)
+LOG_LEVEL_ENVIRONMENT = 'GNOME_WARDRIVE_LOG_LEVEL'
+DEFAULT_LOG_LEVEL = 'INFO'
+
+# Messages with the same key beyond the burst within a period are dropped
+RATE_LIMIT_BURST = 5
+RATE_LIMIT_PERIOD = 60.0  # seconds
+
+# Recent records kept for post-mortem dumps
+RING_BUFFER_SIZE = 1000
+
+LOG_FORMAT = '%(message)s'
+DUMP_FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+
+class RateLimitFilter(logging.Filter):
+    """Lets through at most burst records per key and period.
+
+    The key is the record's 'key' attribute (pass extra={'key': ...}) or its
+    logger and source line, so a message logged for every access point
+    counts as one key however its arguments vary. The first record let
+    through after a suppression reports how many were dropped; drops of a
+    key that goes quiet are returned by expire() once its period is over.
+    Dropped records are never formatted. Messages that pace themselves, like
+    periodic status lines, pass extra={'rate_limit': False} to be let through.
+    """
+
+    def __init__(self, burst=RATE_LIMIT_BURST, period=RATE_LIMIT_PERIOD):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        # key -> [window start, records let through, records dropped, last dropped record]
+        self.windows = {}
+        self.lock = threading.Lock()
+        self.expired = []  # (last dropped record, count) of keys forgotten with drops
+
+    def filter(self, record):
+        if not getattr(record, 'rate_limit', True):
+            return True
+        key = getattr(record, 'key', None) or (record.name, record.lineno)
+        now = record.created
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                suppressed = window[2] if window else 0
+                self.windows[key] = [now, 1, 0, None]
+                if suppressed:
+                    record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+                if len(self.windows) > 10000:
+                    self._expire(now)
+                return True
+
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            window[3] = record
+            return False
+
+    def expire(self, now):
+        """Forget keys whose period has passed.
+
+        Returns (last dropped record, number dropped) for each key that
+        dropped records, including keys forgotten since the last call.
+        """
+        with self.lock:
+            self._expire(now)
+            expired, self.expired = self.expired, []
+        return expired
+
+    def _expire(self, now):
+        windows = {}
+        for key, window in self.windows.items():
+            if now - window[0] < self.period:
+                windows[key] = window
+            elif window[2]:
+                self.expired.append((window[3], window[2]))
+        self.windows = windows
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the most recent records in memory for dump()"""
+
+    def __init__(self, capacity=RING_BUFFER_SIZE):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+        self.setFormatter(logging.Formatter(DUMP_FORMAT))
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def dump(self, stream):
+        """Write the buffered records, oldest first"""
+        for record in list(self.records):
+            stream.write(self.format(record) + '\n')
+        stream.flush()
+
+# Shared by all module loggers; filters on a parent logger don't see the
+# records of its children
+_rate_limit = RateLimitFilter()
+_listener = None
+_ring_buffer = None
+_stopped = threading.Event()
+
+def get_logger(name):
+    """Get the rate-limited logger of a module, e.g. get_logger('wifi_scanner')"""
+    logger = logging.getLogger(f'{LOGGER_NAME}.{name}')
+    if _rate_limit not in logger.filters:
+        logger.addFilter(_rate_limit)
+    return logger
+
+def setup_logging(level=None):
+    """Route the application's log records through the rate limit to a background writer.
+
+    level defaults to GNOME_WARDRIVE_LOG_LEVEL or INFO. Calling this again
+    only changes the level.
+    """
+    global _listener, _ring_buffer
+    level = (level or os.environ.get(LOG_LEVEL_ENVIRONMENT) or DEFAULT_LOG_LEVEL).upper()
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level)
+    if _listener:
+        return
+
+    logger.propagate = False
+
+    # Writing happens on the listener's thread, so a slow journal never
+    # blocks the main loop
+    records = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+    logger.addHandler(logging.handlers.QueueHandler(records))
+
+    _ring_buffer = RingBufferHandler()
+    logger.addHandler(_ring_buffer)
+
+    # Report the drops of messages that stopped coming
+    threading.Thread(target=_report_suppressed_periodically, name='log-rate-limit',
+                     daemon=True).start()
+    atexit.register(shutdown_logging)
+
+def report_suppressed(now=None):
+    """Log how many records were dropped for keys whose rate limit period ended by now"""
+    for record, count in _rate_limit.expire(time.time() if now is None else now):
+        try:
+            message = record.getMessage()
+        except Exception:
+            message = str(record.msg)
+        logging.getLogger(record.name).log(
+            record.levelno, "%s (%d similar messages suppressed)", message, count,
+            extra={'key': ('suppressed', record.name, record.lineno)})
+
+def _report_suppressed_periodically():
+    while not _stopped.wait(_rate_limit.period):
+        report_suppressed()
+
+def dump_recent(stream=None):
+    """Write the most recent log records to a stream (default: stderr)"""
+    if not _ring_buffer:
+        return
+    stream = stream or sys.stderr
+    stream.write(f"--- last {len(_ring_buffer.records)} log records "
+                 f"({time.strftime('%Y-%m-%d %H:%M:%S')}) ---\n")
+    _ring_buffer.dump(stream)
+
+def shutdown_logging():
+    """Write out queued records and stop the background writer"""
+    if _listener and not _stopped.is_set():
+        _stopped.set()
+        report_suppressed(math.inf)  # Every period ends at exit
+        _listener.stop()
@@ -8,19 +8,32 @@ Main entry point for the application
 import sys
 import gi
 
-gi.require_version('Gtk', '4.0')
-gi.require_version('Adw', '1')
-gi.require_version('NM', '1.0')
-gi.require_version('Geoclue', '2.0')
-
-from gi.repository import Gtk, Adw, Gio, GLib
-try:
-    from .application import WardriveApplication
-except ImportError:
-    from gnome_wardrive.application import WardriveApplication
-
 def main():
     """Main function to run the application"""
+    # The headless collector must never load Gtk or Adw
+    if '--headless' in sys.argv:
+        try:
+            from .collector import main as collector_main
+        except ImportError:
+            from gnome_wardrive.collector import main as collector_main
+        return collector_main(sys.argv)
+        
+    try:
+        from .log import setup_logging
+    except ImportError:
+        from gnome_wardrive.log import setup_logging
+    setup_logging()
+    
+    gi.require_version('Gtk', '4.0')
+    gi.require_version('Adw', '1')
+    gi.require_version('NM', '1.0')
+    gi.require_version('Geoclue', '2.0')
+    
+    try:
+        from .application import WardriveApplication
+    except ImportError:
+        from gnome_wardrive.application import WardriveApplication
+        
     app = WardriveApplication()
     return app.run(sys.argv)
 
@@ -0,0 +1,167 @@
+"""
+Metrics
+Hot-path latency histograms, rates and queue depths, with near-zero cost
+while disabled
+"""
+
+from bisect import bisect_left
+import threading
+import time
+
+# Upper bounds of the latency histogram buckets, plus one overflow bucket
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000,
+)  # ms
+
+class Histogram:
+    """Fixed-bucket latency histogram in milliseconds"""
+
+    __slots__ = ('counts', 'count', 'total', 'maximum')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, milliseconds):
+        """Add a measurement"""
+        self.counts[bisect_left(LATENCY_BUCKETS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        if milliseconds > self.maximum:
+            self.maximum = milliseconds
+
+    def percentile(self, fraction):
+        """Estimate a percentile as the upper bound of the bucket it falls in"""
+        wanted = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted and count:
+                return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else self.maximum
+        return self.maximum
+
+    def snapshot(self):
+        """Get the histogram as a JSON-friendly dict"""
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count, 4) if self.count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.maximum, 4),
+            'buckets': {str(bound): count for bound, count
+                        in zip(LATENCY_BUCKETS + ('inf',), self.counts) if count},
+        }
+
+class Metrics:
+    """Collects timings, counters and gauges for one reporting interval.
+
+    Instrumented code brackets a hot path with
+
+        started = metrics.start()
+        ...
+        metrics.stop('scan_tick', started)
+
+    While disabled start() returns 0 and stop() returns at once, so the cost
+    is two method calls. Queue depths are registered with watch() and only
+    sampled when a snapshot is taken. Measurements may come from worker
+    threads, such as the export, so they are taken under a lock.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.histograms = {}  # name -> Histogram
+        self.counters = {}  # name -> count during the interval
+        self.gauges = {}  # name -> callable returning the current value
+        self.interval_start = time.monotonic()
+        self.cpu_start = time.process_time()
+
+    def enable(self):
+        """Start collecting"""
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        """Stop collecting and drop what was collected"""
+        self.enabled = False
+        self.reset()
+
+    def start(self):
+        """Get the start time of a timed section, or 0 while disabled"""
+        return time.perf_counter() if self.enabled else 0
+
+    def stop(self, name, started):
+        """Record the duration of a section begun with start()"""
+        if not started:
+            return
+        self.observe(name, (time.perf_counter() - started) * 1000)
+
+    def observe(self, name, milliseconds):
+        """Record a latency in milliseconds"""
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(milliseconds)
+
+    def count(self, name, amount=1):
+        """Add to a counter, reported as a rate per second"""
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def watch(self, name, source):
+        """Sample source() as a gauge, such as a queue depth, at every snapshot"""
+        self.gauges[name] = source
+
+    def unwatch(self, name):
+        """Stop sampling a gauge"""
+        self.gauges.pop(name, None)
+
+    def snapshot(self, reset=True):
+        """Get the current interval's measurements, starting a new interval"""
+        gauges = {}
+        for name, source in list(self.gauges.items()):
+            try:
+                gauges[name] = source()
+            except Exception:
+                gauges[name] = None
+
+        with self.lock:
+            now = time.monotonic()
+            cpu = time.process_time()
+            interval = max(now - self.interval_start, 1e-9)
+            report = {
+                'time': time.time(),
+                'interval': round(interval, 3),
+                'cpu_percent': round((cpu - self.cpu_start) / interval * 100, 1),
+                'latency': {name: histogram.snapshot()
+                            for name, histogram in sorted(self.histograms.items())},
+                'rates': {name: round(count / interval, 2)
+                          for name, count in sorted(self.counters.items())},
+                'counts': dict(sorted(self.counters.items())),
+                'gauges': gauges,
+            }
+            if reset:
+                self._reset()
+        return report
+
+    def reset(self):
+        """Start a new interval"""
+        with self.lock:
+            self._reset()
+
+    def _reset(self):
+        """Start a new interval, with the lock held"""
+        self.histograms = {}
+        self.counters = {}
+        self.interval_start = time.monotonic()
+        self.cpu_start = time.process_time()
+
+# Shared by every instrumented module
+metrics = Metrics()
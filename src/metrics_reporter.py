@@ -0,0 +1,166 @@
+"""
+Metrics Reporter
+Samples main-loop lag and publishes the collected metrics periodically as
+JSON lines or over a D-Bus stats interface
+"""
+
+import json
+import os
+import time
+
+from gi.repository import Gio, GLib
+try:
+    from .metrics import metrics
+    from .log import get_logger
+except ImportError:
+    try:
+        from gnome_wardrive.metrics import metrics
+        from gnome_wardrive.log import get_logger
+    except ImportError:
+        from metrics import metrics
+        from log import get_logger
+
+logger = get_logger('metrics_reporter')
+
+# Environment variable enabling metrics: a JSON-lines file path, or "dbus"
+METRICS_ENVIRONMENT = 'GNOME_WARDRIVE_METRICS'
+METRICS_DBUS = 'dbus'
+
+# Seconds between reports
+DEFAULT_REPORT_INTERVAL = 10
+
+# Milliseconds between main-loop lag probes
+LAG_PROBE_INTERVAL = 100
+
+METRICS_OBJECT_PATH = '/com/andrewstclair/Wardrive/Metrics'
+METRICS_INTERFACE = 'com.andrewstclair.Wardrive.Metrics'
+METRICS_INTROSPECTION = f"""
+<node>
+  <interface name="{METRICS_INTERFACE}">
+    <method name="GetStats">
+      <arg type="s" name="stats" direction="out"/>
+    </method>
+    <signal name="StatsUpdated">
+      <arg type="s" name="stats"/>
+    </signal>
+  </interface>
+</node>
+"""
+
+class MetricsReporter:
+    """Enables the shared metrics and reports them every interval.
+
+    Reports are appended as one JSON object per line to path, and/or served
+    over D-Bus: GetStats() returns the latest report and StatsUpdated is
+    emitted with every new one. Pass the application's bus connection, or
+    dbus=True to use the session bus.
+    """
+
+    def __init__(self, path=None, dbus=False, connection=None, interval=DEFAULT_REPORT_INTERVAL):
+        self.path = path
+        self.dbus = dbus or connection is not None
+        self.connection = connection
+        self.interval = interval
+        self.stream = None
+        self.registration_id = None
+        self.latest = None
+        self.report_id = None
+        self.probe_id = None
+        self.probe_due = None
+
+    @classmethod
+    def from_target(cls, target, connection=None):
+        """Create a reporter for a JSON-lines file path or "dbus", or None"""
+        if not target:
+            return None
+        if target == METRICS_DBUS:
+            return cls(dbus=True, connection=connection)
+        return cls(path=target)
+
+    @classmethod
+    def from_environment(cls, connection=None):
+        """Create a reporter as configured by GNOME_WARDRIVE_METRICS, or None"""
+        return cls.from_target(os.environ.get(METRICS_ENVIRONMENT), connection)
+
+    def start(self):
+        """Start collecting and reporting"""
+        if self.path:
+            self.stream = open(self.path, 'a', buffering=1)
+        if self.dbus:
+            if self.connection:
+                self.register(self.connection)
+            else:
+                Gio.bus_get(Gio.BusType.SESSION, None, self._on_bus_ready)
+
+        metrics.enable()
+        self.probe_due = time.monotonic() + LAG_PROBE_INTERVAL / 1000
+        self.probe_id = GLib.timeout_add(LAG_PROBE_INTERVAL, self.on_lag_probe)
+        self.report_id = GLib.timeout_add_seconds(self.interval, self.on_report)
+        logger.info("📈 Metrics enabled, reporting every %s s to %s",
+                    self.interval, self.path or 'D-Bus ' + METRICS_OBJECT_PATH)
+
+    def stop(self):
+        """Write a final report and stop collecting"""
+        if not metrics.enabled:
+            return
+        self.report()
+        for source_id in (self.probe_id, self.report_id):
+            if source_id:
+                GLib.source_remove(source_id)
+        self.probe_id = self.report_id = None
+        metrics.disable()
+
+        if self.registration_id:
+            self.connection.unregister_object(self.registration_id)
+            self.registration_id = None
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+    def _on_bus_ready(self, source, result):
+        """Export the stats interface once the session bus is connected"""
+        try:
+            self.connection = Gio.bus_get_finish(result)
+        except GLib.Error as e:
+            logger.warning("⚠️  Metrics not available over D-Bus: %s", e.message)
+            return
+        if metrics.enabled:
+            self.register(self.connection)
+
+    def register(self, connection):
+        """Export the stats interface on a bus connection"""
+        interface = Gio.DBusNodeInfo.new_for_xml(METRICS_INTROSPECTION).interfaces[0]
+        try:
+            self.registration_id = connection.register_object(
+                METRICS_OBJECT_PATH, interface, self.on_method_call, None, None)
+        except GLib.Error as e:
+            logger.warning("⚠️  Metrics not available over D-Bus: %s", e.message)
+
+    def on_method_call(self, connection, sender, object_path, interface_name,
+                       method_name, parameters, invocation):
+        """Answer GetStats with the latest report"""
+        report = self.latest or metrics.snapshot(reset=False)
+        invocation.return_value(GLib.Variant('(s)', (json.dumps(report),)))
+
+    def on_lag_probe(self):
+        """Record how late the main loop ran this probe"""
+        now = time.monotonic()
+        metrics.observe('main_loop_lag', max(now - self.probe_due, 0.0) * 1000)
+        self.probe_due = now + LAG_PROBE_INTERVAL / 1000
+        return True  # Continue timeout
+
+    def on_report(self):
+        """Publish the measurements of the interval that just ended"""
+        self.report()
+        return True  # Continue timeout
+
+    def report(self):
+        """Take a snapshot and publish it"""
+        self.latest = metrics.snapshot()
+        line = json.dumps(self.latest, separators=(',', ':'))
+        if self.stream:
+            self.stream.write(line + '\n')
+        if self.registration_id:
+            self.connection.emit_signal(
+                None, METRICS_OBJECT_PATH, METRICS_INTERFACE, 'StatsUpdated',
+                GLib.Variant('(s)', (line,)))
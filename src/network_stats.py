@@ -0,0 +1,125 @@
+"""
+Network Statistics
+Counters over the collected networks, maintained as networks change
+"""
+
+from collections import deque
+import time
+
+try:
+    from .classifier import security_category
+    from .scan_scheduler import frequency_band
+except ImportError:
+    try:
+        from gnome_wardrive.classifier import security_category
+        from gnome_wardrive.scan_scheduler import frequency_band
+    except ImportError:
+        from classifier import security_category
+        from scan_scheduler import frequency_band
+
+# Window for the new networks rate
+RATE_WINDOW = 60.0  # seconds
+
+def count(counter, key, delta):
+    """Adjust a counter, dropping keys that reach zero"""
+    value = counter.get(key, 0) + delta
+    if value:
+        counter[key] = value
+    else:
+        counter.pop(key, None)
+
+def format_summary(statistics):
+    """Format the headline counters of get_statistics() on one line"""
+    bands = ', '.join(f"{band} {number}" for band, number in sorted(statistics['by_band'].items()))
+    return (
+        f"{statistics['open_networks']} open · {statistics['wep_networks']} WEP · "
+        f"{statistics['wpa_networks']} WPA · {statistics['distinct_ssids']} SSIDs · "
+        f"{statistics['new_per_minute']:.0f} new/min" + (f" ({bands})" if bands else '')
+    )
+
+class NetworkStatistics:
+    """Incremental counters per security type, band, channel and SSID.
+
+    Every network is counted under the key returned by key(). Callers take
+    the key before changing a network and pass both keys to update(), so no
+    call ever walks the whole network table.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.by_security = {}
+        self.by_category = {}
+        self.by_band = {}
+        self.by_channel = {}
+        self.ssids = {}  # SSID -> number of networks using it
+
+        # First-seen times of networks found within the rate window
+        self.recent_new = deque()
+
+    @staticmethod
+    def key(network):
+        """Get the (security, band, channel, ssid) a network is counted under"""
+        ssid = network.get('ssid')
+        if ssid and ssid.startswith('Hidden_'):
+            ssid = None
+        return (
+            network.get('security', 'Unknown'),
+            frequency_band(network.get('frequency')),
+            network.get('channel', 0),
+            ssid,
+        )
+
+    def apply(self, key, delta):
+        """Add (delta=1) or remove (delta=-1) a network's key from the counters"""
+        security, band, channel, ssid = key
+        count(self.by_security, security, delta)
+        count(self.by_category, security_category(security), delta)
+        count(self.by_band, band, delta)
+        count(self.by_channel, channel, delta)
+        count(self.ssids, ssid, delta)
+
+    def add(self, network, timestamp=None, new=True):
+        """Count a network, as newly found unless it was restored from a session"""
+        self.total += 1
+        self.apply(self.key(network), 1)
+        if new:
+            self.recent_new.append(time.time() if timestamp is None else timestamp)
+
+    def update(self, old_key, network):
+        """Move a network whose counted fields may have changed"""
+        new_key = self.key(network)
+        if new_key != old_key:
+            self.apply(old_key, -1)
+            self.apply(new_key, 1)
+
+    def new_per_minute(self, now=None):
+        """Number of networks first seen during the last minute"""
+        if now is None:
+            now = time.time()
+        while self.recent_new and self.recent_new[0] < now - RATE_WINDOW:
+            self.recent_new.popleft()
+        return len(self.recent_new) * 60.0 / RATE_WINDOW
+
+    def snapshot(self, now=None):
+        """Get the current counters"""
+        return {
+            'total_networks': self.total,
+            'open_networks': self.by_category.get('open', 0),
+            'wep_networks': self.by_category.get('wep', 0),
+            'wpa_networks': self.by_category.get('wpa', 0),
+            'by_security': dict(self.by_security),
+            'by_band': dict(self.by_band),
+            'by_channel': dict(self.by_channel),
+            'distinct_ssids': len(self.ssids) - (None in self.ssids),
+            'new_per_minute': self.new_per_minute(now),
+        }
+
+    def clear(self):
+        """Reset all counters"""
+        self.total = 0
+        self.by_security.clear()
+        self.by_category.clear()
+        self.by_band.clear()
+        self.by_channel.clear()
+        self.ssids.clear()
+        self.recent_new.clear()
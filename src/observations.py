@@ -0,0 +1,98 @@
+"""
+Observation Log
+Compact, append-only sighting history of a single access point
+"""
+
+from array import array
+import math
+
+class ObservationLog:
+    """Column-oriented sighting history of one BSSID.
+
+    Each sighting is stored as (timestamp, latitude, longitude, accuracy,
+    signal, interface) across typed arrays, about 35 bytes per sighting.
+    Sightings without a location fix store NaN coordinates. Summary fields
+    (first, last and best sighting) are maintained as sightings arrive.
+    """
+
+    __slots__ = (
+        'timestamps', 'latitudes', 'longitudes', 'accuracies', 'signals',
+        'interfaces', 'best_index',
+    )
+
+    # Interface names are interned once and shared by all logs
+    interface_names = []
+    interface_ids = {}
+
+    def __init__(self):
+        self.timestamps = array('d')
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.accuracies = array('d')
+        self.signals = array('b')
+        self.interfaces = array('H')
+        self.best_index = -1
+
+    @classmethod
+    def intern_interface(cls, interface):
+        """Get the shared id of an interface name"""
+        interface_id = cls.interface_ids.get(interface)
+        if interface_id is None:
+            interface_id = len(cls.interface_names)
+            cls.interface_names.append(interface)
+            cls.interface_ids[interface] = interface_id
+        return interface_id
+
+    def append(self, timestamp, latitude, longitude, accuracy, signal, interface):
+        """Record a sighting, returning True if it is the new best one"""
+        self.timestamps.append(timestamp)
+        self.latitudes.append(math.nan if latitude is None else latitude)
+        self.longitudes.append(math.nan if longitude is None else longitude)
+        self.accuracies.append(math.nan if accuracy is None else accuracy)
+        self.signals.append(signal)
+        self.interfaces.append(self.intern_interface(interface or ''))
+
+        index = len(self.timestamps) - 1
+        if self.best_index < 0 or signal > self.signals[self.best_index]:
+            self.best_index = index
+            return True
+        return False
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __iter__(self):
+        """Iterate over sightings as tuples"""
+        names = self.interface_names
+        for i in range(len(self.timestamps)):
+            yield (
+                self.timestamps[i], self.latitudes[i], self.longitudes[i],
+                self.accuracies[i], self.signals[i], names[self.interfaces[i]],
+            )
+
+    def copy(self):
+        """Get an independent copy of the history"""
+        log = ObservationLog()
+        log.timestamps = self.timestamps[:]
+        log.latitudes = self.latitudes[:]
+        log.longitudes = self.longitudes[:]
+        log.accuracies = self.accuracies[:]
+        log.signals = self.signals[:]
+        log.interfaces = self.interfaces[:]
+        log.best_index = self.best_index
+        return log
+
+    @property
+    def first_seen(self):
+        """Timestamp of the first sighting"""
+        return self.timestamps[0] if self.timestamps else None
+
+    @property
+    def last_seen(self):
+        """Timestamp of the most recent sighting"""
+        return self.timestamps[-1] if self.timestamps else None
+
+    @property
+    def best_signal(self):
+        """Strongest signal seen so far"""
+        return self.signals[self.best_index] if self.best_index >= 0 else None
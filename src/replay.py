@@ -0,0 +1,262 @@
+"""
+Trace Replay
+Records raw access point snapshots and location fixes, and plays them back
+through the scanning pipeline without NetworkManager or GeoClue
+"""
+
+import gzip
+import json
+import time
+
+import gi
+gi.require_version('NM', '1.0')
+
+from gi.repository import GObject, GLib, NM
+try:
+    from .wifi_scanner import WiFiScanner, INGEST_REPLAY
+except ImportError:
+    try:
+        from gnome_wardrive.wifi_scanner import WiFiScanner, INGEST_REPLAY
+    except ImportError:
+        from wifi_scanner import WiFiScanner, INGEST_REPLAY
+
+TRACE_VERSION = 1
+
+class TraceRecorder:
+    """Writes a gzip-compressed JSON-lines trace.
+
+    Every line is one record:
+      {"t": timestamp, "i": iface, "a": [[bssid, ssid, strength, frequency,
+                                          flags, wpa_flags, rsn_flags], ...]}
+      {"t": timestamp, "f": [latitude, longitude, accuracy]}
+    preceded by a header line {"trace": TRACE_VERSION, "started": timestamp}.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.stream = gzip.open(path, 'wt', encoding='utf-8')
+        self.write({'trace': TRACE_VERSION, 'started': time.time()})
+
+    def write(self, record):
+        """Append a single record"""
+        self.stream.write(json.dumps(record, separators=(',', ':')))
+        self.stream.write('\n')
+
+    def record_access_points(self, iface, timestamp, access_points):
+        """Record the access points a device reports at a time"""
+        snapshot = []
+        for ap in access_points:
+            ssid = ap.get_ssid()
+            snapshot.append([
+                ap.get_bssid(),
+                ssid.get_data().decode('utf-8', 'replace') if ssid else None,
+                ap.get_strength(),
+                ap.get_frequency(),
+                int(ap.get_flags()),
+                int(ap.get_wpa_flags()),
+                int(ap.get_rsn_flags()),
+            ])
+        self.write({'t': timestamp, 'i': iface, 'a': snapshot})
+
+    def record_location(self, timestamp, latitude, longitude, accuracy):
+        """Record a location fix"""
+        self.write({'t': timestamp, 'f': [latitude, longitude, accuracy]})
+
+    def close(self):
+        """Finish the trace file"""
+        self.stream.close()
+
+def read_trace(path):
+    """Iterate over the records of a trace file"""
+    with gzip.open(path, 'rt', encoding='utf-8') as stream:
+        header = json.loads(stream.readline() or '{}')
+        if header.get('trace') != TRACE_VERSION:
+            raise ValueError(f"{path} is not a version {TRACE_VERSION} trace")
+        for line in stream:
+            yield json.loads(line)
+
+class ReplayAccessPoint:
+    """Recorded access point with the NM.AccessPoint getters the scanner uses"""
+
+    __slots__ = ('bssid', 'ssid', 'strength', 'frequency', 'flags', 'wpa_flags', 'rsn_flags')
+
+    def __init__(self, bssid, ssid, strength, frequency, flags, wpa_flags, rsn_flags):
+        self.bssid = bssid
+        self.ssid = GLib.Bytes.new(ssid.encode('utf-8')) if ssid else None
+        self.strength = strength
+        self.frequency = frequency
+        self.flags = flags
+        self.wpa_flags = wpa_flags
+        self.rsn_flags = rsn_flags
+
+    def get_bssid(self):
+        return self.bssid
+
+    def get_ssid(self):
+        return self.ssid
+
+    def get_strength(self):
+        return self.strength
+
+    def get_frequency(self):
+        return self.frequency
+
+    def get_flags(self):
+        return self.flags
+
+    def get_wpa_flags(self):
+        return self.wpa_flags
+
+    def get_rsn_flags(self):
+        return self.rsn_flags
+
+class ReplayDevice:
+    """WiFi device reporting the access points of the latest recorded snapshot"""
+
+    def __init__(self, iface):
+        self.iface = iface
+        self.access_points = []
+
+    def get_iface(self):
+        return self.iface
+
+    def get_device_type(self):
+        return NM.DeviceType.WIFI
+
+    def get_access_points(self):
+        return self.access_points
+
+    def request_scan_async(self, cancellable, callback, user_data):
+        """Recorded traces already contain the results of any scans"""
+
+class ReplayClient(GObject.Object):
+    """Stand-in for NM.Client listing the devices seen in a trace"""
+
+    __gsignals__ = {
+        'device-added': (GObject.SIGNAL_RUN_FIRST, None, (object,)),
+        'device-removed': (GObject.SIGNAL_RUN_FIRST, None, (object,)),
+    }
+
+    def __init__(self, devices):
+        super().__init__()
+        self.devices = devices
+
+    def get_devices(self):
+        return list(self.devices)
+
+class ReplaySource(GObject.Object):
+    """Plays a trace back through a WiFiScanner and a location signal.
+
+    scanner is a regular WiFiScanner in replay mode, so consumers connect to
+    its network-found, aps-expired and scan-tick signals as usual, and to
+    this object's location-updated signal as they would to LocationService.
+    clock() returns the trace time; hand it to a DataManager so sightings
+    are tagged against recorded rather than wall-clock time.
+
+    speed is the playback rate relative to real time; 0 replays as fast as
+    possible without a main loop.
+    """
+
+    __gsignals__ = {
+        'location-updated': (GObject.SIGNAL_RUN_FIRST, None, (float, float, float)),
+        'location-error': (GObject.SIGNAL_RUN_FIRST, None, (str,)),
+        'replay-finished': (GObject.SIGNAL_RUN_FIRST, None, ()),
+    }
+
+    def __init__(self, path, speed=0):
+        super().__init__()
+        self.path = path
+        self.speed = speed
+        self.now = 0.0
+
+        # Read the device list up front so the scanner starts with all of them
+        ifaces = []
+        for record in read_trace(path):
+            iface = record.get('i')
+            if iface is not None and iface not in ifaces:
+                ifaces.append(iface)
+        self.devices = {iface: ReplayDevice(iface) for iface in ifaces}
+
+        self.scanner = WiFiScanner(
+            ingest_mode=INGEST_REPLAY, nm_client=ReplayClient(self.devices.values()))
+        self.scanner.clock = self.clock
+
+        self.records = None
+        self.pending_tick = None  # trace time of snapshots not yet processed
+        self.timeout_id = None
+        self.ticks = 0
+        self.fixes = 0
+
+    def clock(self):
+        """Get the current trace time"""
+        return self.now
+
+    def start(self):
+        """Start playback; with speed 0 this returns when the trace is done"""
+        self.records = read_trace(self.path)
+        self.scanner.start_scan()
+
+        if not self.speed:
+            for record in self.records:
+                self.play(record)
+            self.finish()
+            return
+
+        self.schedule(next(self.records, None))
+
+    def stop(self):
+        """Stop playback early"""
+        if self.timeout_id:
+            GLib.source_remove(self.timeout_id)
+            self.timeout_id = None
+        self.records = None
+
+    def schedule(self, record):
+        """Play a record after the trace time between it and the previous one"""
+        if record is None:
+            self.finish()
+            return
+        delay = max(record['t'] - self.now, 0.0) / self.speed if self.now else 0.0
+        self.timeout_id = GLib.timeout_add(int(delay * 1000), self.on_record_due, record)
+
+    def on_record_due(self, record):
+        """Play a record at its scaled time"""
+        self.timeout_id = None
+        self.play(record)
+        if self.records is not None:
+            self.schedule(next(self.records, None))
+        return GLib.SOURCE_REMOVE
+
+    def play(self, record):
+        """Apply a single trace record"""
+        timestamp = record['t']
+        if self.pending_tick is not None and timestamp != self.pending_tick:
+            self.tick()
+        self.now = timestamp
+
+        snapshot = record.get('a')
+        if snapshot is not None:
+            self.devices[record['i']].access_points = [
+                ReplayAccessPoint(*fields) for fields in snapshot
+            ]
+            self.pending_tick = timestamp
+        elif 'f' in record:
+            latitude, longitude, accuracy = record['f']
+            self.fixes += 1
+            self.emit('location-updated', latitude, longitude, accuracy or 0.0)
+
+    def tick(self):
+        """Run the scanner over the snapshots recorded at one time"""
+        self.now = self.pending_tick
+        self.pending_tick = None
+        self.ticks += 1
+        self.scanner.update_scan_results()
+
+    def finish(self):
+        """Process the last snapshots and report the end of the trace"""
+        if self.pending_tick is not None:
+            self.tick()
+        self.records = None
+        if self.scanner.is_scanning:
+            self.scanner.stop_scan()
+        self.emit('replay-finished')
@@ -0,0 +1,220 @@
+"""
+Scan Scheduler
+Adapts WiFi polling and active scan cadence to movement, churn and power
+"""
+
+import math
+import time
+
+EARTH_RADIUS = 6371000.0  # metres
+
+# Poll interval bounds in seconds
+MIN_POLL_INTERVAL = 0.5
+BASE_POLL_INTERVAL = 1.0
+MAX_POLL_INTERVAL = 5.0
+MAX_POLL_INTERVAL_BATTERY = 10.0
+
+# NetworkManager refuses scan requests that come too soon after the last one
+MIN_ACTIVE_SCAN_INTERVAL = 10.0
+MAX_ACTIVE_SCAN_INTERVAL = 60.0
+MAX_ACTIVE_SCAN_INTERVAL_BATTERY = 180.0
+
+# Distance after which the visible AP set has largely turned over
+RESCAN_DISTANCE = 100.0  # metres
+
+# Weight of the newest sample in the moving averages
+SMOOTHING = 0.3
+
+def distance_between(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres between two coordinates"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(min(a, 1.0)))
+
+class ScanScheduler:
+    """Chooses the poll interval and when to request active scans"""
+
+    def __init__(self):
+        # Movement
+        self.speed = 0.0  # m/s, smoothed
+        self.last_fix = None  # (latitude, longitude, timestamp)
+
+        # AP churn: fraction of visible APs that changed per tick, smoothed
+        self.churn = 1.0
+        self.quiet_ticks = 0
+
+        # Power
+        self.on_battery = False
+
+        # Per-device active scan state: iface -> {'last_scan', 'distance', 'denied'}
+        self.devices = {}
+
+    def device_state(self, iface):
+        """Get the active scan state of a device"""
+        state = self.devices.get(iface)
+        if state is None:
+            state = self.devices[iface] = {'last_scan': None, 'distance': 0.0, 'denied': False}
+        return state
+
+    def update_location(self, latitude, longitude, timestamp=None):
+        """Feed a location fix to update speed and distance travelled"""
+        if timestamp is None:
+            timestamp = time.time()
+
+        if self.last_fix is not None:
+            last_latitude, last_longitude, last_timestamp = self.last_fix
+            distance = distance_between(last_latitude, last_longitude, latitude, longitude)
+            elapsed = timestamp - last_timestamp
+            if elapsed > 0:
+                self.speed += SMOOTHING * (distance / elapsed - self.speed)
+            for state in self.devices.values():
+                state['distance'] += distance
+
+        self.last_fix = (latitude, longitude, timestamp)
+
+    def record_tick(self, changes, visible):
+        """Feed the number of changed and visible APs of a poll"""
+        self.churn += SMOOTHING * (changes / max(visible, 1) - self.churn)
+        self.quiet_ticks = 0 if changes else self.quiet_ticks + 1
+
+    def set_on_battery(self, on_battery):
+        """Update the power source"""
+        self.on_battery = on_battery
+
+    def poll_interval(self):
+        """Get the number of seconds until the next poll"""
+        max_interval = MAX_POLL_INTERVAL_BATTERY if self.on_battery else MAX_POLL_INTERVAL
+
+        if self.speed > 1.0 or self.churn > 0.05:
+            # Moving or busy: poll faster the faster the AP set turns over
+            interval = BASE_POLL_INTERVAL / (1.0 + self.speed / 10.0 + self.churn * 4.0)
+        else:
+            # Stationary and quiet: back off exponentially
+            interval = BASE_POLL_INTERVAL * 2 ** min(self.quiet_ticks // 5, 4)
+
+        if self.on_battery:
+            interval *= 1.5
+
+        # Round so small fluctuations don't re-arm the poll timer every tick
+        return round(min(max(interval, MIN_POLL_INTERVAL), max_interval), 1)
+
+    def should_active_scan(self, iface, now=None):
+        """Decide whether a device should be asked for an active scan now"""
+        state = self.device_state(iface)
+        if state['denied']:
+            return False
+        if state['last_scan'] is None:
+            return True
+
+        if now is None:
+            now = time.time()
+        elapsed = now - state['last_scan']
+        if elapsed < MIN_ACTIVE_SCAN_INTERVAL:
+            return False
+
+        max_interval = (MAX_ACTIVE_SCAN_INTERVAL_BATTERY if self.on_battery
+                        else MAX_ACTIVE_SCAN_INTERVAL)
+        return state['distance'] >= RESCAN_DISTANCE or elapsed >= max_interval
+
+    def record_active_scan(self, iface, now=None):
+        """Note that an active scan was requested on a device"""
+        state = self.device_state(iface)
+        state['last_scan'] = time.time() if now is None else now
+        state['distance'] = 0.0
+
+    def record_scan_denied(self, iface):
+        """Stop requesting active scans on a device that is not authorized to"""
+        self.device_state(iface)['denied'] = True
+
+def frequency_band(frequency):
+    """Get the band label of a frequency in MHz"""
+    if frequency is None:
+        return 'unknown'
+    if frequency < 3000:
+        return '2.4GHz'
+    if frequency < 5925:
+        return '5GHz'
+    return '6GHz'
+
+class ScanCoordinator:
+    """Staggers active scans across adapters and tracks what each one finds.
+
+    NetworkManager's RequestScan only takes SSID hints, not frequencies, so
+    adapters can't be pinned to channels. Spreading their scan start times
+    evenly means that at any moment the adapters sweep different parts of
+    the channel list, which gives most of the same coverage.
+    """
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.last_scan = None  # time of the most recent scan request on any adapter
+
+        # Per-interface yield
+        self.interfaces = {}  # iface -> {'bssids', 'first_found', 'bands', 'scans'}
+        self.all_bssids = set()
+
+    def interface_stats(self, iface):
+        """Get the yield counters of an interface"""
+        stats = self.interfaces.get(iface)
+        if stats is None:
+            stats = self.interfaces[iface] = {
+                'bssids': set(), 'first_found': 0, 'bands': {}, 'scans': 0,
+            }
+        return stats
+
+    def stagger_gap(self):
+        """Seconds to leave between scan requests on different adapters"""
+        return MIN_ACTIVE_SCAN_INTERVAL / max(len(self.scheduler.devices), 1)
+
+    def should_scan(self, iface, now=None):
+        """Decide whether an adapter should scan now without overlapping the others"""
+        if now is None:
+            now = time.time()
+        if self.last_scan is not None and now - self.last_scan < self.stagger_gap():
+            return False
+        return self.scheduler.should_active_scan(iface, now)
+
+    def record_scan(self, iface, now=None):
+        """Note that an adapter was asked to scan"""
+        if now is None:
+            now = time.time()
+        self.last_scan = now
+        self.scheduler.record_active_scan(iface, now)
+        self.interface_stats(iface)['scans'] += 1
+
+    def record_sighting(self, iface, bssid, frequency):
+        """Count a sighting towards the yield of the adapter that made it"""
+        stats = self.interface_stats(iface)
+        if bssid in stats['bssids']:
+            return
+
+        stats['bssids'].add(bssid)
+        band = frequency_band(frequency)
+        stats['bands'][band] = stats['bands'].get(band, 0) + 1
+        if bssid not in self.all_bssids:
+            self.all_bssids.add(bssid)
+            stats['first_found'] += 1
+
+    def get_yield(self):
+        """Get per-interface and combined yield"""
+        return {
+            'interfaces': {
+                iface: {
+                    'unique': len(stats['bssids']),
+                    'first_found': stats['first_found'],
+                    'bands': dict(stats['bands']),
+                    'scans': stats['scans'],
+                }
+                for iface, stats in self.interfaces.items()
+            },
+            'combined': len(self.all_bssids),
+        }
+
+    def clear(self):
+        """Reset the yield counters"""
+        self.interfaces.clear()
+        self.all_bssids.clear()
+        self.last_scan = None
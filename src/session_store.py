@@ -0,0 +1,240 @@
+"""
+Session Store
+Durable on-disk storage of wardriving sessions using SQLite
+"""
+
+import os
+import sqlite3
+import time
+
+def default_database_path():
+    """Get the default session database path in the user data directory"""
+    data_dir = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    return os.path.join(data_dir, 'gnome-wardrive', 'sessions.db')
+
+# Summary columns kept per BSSID, in table order
+NETWORK_FIELDS = (
+    'bssid', 'ssid', 'security', 'signal_strength', 'frequency', 'channel',
+    'latitude', 'longitude', 'accuracy', 'device_interface', 'timestamp',
+    'first_seen', 'last_seen',
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    ended_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS networks (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    bssid TEXT NOT NULL,
+    ssid TEXT,
+    security TEXT,
+    signal_strength INTEGER,
+    frequency INTEGER,
+    channel INTEGER,
+    latitude REAL,
+    longitude REAL,
+    accuracy REAL,
+    device_interface TEXT,
+    timestamp REAL,
+    first_seen REAL,
+    last_seen REAL,
+    PRIMARY KEY (session_id, bssid)
+);
+
+CREATE TABLE IF NOT EXISTS observations (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    bssid TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    latitude REAL,
+    longitude REAL,
+    accuracy REAL,
+    signal_strength INTEGER,
+    frequency INTEGER,
+    device_interface TEXT
+);
+
+CREATE TABLE IF NOT EXISTS track (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    timestamp REAL NOT NULL,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    accuracy REAL
+);
+
+-- Also finds the sighting update_position() tags; replaces observations_bssid
+DROP INDEX IF EXISTS observations_bssid;
+CREATE INDEX IF NOT EXISTS observations_sighting ON observations(session_id, bssid, timestamp);
+CREATE INDEX IF NOT EXISTS observations_time ON observations(session_id, timestamp);
+CREATE INDEX IF NOT EXISTS track_time ON track(session_id, timestamp);
+"""
+
+class SessionStore:
+    """Appends observations and track points to an SQLite database in WAL mode.
+
+    Writes are buffered in memory and committed together by flush(), which
+    is meant to be called once per scan tick. A crash therefore loses at
+    most the sightings of the tick that was in progress.
+    """
+
+    def __init__(self, db_path):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=FULL')
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+        self.session_id = None
+
+        # Writes waiting for the next flush
+        self.pending_observations = []
+        self.pending_positions = []
+        self.pending_track = []
+        self.pending_networks = {}
+
+    def start_session(self, resume=True):
+        """Open a session, resuming the last unfinished one if requested"""
+        if resume:
+            row = self.connection.execute(
+                'SELECT id FROM sessions WHERE ended_at IS NULL '
+                'ORDER BY id DESC LIMIT 1'
+            ).fetchone()
+            if row:
+                self.session_id = row[0]
+                return self.session_id, True
+
+        with self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO sessions (started_at) VALUES (?)', (time.time(),))
+        self.session_id = cursor.lastrowid
+        return self.session_id, False
+
+    def end_session(self):
+        """Flush pending writes and mark the current session as finished"""
+        if self.session_id is None:
+            return
+
+        self.flush()
+        with self.connection:
+            self.connection.execute(
+                'UPDATE sessions SET ended_at = ? WHERE id = ?',
+                (time.time(), self.session_id))
+        self.session_id = None
+
+    def add_observation(self, network_data):
+        """Queue a single sighting of a network"""
+        self.pending_observations.append((
+            self.session_id,
+            network_data.get('bssid'),
+            network_data.get('timestamp', time.time()),
+            network_data.get('latitude'),
+            network_data.get('longitude'),
+            network_data.get('accuracy'),
+            network_data.get('signal_strength'),
+            network_data.get('frequency'),
+            network_data.get('device_interface'),
+        ))
+
+    def update_position(self, network_data):
+        """Queue the position of a sighting that was stored before it was tagged"""
+        self.pending_positions.append((
+            network_data.get('latitude'),
+            network_data.get('longitude'),
+            network_data.get('accuracy'),
+            self.session_id,
+            network_data.get('bssid'),
+            network_data.get('timestamp'),
+        ))
+
+    def update_network(self, network):
+        """Queue the latest summary record of a network"""
+        self.pending_networks[network['bssid']] = network
+
+    def add_track_point(self, location_data):
+        """Queue a location fix"""
+        self.pending_track.append((
+            self.session_id,
+            location_data['timestamp'],
+            location_data['latitude'],
+            location_data['longitude'],
+            location_data.get('accuracy'),
+        ))
+
+    def flush(self):
+        """Commit all queued writes in a single transaction"""
+        if self.session_id is None:
+            return
+        if not (self.pending_observations or self.pending_positions
+                or self.pending_track or self.pending_networks):
+            return
+
+        networks = [
+            (self.session_id,) + tuple(network.get(field) for field in NETWORK_FIELDS)
+            for network in self.pending_networks.values()
+        ]
+
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO observations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                self.pending_observations)
+            self.connection.executemany(
+                'UPDATE observations SET latitude = ?, longitude = ?, accuracy = ? '
+                'WHERE session_id = ? AND bssid = ? AND timestamp = ?',
+                self.pending_positions)
+            self.connection.executemany(
+                'INSERT INTO track VALUES (?, ?, ?, ?, ?)',
+                self.pending_track)
+            self.connection.executemany(
+                f'INSERT OR REPLACE INTO networks (session_id, {", ".join(NETWORK_FIELDS)}) '
+                f'VALUES ({", ".join("?" * (len(NETWORK_FIELDS) + 1))})',
+                networks)
+
+        self.pending_observations = []
+        self.pending_positions = []
+        self.pending_track = []
+        self.pending_networks = {}
+
+    def load_networks(self):
+        """Load the network summaries of the current session"""
+        cursor = self.connection.execute(
+            f'SELECT {", ".join(NETWORK_FIELDS)} FROM networks WHERE session_id = ?',
+            (self.session_id,))
+        for row in cursor:
+            yield {
+                field: value for field, value in zip(NETWORK_FIELDS, row)
+                if value is not None
+            }
+
+    def load_observations(self):
+        """Load the sightings of the current session in time order"""
+        return self.connection.execute(
+            'SELECT bssid, timestamp, latitude, longitude, accuracy, '
+            'signal_strength, device_interface FROM observations '
+            'WHERE session_id = ? ORDER BY timestamp',
+            (self.session_id,))
+
+    def load_track(self):
+        """Load the location history of the current session in time order"""
+        cursor = self.connection.execute(
+            'SELECT timestamp, latitude, longitude, accuracy FROM track '
+            'WHERE session_id = ? ORDER BY timestamp',
+            (self.session_id,))
+        for timestamp, latitude, longitude, accuracy in cursor:
+            yield {
+                'latitude': latitude,
+                'longitude': longitude,
+                'accuracy': accuracy,
+                'timestamp': timestamp,
+            }
+
+    def close(self):
+        """Flush pending writes and close the database"""
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,171 @@
+"""
+Spatial Index
+Grid index of access point positions for area and proximity queries
+"""
+
+import heapq
+import math
+
+EARTH_RADIUS = 6371000.0  # metres
+METRES_PER_DEGREE = EARTH_RADIUS * math.pi / 180
+
+# Default edge length of a grid cell
+DEFAULT_CELL_SIZE = 100.0  # metres
+
+class SpatialIndex:
+    """Uniform latitude/longitude grid of BSSID positions.
+
+    Cells are cell_size metres high and the same number of degrees wide,
+    so they narrow towards the poles; queries widen their cell range by the
+    cosine of the latitude to compensate. Moving a position is O(1), and a
+    query only visits the cells overlapping its area.
+    """
+
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_degrees = cell_size / METRES_PER_DEGREE
+        self.cells = {}  # (row, column) -> {bssid: (latitude, longitude)}
+        self.positions = {}  # bssid -> (latitude, longitude, cell)
+
+    def cell(self, latitude, longitude):
+        """Get the grid cell of a position"""
+        return (math.floor(latitude / self.cell_degrees),
+                math.floor(longitude / self.cell_degrees))
+
+    def update(self, bssid, latitude, longitude):
+        """Insert or move a BSSID"""
+        cell = self.cell(latitude, longitude)
+        entry = self.positions.get(bssid)
+        if entry is not None and entry[2] != cell:
+            bucket = self.cells[entry[2]]
+            del bucket[bssid]
+            if not bucket:
+                del self.cells[entry[2]]
+
+        self.positions[bssid] = (latitude, longitude, cell)
+        bucket = self.cells.get(cell)
+        if bucket is None:
+            bucket = self.cells[cell] = {}
+        bucket[bssid] = (latitude, longitude)
+
+    def remove(self, bssid):
+        """Drop a BSSID from the index"""
+        entry = self.positions.pop(bssid, None)
+        if entry is None:
+            return
+        bucket = self.cells[entry[2]]
+        del bucket[bssid]
+        if not bucket:
+            del self.cells[entry[2]]
+
+    def get(self, bssid):
+        """Get the indexed (latitude, longitude) of a BSSID"""
+        entry = self.positions.get(bssid)
+        return entry[:2] if entry else None
+
+    def __len__(self):
+        return len(self.positions)
+
+    def buckets(self, first_row, last_row, first_column, last_column):
+        """Iterate over the occupied cells in a range of rows and columns"""
+        cells = self.cells
+        if (last_row - first_row + 1) * (last_column - first_column + 1) > len(cells):
+            # Fewer occupied cells than cells in range, so filter those instead
+            for (row, column), bucket in cells.items():
+                if first_row <= row <= last_row and first_column <= column <= last_column:
+                    yield bucket
+            return
+
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                bucket = cells.get((row, column))
+                if bucket:
+                    yield bucket
+
+    def in_bbox(self, south, west, north, east):
+        """Get the BSSIDs inside a bounding box"""
+        first_row, first_column = self.cell(south, west)
+        last_row, last_column = self.cell(north, east)
+        return [
+            bssid
+            for bucket in self.buckets(first_row, last_row, first_column, last_column)
+            for bssid, (latitude, longitude) in bucket.items()
+            if south <= latitude <= north and west <= longitude <= east
+        ]
+
+    def within(self, latitude, longitude, radius):
+        """Get (distance, bssid) of the BSSIDs within radius metres, nearest first"""
+        scale = math.cos(math.radians(latitude))
+        dlat = radius / METRES_PER_DEGREE
+        dlon = dlat / max(scale, 1e-6)
+        first_row, first_column = self.cell(latitude - dlat, longitude - dlon)
+        last_row, last_column = self.cell(latitude + dlat, longitude + dlon)
+
+        # Compare squared distances in degrees of latitude
+        limit = dlat * dlat
+        found = []
+        for bucket in self.buckets(first_row, last_row, first_column, last_column):
+            for bssid, (ap_latitude, ap_longitude) in bucket.items():
+                y = ap_latitude - latitude
+                x = (ap_longitude - longitude) * scale
+                squared = y * y + x * x
+                if squared <= limit:
+                    found.append((squared, bssid))
+
+        found.sort()
+        return [(math.sqrt(squared) * METRES_PER_DEGREE, bssid) for squared, bssid in found]
+
+    def nearest(self, latitude, longitude, k=1):
+        """Get (distance, bssid) of the k nearest BSSIDs, nearest first"""
+        if not self.positions or k <= 0:
+            return []
+
+        scale = math.cos(math.radians(latitude))
+        row, column = self.cell(latitude, longitude)
+        column_scale = max(scale, 1e-6)
+        candidates = []  # max-heap of the best k as (-squared distance, bssid)
+
+        def consider(bucket):
+            for bssid, (ap_latitude, ap_longitude) in bucket.items():
+                y = ap_latitude - latitude
+                x = (ap_longitude - longitude) * scale
+                item = (-(y * y + x * x), bssid)
+                if len(candidates) < k:
+                    heapq.heappush(candidates, item)
+                elif item > candidates[0]:
+                    heapq.heapreplace(candidates, item)
+
+        ring = 0
+        visited = 0
+        while True:
+            if (2 * ring + 1) ** 2 > len(self.cells):
+                # Rings have covered more cells than are occupied, so check every occupied one
+                candidates.clear()
+                for bucket in self.cells.values():
+                    consider(bucket)
+                break
+
+            # Visit the cells on the border of the current ring
+            for ring_row in range(row - ring, row + ring + 1):
+                edge = ring_row in (row - ring, row + ring)
+                step = 1 if edge else 2 * ring
+                for ring_column in range(column - ring, column + ring + 1, step):
+                    bucket = self.cells.get((ring_row, ring_column))
+                    if bucket:
+                        visited += len(bucket)
+                        consider(bucket)
+
+            # Everything outside this ring is at least this far away
+            reach = ring * self.cell_degrees * min(1.0, column_scale)
+            if len(candidates) >= k and -candidates[0][0] <= reach * reach:
+                break
+            if visited >= len(self.positions):
+                break
+            ring += 1
+
+        return [(math.sqrt(-squared) * METRES_PER_DEGREE, bssid)
+                for squared, bssid in sorted(candidates, reverse=True)]
+
+    def clear(self):
+        """Forget all positions"""
+        self.cells.clear()
+        self.positions.clear()
@@ -0,0 +1,275 @@
+"""
+Location Track
+Bounded, simplified history of location fixes
+"""
+
+from array import array
+from bisect import bisect_right
+import math
+
+EARTH_RADIUS = 6371000.0  # metres
+METRES_PER_DEGREE = EARTH_RADIUS * math.pi / 180
+
+# Default maximum deviation of the simplified route from the real one
+DEFAULT_ERROR_BOUND = 5.0  # metres
+
+# Most recent fixes kept at full rate
+DEFAULT_RECENT_POINTS = 600
+
+# Fixes further apart than this are never merged into one segment
+SEGMENT_GAP = 120.0  # seconds
+
+# Longest run of fixes a single simplified segment may replace
+MAX_PENDING = 64
+
+# Furthest a fix may be in time from a sighting it is used for without a
+# fix on the other side to interpolate with
+MAX_FIX_AGE = 10.0  # seconds
+
+class LocationTrack:
+    """Location history that keeps recent fixes and simplifies older ones.
+
+    The newest fixes are kept as they arrived. Once they fall out of the
+    recent window they pass through an opening-window simplification that
+    drops every fix whose position at its own timestamp can be interpolated
+    from the retained neighbours to within error_bound metres (synchronized
+    Euclidean distance). Retained fixes are stored in packed arrays of
+    (timestamp, latitude, longitude, accuracy), 32 bytes per point.
+
+    Positions at arbitrary times are interpolated between the bracketing
+    fixes, found by bisecting the timestamp arrays.
+    """
+
+    def __init__(self, error_bound=DEFAULT_ERROR_BOUND, recent_points=DEFAULT_RECENT_POINTS):
+        self.error_bound = error_bound
+        self.recent_points = recent_points
+
+        # Simplified history
+        self.timestamps = array('d')
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.accuracies = array('d')
+
+        # Fixes since the last retained one that the current segment replaces
+        self.pending = []
+
+        # Full-rate window of the newest fixes, starting at recent_start
+        self.recent_timestamps = array('d')
+        self.recent_latitudes = array('d')
+        self.recent_longitudes = array('d')
+        self.recent_accuracies = array('d')
+        self.recent_start = 0
+
+        self.received = 0  # fixes appended over the track's lifetime
+
+    def append(self, timestamp, latitude, longitude, accuracy=None):
+        """Add a location fix"""
+        self.recent_timestamps.append(timestamp)
+        self.recent_latitudes.append(latitude)
+        self.recent_longitudes.append(longitude)
+        self.recent_accuracies.append(math.nan if accuracy is None else accuracy)
+        self.received += 1
+
+        if len(self.recent_timestamps) - self.recent_start > self.recent_points:
+            self.simplify(self.recent_point(self.recent_start))
+            self.recent_start += 1
+
+            # Drop the points that left the window once they fill half of it
+            if self.recent_start >= self.recent_points:
+                for column in (self.recent_timestamps, self.recent_latitudes,
+                               self.recent_longitudes, self.recent_accuracies):
+                    del column[:self.recent_start]
+                self.recent_start = 0
+
+    def recent_point(self, index):
+        """Get a point of the recent window by array index"""
+        return (self.recent_timestamps[index], self.recent_latitudes[index],
+                self.recent_longitudes[index], self.recent_accuracies[index])
+
+    def retained_point(self, index):
+        """Get a point of the simplified history by array index"""
+        return (self.timestamps[index], self.latitudes[index],
+                self.longitudes[index], self.accuracies[index])
+
+    def retain(self, point):
+        """Append a fix to the simplified history"""
+        timestamp, latitude, longitude, accuracy = point
+        self.timestamps.append(timestamp)
+        self.latitudes.append(latitude)
+        self.longitudes.append(longitude)
+        self.accuracies.append(accuracy)
+
+    def fits(self, start, end, points):
+        """Check that a segment puts every fix within the error bound at its own time"""
+        start_time, start_latitude, start_longitude = start
+        duration = end[0] - start_time
+        if duration <= 0:
+            return False
+        dlat = (end[1] - start_latitude) / duration
+        dlon = (end[2] - start_longitude) / duration
+
+        # Compare squared offsets in degrees, with longitude scaled at the anchor
+        scale = math.cos(math.radians(start_latitude)) ** 2
+        bound = (self.error_bound / METRES_PER_DEGREE) ** 2
+        for timestamp, latitude, longitude, _ in points:
+            elapsed = timestamp - start_time
+            y = latitude - start_latitude - elapsed * dlat
+            x = longitude - start_longitude - elapsed * dlon
+            if y * y + x * x * scale > bound:
+                return False
+        return True
+
+    def simplify(self, point):
+        """Run a fix leaving the recent window through the simplification"""
+        if not self.timestamps:
+            self.retain(point)
+            return
+
+        pending = self.pending
+        previous = pending[-1] if pending else None
+        last_time = previous[0] if previous else self.timestamps[-1]
+
+        if point[0] <= last_time:
+            # Repeated timestamps or a clock stepping back; the route only
+            # moves forward in time, so the fix adds nothing to it
+            return
+
+        if point[0] - last_time > SEGMENT_GAP:
+            # Keep both ends of a gap so the route breaks there
+            if previous:
+                self.retain(previous)
+            self.retain(point)
+            pending.clear()
+            return
+
+        anchor = (self.timestamps[-1], self.latitudes[-1], self.longitudes[-1])
+        # Segments never span more than SEGMENT_GAP, so longer ones always mean lost fixes
+        if (len(pending) < MAX_PENDING and point[0] - anchor[0] <= SEGMENT_GAP
+                and self.fits(anchor, point, pending)):
+            pending.append(point)
+        else:
+            # The segment can't absorb this fix, so the previous one becomes a vertex
+            self.retain(previous)
+            pending[:] = [point]
+
+    def __len__(self):
+        """Number of points kept"""
+        return (len(self.timestamps) + (1 if self.pending else 0)
+                + len(self.recent_timestamps) - self.recent_start)
+
+    def __iter__(self):
+        """Iterate over kept points as (timestamp, latitude, longitude, accuracy) in time order"""
+        yield from zip(self.timestamps, self.latitudes, self.longitudes, self.accuracies)
+        if self.pending:
+            yield self.pending[-1]
+        for index in range(self.recent_start, len(self.recent_timestamps)):
+            yield self.recent_point(index)
+
+    def last(self):
+        """Get the newest point, or None"""
+        if len(self.recent_timestamps) > self.recent_start:
+            return self.recent_point(-1)
+        if self.pending:
+            return self.pending[-1]
+        if self.timestamps:
+            return self.retained_point(-1)
+        return None
+
+    def last_time(self):
+        """Get the timestamp of the newest point, or None"""
+        point = self.last()
+        return point[0] if point else None
+
+    def bracket(self, timestamp):
+        """Get the kept points just before and after a time (either may be None)"""
+        before = after = None
+
+        # Recent window
+        timestamps = self.recent_timestamps
+        if len(timestamps) > self.recent_start:
+            index = bisect_right(timestamps, timestamp, self.recent_start)
+            if index < len(timestamps):
+                after = self.recent_point(index)
+            if index > self.recent_start:
+                return self.recent_point(index - 1), after
+
+        # Last fix replaced by the current segment
+        if self.pending:
+            point = self.pending[-1]
+            if point[0] <= timestamp:
+                return point, after
+            after = point
+
+        # Simplified history
+        index = bisect_right(self.timestamps, timestamp)
+        if index < len(self.timestamps):
+            after = self.retained_point(index)
+        if index > 0:
+            before = self.retained_point(index - 1)
+        return before, after
+
+    def interpolate(self, timestamp, before, after, max_age=MAX_FIX_AGE):
+        """Get (latitude, longitude, accuracy) at a time from its bracketing points"""
+        if before is not None and after is not None and after[0] - before[0] <= SEGMENT_GAP:
+            duration = after[0] - before[0]
+            fraction = (timestamp - before[0]) / duration if duration > 0 else 0.0
+            accuracies = [value for value in (before[3], after[3]) if not math.isnan(value)]
+            return (
+                before[1] + fraction * (after[1] - before[1]),
+                before[2] + fraction * (after[2] - before[2]),
+                max(accuracies) if accuracies else None,
+            )
+
+        # No usable segment, so fall back to the nearest fix if it is recent enough
+        candidates = [point for point in (before, after)
+                      if point is not None and abs(point[0] - timestamp) <= max_age]
+        if not candidates:
+            return None
+        point = min(candidates, key=lambda point: abs(point[0] - timestamp))
+        return point[1], point[2], None if math.isnan(point[3]) else point[3]
+
+    def position_at(self, timestamp, max_age=MAX_FIX_AGE):
+        """Get the interpolated (latitude, longitude, accuracy) at a time, or None"""
+        before, after = self.bracket(timestamp)
+        return self.interpolate(timestamp, before, after, max_age)
+
+    def positions_at(self, timestamps, max_age=MAX_FIX_AGE):
+        """Get the positions at many times in ascending order, one bisection per segment"""
+        positions = []
+        before = after = None
+        for timestamp in timestamps:
+            # Reuse the bracket while the times stay inside the same segment
+            if (before is None or after is None
+                    or not before[0] <= timestamp < after[0]):
+                before, after = self.bracket(timestamp)
+            positions.append(self.interpolate(timestamp, before, after, max_age))
+        return positions
+
+    def copy(self):
+        """Get an independent copy of the track"""
+        track = LocationTrack(self.error_bound, self.recent_points)
+        track.timestamps = array('d', self.timestamps)
+        track.latitudes = array('d', self.latitudes)
+        track.longitudes = array('d', self.longitudes)
+        track.accuracies = array('d', self.accuracies)
+        track.pending = list(self.pending)
+        track.recent_timestamps = self.recent_timestamps[self.recent_start:]
+        track.recent_latitudes = self.recent_latitudes[self.recent_start:]
+        track.recent_longitudes = self.recent_longitudes[self.recent_start:]
+        track.recent_accuracies = self.recent_accuracies[self.recent_start:]
+        track.received = self.received
+        return track
+
+    def clear(self):
+        """Forget all points"""
+        self.timestamps = array('d')
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.accuracies = array('d')
+        self.pending = []
+        self.recent_timestamps = array('d')
+        self.recent_latitudes = array('d')
+        self.recent_longitudes = array('d')
+        self.recent_accuracies = array('d')
+        self.recent_start = 0
+        self.received = 0
@@ -6,39 +6,182 @@ Handles WiFi network scanning using NetworkManager D-Bus interface
 import gi
 gi.require_version('NM', '1.0')
 
-from gi.repository import GObject, NM, GLib
+from gi.repository import GObject, NM, GLib, Gio
+import logging
+import os
 import time
+try:
+    from .scan_scheduler import ScanScheduler, ScanCoordinator
+except ImportError:
+    try:
+        from gnome_wardrive.scan_scheduler import ScanScheduler, ScanCoordinator
+    except ImportError:
+        from scan_scheduler import ScanScheduler, ScanCoordinator
+try:
+    from .classifier import classify_security, frequency_to_channel
+except ImportError:
+    try:
+        from gnome_wardrive.classifier import classify_security, frequency_to_channel
+    except ImportError:
+        from classifier import classify_security, frequency_to_channel
+try:
+    from .metrics import metrics
+except ImportError:
+    try:
+        from gnome_wardrive.metrics import metrics
+    except ImportError:
+        from metrics import metrics
+try:
+    from .log import get_logger
+except ImportError:
+    try:
+        from gnome_wardrive.log import get_logger
+    except ImportError:
+        from log import get_logger
+
+# Ingestion modes: poll NetworkManager's AP lists, react to its signals, or
+# process snapshots pushed by a replay source through update_scan_results()
+INGEST_POLL = 'poll'
+INGEST_EVENTS = 'events'
+INGEST_REPLAY = 'replay'
+
+# Environment variable choosing the ingestion mode of the application and
+# collector; polling stays the default until event-driven ingestion has
+# been proven on real hardware
+INGEST_ENVIRONMENT = 'GNOME_WARDRIVE_INGEST'
+DEFAULT_INGEST_MODE = INGEST_POLL
+
+# Seconds between active scan checks in event-driven mode
+EVENT_ACTIVE_SCAN_CHECK = 2
+
+logger = get_logger('wifi_scanner')
 
 class WiFiScanner(GObject.GObject):
     """WiFi scanner using NetworkManager"""
     
     __gsignals__ = {
         'network-found': (GObject.SIGNAL_RUN_FIRST, None, (object,)),
+        'aps-expired': (GObject.SIGNAL_RUN_FIRST, None, (object,)),
+        'scan-tick': (GObject.SIGNAL_RUN_FIRST, None, ()),
         'scan-completed': (GObject.SIGNAL_RUN_FIRST, None, ()),
         'scan-error': (GObject.SIGNAL_RUN_FIRST, None, (str,)),
+        'devices-changed': (GObject.SIGNAL_RUN_FIRST, None, ()),
     }
     
-    def __init__(self):
+    def __init__(self, delta_mode=True, ingest_mode=None, nm_client=None):
         super().__init__()
         
-        # NetworkManager client
-        self.nm_client = NM.Client.new(None)
+        # NetworkManager client (a replay source passes a stand-in)
+        self.nm_client = nm_client if nm_client is not None else NM.Client.new(None)
         self.is_scanning = False
+        
+        # Source of timestamps, replaced by the trace clock during replay
+        self.clock = time.time
+        
+        # Optional TraceRecorder capturing every AP snapshot
+        self.recorder = None
         self.scan_timeout_id = None
         self.scan_attempts = 0
         
-        # Get WiFi devices
+        # Event-driven ingestion state
+        if ingest_mode is None:
+            ingest_mode = os.environ.get(INGEST_ENVIRONMENT) or DEFAULT_INGEST_MODE
+        if ingest_mode not in (INGEST_POLL, INGEST_EVENTS, INGEST_REPLAY):
+            logger.warning("Unknown ingestion mode %r, polling instead", ingest_mode)
+            ingest_mode = INGEST_POLL
+        self.ingest_mode = ingest_mode
+        self.device_handlers = {}  # device -> [handler ids]
+        self.ap_handlers = {}  # (device_interface, bssid) -> (access point, handler id)
+        self.event_changes = 0
+        self.event_tick_id = None
+        
+        # Delta scanning: only emit APs that are new or whose state changed.
+        # (device_interface, bssid) -> (strength, frequency, flags, wpa_flags, rsn_flags)
+        self.delta_mode = delta_mode
+        self.ap_states = {}
+        self.ap_last_seen = {}
+        self.visible_aps = 0  # access points seen by the last poll
+        metrics.watch('visible_aps', self.count_visible_aps)
+        
+        # Adaptive poll interval and active scan cadence
+        self.scheduler = ScanScheduler()
+        self.coordinator = ScanCoordinator(self.scheduler)
+        self.poll_interval_ms = None
+        self.upower_proxy = None
+        self.setup_power_monitor()
+        
+        # Get WiFi devices and follow adapters being plugged in or removed
         self.wifi_devices = []
         self.refresh_wifi_devices()
+        self.nm_client.connect('device-added', self.on_device_added)
+        self.nm_client.connect('device-removed', self.on_device_removed)
         
     def refresh_wifi_devices(self):
-        """Get all available WiFi devices"""
-        self.wifi_devices = []
-        for device in self.nm_client.get_devices():
-            if device.get_device_type() == NM.DeviceType.WIFI:
-                self.wifi_devices.append(device)
+        """Reconcile the device registry with NetworkManager's device list"""
+        current = [device for device in self.nm_client.get_devices()
+                   if device.get_device_type() == NM.DeviceType.WIFI]
+        
+        for device in [device for device in self.wifi_devices if device not in current]:
+            self.remove_wifi_device(device)
+        for device in current:
+            self.add_wifi_device(device)
                 
-        print(f"Found {len(self.wifi_devices)} WiFi devices")
+        logger.info("Found %d WiFi devices", len(self.wifi_devices))
+        
+    def add_wifi_device(self, device):
+        """Register a WiFi device, returning False if it was already known"""
+        if device in self.wifi_devices:
+            return False
+            
+        self.wifi_devices.append(device)
+        iface = device.get_iface()
+        self.scheduler.device_state(iface)
+        
+        if self.is_scanning:
+            if self.ingest_mode == INGEST_EVENTS:
+                self.watch_device(device)
+            if self.coordinator.should_scan(iface):
+                self.request_active_scan(device)
+        return True
+        
+    def remove_wifi_device(self, device):
+        """Unregister a WiFi device and expire the access points it saw"""
+        if device not in self.wifi_devices:
+            return False
+            
+        self.wifi_devices.remove(device)
+        iface = device.get_iface()
+        self.scheduler.devices.pop(iface, None)
+        
+        if device in self.device_handlers:
+            self.unwatch_device(device)
+            
+        # Forget the polling state of the device's access points
+        keys = [key for key in self.ap_last_seen if key[0] == iface]
+        for key in keys:
+            self.ap_states.pop(key, None)
+            self.ap_last_seen.pop(key, None)
+        if keys:
+            now = self.clock()
+            self.emit('aps-expired', [
+                {'bssid': key[1], 'device_interface': iface, 'last_seen': now}
+                for key in keys
+            ])
+        return True
+        
+    def on_device_added(self, client, device):
+        """Handle a device appearing in NetworkManager"""
+        if device.get_device_type() != NM.DeviceType.WIFI:
+            return
+        if self.add_wifi_device(device):
+            logger.info("🔌 WiFi device added: %s", device.get_iface())
+            self.emit('devices-changed')
+            
+    def on_device_removed(self, client, device):
+        """Handle a device disappearing from NetworkManager"""
+        if self.remove_wifi_device(device):
+            logger.info("🔌 WiFi device removed: %s", device.get_iface())
+            self.emit('devices-changed')
         
     def start_scan(self):
         """Start WiFi scanning"""
@@ -51,87 +194,368 @@ class WiFiScanner(GObject.GObject):
             
         self.is_scanning = True
         self.scan_attempts = 0
+        self.coordinator.clear()
+        self.ap_states.clear()
+        self.ap_last_seen.clear()
         
         # Try to request active scan, but continue with passive scanning if denied
         self._attempt_active_scan()
-                
-        # Set up periodic scan updates (works with both active and passive scanning)
-        self.scan_timeout_id = GLib.timeout_add_seconds(1, self.update_scan_results)
+        
+        if self.ingest_mode == INGEST_EVENTS:
+            # NetworkManager tells us about every change, only active scans need a timer
+            for device in self.wifi_devices:
+                self.watch_device(device)
+            self.scan_timeout_id = GLib.timeout_add_seconds(
+                EVENT_ACTIVE_SCAN_CHECK, self.on_active_scan_check)
+        elif self.ingest_mode == INGEST_REPLAY:
+            # The replay source calls update_scan_results() for every recorded tick
+            pass
+        else:
+            # Set up periodic scan updates (works with both active and passive scanning)
+            self.schedule_next_poll()
+        
+    def setup_power_monitor(self):
+        """Track whether the system runs on battery through UPower"""
+        Gio.DBusProxy.new_for_bus(
+            Gio.BusType.SYSTEM,
+            Gio.DBusProxyFlags.NONE,
+            None,
+            'org.freedesktop.UPower',
+            '/org/freedesktop/UPower',
+            'org.freedesktop.UPower',
+            None,
+            self._on_upower_proxy_ready,
+        )
+        
+    def _on_upower_proxy_ready(self, source, result):
+        """Read the initial power source and follow its changes"""
+        try:
+            self.upower_proxy = Gio.DBusProxy.new_for_bus_finish(result)
+        except GLib.Error as e:
+            logger.info("ℹ️  UPower not available, assuming AC power: %s", e.message)
+            return
+            
+        self.upower_proxy.connect('g-properties-changed', self._on_power_changed)
+        self._on_power_changed(self.upower_proxy)
+        
+    def _on_power_changed(self, proxy, *args):
+        """Update the scheduler with the current power source"""
+        on_battery = proxy.get_cached_property('OnBattery')
+        if on_battery is not None:
+            self.scheduler.set_on_battery(on_battery.get_boolean())
+            
+    def update_location(self, latitude, longitude):
+        """Feed a location fix to the scan scheduler"""
+        self.scheduler.update_location(latitude, longitude, self.clock())
+        
+    def schedule_next_poll(self):
+        """Arm the poll timer with the scheduler's current interval"""
+        self.poll_interval_ms = int(self.scheduler.poll_interval() * 1000)
+        self.scan_timeout_id = GLib.timeout_add(self.poll_interval_ms, self.update_scan_results)
         
     def _attempt_active_scan(self):
         """Attempt active WiFi scanning, fall back to passive if not authorized"""
         active_scan_successful = False
         
+        # Register every adapter so the stagger gap accounts for all of them,
+        # then start with the first one; the rest follow as they come due
+        now = self.clock()
         for device in self.wifi_devices:
-            try:
-                # Try to request an active scan
-                wifi_device = device
-                wifi_device.request_scan_async(None, self.on_scan_requested, device)
+            self.scheduler.device_state(device.get_iface())
+        for device in self.wifi_devices:
+            if self.coordinator.should_scan(device.get_iface(), now):
+                if self.request_active_scan(device, now):
+                    active_scan_successful = True
+            elif not self.scheduler.device_state(device.get_iface())['denied']:
                 active_scan_successful = True
-            except Exception as e:
-                # If scan request fails, we'll continue with passive scanning
-                error_msg = str(e).lower()
-                if "not authorized" in error_msg or "authentication" in error_msg:
-                    print(f"ℹ️  Active scanning not available on {device.get_iface()}, using passive monitoring")
-                else:
-                    print(f"⚠️  Scan request failed on {device.get_iface()}: {e}")
         
         if not active_scan_successful:
-            print("ℹ️  Running in passive WiFi monitoring mode")
-            print("ℹ️  The app will detect networks as they beacon or when other devices scan")
+            logger.info("ℹ️  Running in passive WiFi monitoring mode")
+            logger.info("ℹ️  The app will detect networks as they beacon or when other devices scan")
+            
+    def request_due_active_scans(self, now):
+        """Request active scans on devices the scheduler says are due"""
+        for device in self.wifi_devices:
+            if self.coordinator.should_scan(device.get_iface(), now):
+                self.request_active_scan(device, now)
+                
+    def request_active_scan(self, device, now=None):
+        """Request an active scan on one device, returning False if it failed"""
+        iface = device.get_iface()
+        self.coordinator.record_scan(iface, now)
+        try:
+            # Try to request an active scan
+            device.request_scan_async(None, self.on_scan_requested, device)
+            return True
+        except Exception as e:
+            # If scan request fails, we'll continue with passive scanning
+            error_msg = str(e).lower()
+            if "not authorized" in error_msg or "authentication" in error_msg:
+                logger.info("ℹ️  Active scanning not available on %s, using passive monitoring", iface)
+                self.scheduler.record_scan_denied(iface)
+            else:
+                logger.warning("⚠️  Scan request failed on %s: %s", iface, e,
+                               extra={'key': ('scan-request', iface)})
+            return False
         
     def stop_scan(self):
         """Stop WiFi scanning"""
         self.is_scanning = False
+        self.visible_aps = 0
         
         if self.scan_timeout_id:
             GLib.source_remove(self.scan_timeout_id)
             self.scan_timeout_id = None
             
+        for device in list(self.device_handlers):
+            self.unwatch_device(device)
+        if self.event_tick_id:
+            GLib.source_remove(self.event_tick_id)
+            self.event_tick_id = None
+            
         self.emit('scan-completed')
         
+    def watch_device(self, device):
+        """Follow access point changes on a device through NetworkManager signals"""
+        if device in self.device_handlers:
+            return
+            
+        self.device_handlers[device] = [
+            device.connect('access-point-added', self.on_access_point_added),
+            device.connect('access-point-removed', self.on_access_point_removed),
+            device.connect('notify::last-scan', self.on_last_scan_changed),
+        ]
+        
+        for ap in device.get_access_points():
+            self.on_access_point_added(device, ap)
+            
+    def unwatch_device(self, device):
+        """Stop following a device and forget its access points"""
+        for handler_id in self.device_handlers.pop(device, []):
+            device.disconnect(handler_id)
+            
+        iface = device.get_iface()
+        expired = []
+        for key in [key for key in self.ap_handlers if key[0] == iface]:
+            ap, handler_id = self.ap_handlers.pop(key)
+            ap.disconnect(handler_id)
+            expired.append({'bssid': key[1], 'device_interface': iface, 'last_seen': self.clock()})
+            
+        if expired:
+            self.emit('aps-expired', expired)
+            
+    def on_access_point_added(self, device, ap):
+        """Handle an access point appearing on a device"""
+        key = (device.get_iface(), ap.get_bssid())
+        if key in self.ap_handlers:
+            return
+            
+        handler_id = ap.connect('notify::strength', self.on_access_point_changed, device)
+        self.ap_handlers[key] = (ap, handler_id)
+        self.emit_access_point(ap, device)
+        
+    def on_access_point_removed(self, device, ap):
+        """Handle an access point disappearing from a device"""
+        key = (device.get_iface(), ap.get_bssid())
+        entry = self.ap_handlers.pop(key, None)
+        if entry is None:
+            return
+            
+        entry[0].disconnect(entry[1])
+        self.emit('aps-expired', [{
+            'bssid': key[1],
+            'device_interface': key[0],
+            'last_seen': self.clock(),
+        }])
+        self.queue_event_tick()
+        
+    def on_access_point_changed(self, ap, pspec, device):
+        """Handle a signal strength change of a known access point"""
+        self.emit_access_point(ap, device)
+        
+    def on_last_scan_changed(self, device, pspec):
+        """Close the current batch when NetworkManager finishes a scan"""
+        self.queue_event_tick()
+        
+    def emit_access_point(self, ap, device):
+        """Emit the current state of a single access point"""
+        metrics.count('aps_processed')
+        network_data = self.extract_network_data(ap, device, self.clock())
+        if network_data:
+            self.coordinator.record_sighting(
+                network_data['device_interface'], network_data['bssid'], network_data['frequency'])
+            self.emit('network-found', network_data)
+            self.event_changes += 1
+            self.queue_event_tick()
+            
+    def queue_event_tick(self):
+        """Emit one scan-tick after the current batch of events"""
+        if not self.event_tick_id:
+            self.event_tick_id = GLib.idle_add(self.on_event_tick)
+            
+    def on_event_tick(self):
+        """Finish a batch of access point events"""
+        self.event_tick_id = None
+        started = metrics.start()
+        if self.recorder:
+            now = self.clock()
+            for device in self.wifi_devices:
+                self.recorder.record_access_points(
+                    device.get_iface(), now, device.get_access_points())
+        self.emit('scan-tick')
+        self.scheduler.record_tick(self.event_changes, len(self.ap_handlers))
+        self.event_changes = 0
+        metrics.stop('scan_tick', started)
+        return False  # Don't repeat
+        
+    def on_active_scan_check(self):
+        """Request active scans that are due in event-driven mode"""
+        if not self.is_scanning:
+            return False
+        self.request_due_active_scans(self.clock())
+        return True  # Continue timeout
+        
     def on_scan_requested(self, device, result, user_data):
         """Handle scan request completion"""
         try:
             device.request_scan_finish(result)
-            print(f"✅ Active scan initiated on {device.get_iface()}")
+            logger.debug("✅ Active scan initiated on %s", device.get_iface())
         except Exception as e:
             # This is expected in sandboxed environments - just continue with passive scanning
-            pass
+            error_msg = str(e).lower()
+            if "not authorized" in error_msg or "authentication" in error_msg:
+                self.scheduler.record_scan_denied(device.get_iface())
             
     def update_scan_results(self):
         """Update scan results from all devices"""
         if not self.is_scanning:
             return False
             
-        current_time = time.time()
+        started = metrics.start()
+        current_time = self.clock()
         networks_found_this_cycle = 0
+        expired_this_cycle = 0
+        seen_this_cycle = set()
         
         for device in self.wifi_devices:
             try:
+                iface = device.get_iface()
                 access_points = device.get_access_points()
+                metrics.count('aps_processed', len(access_points))
+                if self.recorder:
+                    self.recorder.record_access_points(iface, current_time, access_points)
                 
                 for ap in access_points:
+                    key = (iface, ap.get_bssid())
+                    seen_this_cycle.add(key)
+                    
+                    if self.delta_mode:
+                        self.ap_last_seen[key] = current_time
+                        state = self.get_ap_state(ap)
+                        if self.ap_states.get(key) == state:
+                            continue
+                        self.ap_states[key] = state
+                        
                     network_data = self.extract_network_data(ap, device, current_time)
                     if network_data:
+                        self.coordinator.record_sighting(
+                            iface, network_data['bssid'], network_data['frequency'])
                         self.emit('network-found', network_data)
                         networks_found_this_cycle += 1
                         
             except Exception as e:
-                print(f"Error getting access points from {device.get_iface()}: {e}")
+                logger.warning("Error getting access points from %s: %s", device.get_iface(), e,
+                               extra={'key': ('access-points', device.get_iface())})
+        
+        self.visible_aps = len(seen_this_cycle)
+        if self.delta_mode:
+            expired_this_cycle = self.expire_access_points(seen_this_cycle)
+            
+        self.emit('scan-tick')
+        
+        # Adapt the cadence to how much changed
+        self.scheduler.record_tick(
+            networks_found_this_cycle + expired_this_cycle, len(seen_this_cycle))
+        self.request_due_active_scans(current_time)
         
         # Provide periodic feedback about scanning
         self.scan_attempts += 1
-        if self.scan_attempts % 10 == 0:  # Every 10 seconds
-            total_networks = sum(len(device.get_access_points()) for device in self.wifi_devices)
-            print(f"📡 Monitoring: {total_networks} networks visible across {len(self.wifi_devices)} device(s)")
-                
+        if self.scan_attempts % 10 == 0:  # Every 10 polls
+            total_networks = len(seen_this_cycle)
+            # Already paced by the poll count, so exempt from the rate limit
+            logger.info("📡 Monitoring: %d networks visible across %d device(s)",
+                        total_networks, len(self.wifi_devices), extra={'rate_limit': False})
+            if len(self.wifi_devices) > 1 and logger.isEnabledFor(logging.INFO):
+                logger.info("%s", '\n'.join(self.format_interface_yield()),
+                            extra={'rate_limit': False})
+        metrics.stop('scan_tick', started)
+            
+        # Re-arm the timer when the scheduler picked a different interval
+        if self.ingest_mode == INGEST_REPLAY:
+            return False
+        if int(self.scheduler.poll_interval() * 1000) != self.poll_interval_ms:
+            self.schedule_next_poll()
+            return False
+            
         return True  # Continue timeout
     
+    def count_visible_aps(self):
+        """Get the number of access points currently in view across all devices"""
+        if self.ingest_mode == INGEST_EVENTS:
+            return len(self.ap_handlers)
+        return self.visible_aps
+        
+    def get_interface_yield(self):
+        """Get how many unique networks each adapter found, and all of them together"""
+        return self.coordinator.get_yield()
+        
+    def format_interface_yield(self):
+        """Get the per-adapter yield as lines of text"""
+        report = self.get_interface_yield()
+        lines = []
+        for iface, stats in sorted(report['interfaces'].items()):
+            bands = ', '.join(f"{band}: {count}" for band, count in sorted(stats['bands'].items()))
+            lines.append(f"   {iface}: {stats['unique']} unique, {stats['first_found']} found first, "
+                         f"{stats['scans']} scans ({bands})")
+        lines.append(f"   combined: {report['combined']} unique networks")
+        return lines
+        
+    def log_interface_yield(self):
+        """Log the per-adapter yield"""
+        logger.info("%s", '\n'.join(self.format_interface_yield()))
+        
+    def get_ap_state(self, access_point):
+        """Get the fields that decide whether an access point has changed"""
+        return (
+            access_point.get_strength(),
+            access_point.get_frequency(),
+            access_point.get_flags(),
+            access_point.get_wpa_flags(),
+            access_point.get_rsn_flags(),
+        )
+        
+    def expire_access_points(self, seen_keys):
+        """Forget access points that are no longer visible and emit them as one batch"""
+        expired = []
+        for key in list(self.ap_states):
+            if key in seen_keys:
+                continue
+            iface, bssid = key
+            del self.ap_states[key]
+            expired.append({
+                'bssid': bssid,
+                'device_interface': iface,
+                'last_seen': self.ap_last_seen.pop(key, None),
+            })
+            
+        if expired:
+            self.emit('aps-expired', expired)
+        return len(expired)
+            
     def get_current_networks(self):
         """Get all currently visible networks from all devices"""
         networks = []
-        current_time = time.time()
+        current_time = self.clock()
         
         for device in self.wifi_devices:
             try:
@@ -141,12 +565,14 @@ class WiFiScanner(GObject.GObject):
                     if network_data:
                         networks.append(network_data)
             except Exception as e:
-                print(f"Error getting networks from {device.get_iface()}: {e}")
+                logger.warning("Error getting networks from %s: %s", device.get_iface(), e,
+                               extra={'key': ('networks', device.get_iface())})
                 
         return networks
         
     def extract_network_data(self, access_point, device, timestamp):
         """Extract network data from access point"""
+        started = metrics.start()
         try:
             ssid_bytes = access_point.get_ssid()
             ssid = ssid_bytes.get_data().decode('utf-8') if ssid_bytes else None
@@ -155,13 +581,14 @@ class WiFiScanner(GObject.GObject):
             if not ssid:
                 ssid = f"Hidden_{access_point.get_bssid()}"
                 
+            frequency = access_point.get_frequency()
             network_data = {
                 'ssid': ssid,
                 'bssid': access_point.get_bssid(),
                 'signal_strength': access_point.get_strength(),
-                'frequency': access_point.get_frequency(),
-                'channel': self.frequency_to_channel(access_point.get_frequency()),
-                'security': self.get_security_type(access_point),
+                'frequency': frequency,
+                'channel': frequency_to_channel(frequency),
+                'security': self.get_security_type(access_point, device.get_iface()),
                 'device_interface': device.get_iface(),
                 'timestamp': timestamp,
                 'last_seen': timestamp,
@@ -170,66 +597,30 @@ class WiFiScanner(GObject.GObject):
             return network_data
             
         except Exception as e:
-            print(f"Error extracting network data: {e}")
+            metrics.count('ap_extract_errors')
+            iface = device.get_iface()
+            logger.warning("Error extracting network data on %s: %s", iface, e,
+                           extra={'key': ('extract', iface)})
             return None
+        finally:
+            metrics.stop('ap_extract', started)
             
-    def get_security_type(self, access_point):
+    def get_security_type(self, access_point, iface=None):
         """Determine security type of access point"""
         try:
-            flags = access_point.get_flags()
-            wpa_flags = access_point.get_wpa_flags()
-            rsn_flags = access_point.get_rsn_flags()
-            
-            # Use the correct NM flag names
-            ApFlags = getattr(NM, '80211ApFlags')
-            SecurityFlags = getattr(NM, '80211ApSecurityFlags')
-            
-            # Check for WPA3 (RSN with SAE)
-            if hasattr(SecurityFlags, 'KEY_MGMT_SAE') and rsn_flags & SecurityFlags.KEY_MGMT_SAE:
-                return 'WPA3'
-            # Check for WPA2 (RSN with PSK or 802.1X)
-            elif rsn_flags & (SecurityFlags.KEY_MGMT_PSK | SecurityFlags.KEY_MGMT_802_1X):
-                return 'WPA2'
-            # Check for WPA (WPA flags present)
-            elif wpa_flags & (SecurityFlags.KEY_MGMT_PSK | SecurityFlags.KEY_MGMT_802_1X):
-                return 'WPA'
-            # Check for WEP (privacy flag without WPA/WPA2)
-            elif flags & ApFlags.PRIVACY:
-                return 'WEP'
-            else:
-                return 'Open'
+            return classify_security(
+                access_point.get_flags(),
+                access_point.get_wpa_flags(),
+                access_point.get_rsn_flags(),
+            )
         except Exception as e:
-            print(f"Error determining security type: {e}")
-            # Fallback: simple detection based on presence of security
-            try:
-                wpa_flags = access_point.get_wpa_flags()
-                rsn_flags = access_point.get_rsn_flags()
-                
-                if rsn_flags or wpa_flags:
-                    return 'WPA/WPA2'
-                elif access_point.get_flags():
-                    return 'WEP'  
-                else:
-                    return 'Open'
-            except:
-                return 'Unknown'
+            logger.warning("Error determining security type on %s: %s", iface, e,
+                           extra={'key': ('security', iface)})
+            return 'Unknown'
             
     def frequency_to_channel(self, frequency):
         """Convert frequency to WiFi channel number"""
-        if frequency >= 2412 and frequency <= 2484:
-            # 2.4 GHz band
-            if frequency == 2484:
-                return 14
-            else:
-                return int((frequency - 2412) / 5) + 1
-        elif frequency >= 5170 and frequency <= 5825:
-            # 5 GHz band
-            return int((frequency - 5000) / 5)
-        elif frequency >= 5925 and frequency <= 7125:
-            # 6 GHz band (WiFi 6E)
-            return int((frequency - 5950) / 5) + 1
-        else:
-            return 0  # Unknown
+        return frequency_to_channel(frequency)
             
     def get_network_count(self):
         """Get total number of unique networks found"""
@@ -3,25 +3,101 @@ Main Window for GNOME Wardrive Application
 Handles the primary user interface and coordinates between services
 """
 
+import threading
 import gi
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
 
-from gi.repository import Gtk, Adw, Gio, GLib
+from gi.repository import Gtk, Adw, Gio, GLib, GObject
 try:
     from .wifi_scanner import WiFiScanner
     from .location_service import LocationService
     from .data_manager import DataManager
+    from .session_store import SessionStore, default_database_path
+    from .data_manager import ExportCancelled
+    from .classifier import security_category
+    from .network_stats import format_summary
+    from .metrics import metrics
+    from .metrics_reporter import MetricsReporter
+    from .collector_link import CollectorClient
+    from .log import get_logger
 except ImportError:
     try:
         from gnome_wardrive.wifi_scanner import WiFiScanner
         from gnome_wardrive.location_service import LocationService
         from gnome_wardrive.data_manager import DataManager
+        from gnome_wardrive.session_store import SessionStore, default_database_path
+        from gnome_wardrive.data_manager import ExportCancelled
+        from gnome_wardrive.classifier import security_category
+        from gnome_wardrive.network_stats import format_summary
+        from gnome_wardrive.metrics import metrics
+        from gnome_wardrive.metrics_reporter import MetricsReporter
+        from gnome_wardrive.collector_link import CollectorClient
+        from gnome_wardrive.log import get_logger
     except ImportError:
         from wifi_scanner import WiFiScanner
         from location_service import LocationService
         from data_manager import DataManager
+        from session_store import SessionStore, default_database_path
+        from data_manager import ExportCancelled
+        from classifier import security_category
+        from network_stats import format_summary
+        from metrics import metrics
+        from metrics_reporter import MetricsReporter
+        from collector_link import CollectorClient
+        from log import get_logger
 
+logger = get_logger('window')
+
+class NetworkItem(GObject.Object):
+    """List model item holding the display state of one BSSID"""
+    
+    __gtype_name__ = 'WardriveNetworkItem'
+    
+    title = GObject.Property(type=str, default='')
+    subtitle = GObject.Property(type=str, default='')
+    icon_name = GObject.Property(type=str, default='')
+    signal_icon_name = GObject.Property(type=str, default='')
+    
+    def __init__(self, bssid):
+        super().__init__()
+        self.bssid = bssid
+        
+    def update(self, network_data):
+        """Update display properties in place, notifying only on changes"""
+        ssid = network_data.get('ssid', 'Hidden Network')
+        signal = network_data.get('signal_strength', 0)
+        security = network_data.get('security', 'Unknown')
+        
+        # Create mobile-friendly subtitle
+        subtitle = f"{self.bssid[-8:]} • {signal}% • {security}"
+        
+        # Set network type icon
+        if security_category(security) == 'open':
+            icon_name = 'network-wireless-symbolic'
+        else:
+            icon_name = 'network-wireless-encrypted-symbolic'
+            
+        # Signal strength indicator
+        if signal >= 70:
+            signal_icon_name = 'network-wireless-signal-excellent-symbolic'
+        elif signal >= 50:
+            signal_icon_name = 'network-wireless-signal-good-symbolic'
+        elif signal >= 30:
+            signal_icon_name = 'network-wireless-signal-ok-symbolic'
+        else:
+            signal_icon_name = 'network-wireless-signal-weak-symbolic'
+            
+        # Setting a GObject property always notifies, so skip unchanged values
+        if self.title != ssid:
+            self.title = ssid
+        if self.subtitle != subtitle:
+            self.subtitle = subtitle
+        if self.icon_name != icon_name:
+            self.icon_name = icon_name
+        if self.signal_icon_name != signal_icon_name:
+            self.signal_icon_name = signal_icon_name
+            
 @Gtk.Template(resource_path='/com/andrewstclair/Wardrive/ui/window_mobile.ui')
 class WardriveWindow(Adw.ApplicationWindow):
     """Main application window"""
@@ -30,21 +106,58 @@ class WardriveWindow(Adw.ApplicationWindow):
     
     # Template children - these will be populated from the UI file
     header_bar = Gtk.Template.Child()
-    networks_listbox = Gtk.Template.Child()
+    networks_listview = Gtk.Template.Child()
+    networks_scrolled_window = Gtk.Template.Child()
     scan_button = Gtk.Template.Child()
     export_button = Gtk.Template.Child()
     networks_count_label = Gtk.Template.Child()
+    networks_summary_row = Gtk.Template.Child()
     empty_networks_row = Gtk.Template.Child()
     devices_count_label = Gtk.Template.Child()
     location_label = Gtk.Template.Child()
+    toast_overlay = Gtk.Template.Child()
+    export_progress_bar = Gtk.Template.Child()
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         
-        # Initialize services
-        self.wifi_scanner = WiFiScanner()
-        self.location_service = LocationService()
-        self.data_manager = DataManager()
+        # Initialize services, or use a collector process standing in for them
+        self.collector = CollectorClient.from_environment()
+        if self.collector:
+            self.wifi_scanner = self.collector
+            self.location_service = self.collector
+            # The collector owns the session store
+            self.data_manager = DataManager()
+            self.data_manager.clock = self.collector.clock
+        else:
+            self.wifi_scanner = WiFiScanner()
+            self.location_service = LocationService()
+            self.data_manager = DataManager(store=self.open_session_store())
+        
+        # One list item per BSSID, rendered by a recycling list view
+        self.network_items = {}
+        self.network_store = Gio.ListStore(item_type=NetworkItem)
+        
+        # Coalesced UI refresh: ingestion only marks state dirty, the
+        # widgets are updated at most once per frame (or per refresh interval)
+        self.pending_networks = {}
+        self.pending_location_text = None
+        self.networks_count_dirty = False
+        self.refresh_source_id = None
+        self.refresh_tick_id = None
+        self.ui_refresh_rate = 0  # Hz, 0 means once per frame
+        self.setup_power_monitor()
+        
+        # Background export state
+        self.export_cancel_event = None
+        
+        # Optional hot-path metrics, enabled through GNOME_WARDRIVE_METRICS
+        self.data_manager.watch_queues()
+        metrics.watch('ui_pending_networks', lambda: len(self.pending_networks))
+        self.metrics_reporter = MetricsReporter.from_environment(
+            self.get_application().get_dbus_connection())
+        if self.metrics_reporter:
+            self.metrics_reporter.start()
         
         # Connect signals
         self.setup_signals()
@@ -58,6 +171,27 @@ class WardriveWindow(Adw.ApplicationWindow):
         # Show scanning mode info
         self.show_scanning_info()
         
+        # Restore the networks of an interrupted session
+        self.restore_session()
+        
+    def open_session_store(self):
+        """Open the on-disk session database, or None if unavailable"""
+        try:
+            return SessionStore(default_database_path())
+        except Exception as e:
+            logger.warning("⚠️  Session storage not available, data will only be kept in memory: %s", e)
+            return None
+            
+    def restore_session(self):
+        """Resume the last unfinished session and show its networks"""
+        if not self.data_manager.open_session(resume=True):
+            return
+            
+        for network in self.data_manager.get_networks_list():
+            self.pending_networks[network['bssid']] = network
+        self.networks_count_dirty = True
+        self.queue_ui_refresh()
+        
     def setup_mobile_ui(self):
         """Configure mobile-specific UI elements"""
         # Track network count
@@ -101,24 +235,28 @@ class WardriveWindow(Adw.ApplicationWindow):
             self.update_devices_count()
         return False  # Don't repeat
         
+    def on_devices_changed(self, scanner):
+        """Handle WiFi adapters being plugged in or removed"""
+        self.update_devices_count()
+        
     def update_networks_count(self, count):
         """Update the networks count display"""
         self.network_count = count
         if count == 0:
             self.networks_count_label.set_text("No networks")
-            self.empty_networks_row.set_visible(True)
         elif count == 1:
             self.networks_count_label.set_text("1 network")
-            self.empty_networks_row.set_visible(False)
         else:
             self.networks_count_label.set_text(f"{count} networks")
-            self.empty_networks_row.set_visible(False)
+            
+        self.empty_networks_row.set_visible(count == 0)
+        self.networks_scrolled_window.set_visible(count > 0)
             
     def update_location_accuracy(self, status):
         """Update location accuracy display - now just logs the status"""
         # Location accuracy information no longer displayed in UI
         # This method is kept for compatibility but doesn't update UI elements
-        print(f"Location accuracy: {status}")
+        logger.debug("Location accuracy: %s", status)
             
     def update_devices_count(self):
         """Update WiFi devices count display"""
@@ -150,8 +288,16 @@ class WardriveWindow(Adw.ApplicationWindow):
         
         # Connect service signals
         self.wifi_scanner.connect('network-found', self.on_network_found)
+        self.wifi_scanner.connect('aps-expired', self.on_aps_expired)
+        self.wifi_scanner.connect('scan-tick', self.on_scan_tick)
         self.wifi_scanner.connect('scan-completed', self.on_scan_completed)
+        self.wifi_scanner.connect('scan-error', self.on_scan_error)
+        self.wifi_scanner.connect('devices-changed', self.on_devices_changed)
         self.location_service.connect('location-updated', self.on_location_updated)
+        if self.collector:
+            self.collector.connect('scan-started', self.on_scan_started)
+            self.collector.connect('network-restored', self.on_network_restored)
+        self.connect('close-request', self.on_close_request)
         
     def setup_ui(self):
         """Initialize UI state"""
@@ -159,6 +305,14 @@ class WardriveWindow(Adw.ApplicationWindow):
         self.export_button.set_sensitive(False)
         self.location_label.set_text('Unknown')
         
+        # Networks list
+        factory = Gtk.SignalListItemFactory()
+        factory.connect('setup', self.on_network_row_setup)
+        factory.connect('bind', self.on_network_row_bind)
+        factory.connect('unbind', self.on_network_row_unbind)
+        self.networks_listview.set_factory(factory)
+        self.networks_listview.set_model(Gtk.NoSelection(model=self.network_store))
+        
         # Start location service
         self.location_service.start()
         
@@ -166,36 +320,146 @@ class WardriveWindow(Adw.ApplicationWindow):
         """Handle scan button click"""
         if self.wifi_scanner.is_scanning:
             self.wifi_scanner.stop_scan()
-            self.set_scanning_active(False)
         else:
             self.wifi_scanner.start_scan()
-            self.set_scanning_active(True)
+        # A collector reports the change later, with scan-started or scan-completed
+        self.set_scanning_active(self.wifi_scanner.is_scanning)
             
     def on_export_clicked(self, button):
         """Handle export button click"""
-        self.show_export_dialog()
+        if self.export_cancel_event:
+            # The button cancels the export that is running
+            self.export_cancel_event.set()
+        else:
+            self.show_export_dialog()
         
     def on_network_found(self, scanner, network_data):
         """Handle new network found"""
-        # Add network to the list
-        self.add_network_to_list(network_data)
-        
         # Save to data manager
         self.data_manager.add_network(network_data)
         
-        # Update mobile UI
-        network_count = self.data_manager.get_network_count()
-        self.update_networks_count(network_count)
+        # Defer the list and count update to the next UI refresh
+        bssid = network_data.get('bssid')
+        if bssid:
+            self.pending_networks[bssid] = network_data
+        self.networks_count_dirty = True
+        self.queue_ui_refresh()
+        
+    def on_network_restored(self, collector, network):
+        """Show a network the collector found before the window connected"""
+        self.data_manager.restore_network(network)
+        self.pending_networks[network['bssid']] = network
+        self.networks_count_dirty = True
+        self.queue_ui_refresh()
+        
+    def setup_power_monitor(self):
+        """Lower the UI refresh rate while power saving is enabled"""
+        try:
+            self.power_monitor = Gio.PowerProfileMonitor.dup_default()
+        except Exception as e:
+            logger.info("Power profile monitor not available: %s", e)
+            self.power_monitor = None
+            return
+            
+        self.power_monitor.connect('notify::power-saver-enabled', self._on_power_saver_changed)
+        self._on_power_saver_changed(self.power_monitor)
+        
+    def _on_power_saver_changed(self, monitor, *args):
+        """Switch between per-frame and 2 Hz UI refresh"""
+        self.set_ui_refresh_rate(2 if monitor.get_power_saver_enabled() else 0)
+        
+    def set_ui_refresh_rate(self, rate):
+        """Set the maximum UI refresh rate in Hz (0 refreshes once per frame)"""
+        self.ui_refresh_rate = rate
+        
+    def queue_ui_refresh(self):
+        """Schedule a single UI refresh if one is not already pending"""
+        if self.refresh_source_id or self.refresh_tick_id:
+            return
+            
+        if self.ui_refresh_rate > 0:
+            interval = int(1000 / self.ui_refresh_rate)
+            self.refresh_source_id = GLib.timeout_add(interval, self._on_refresh_timeout)
+        else:
+            self.refresh_tick_id = self.add_tick_callback(self._on_refresh_tick)
+            
+    def _on_refresh_timeout(self):
+        """Apply pending UI state from the rate-limited timer"""
+        self.refresh_source_id = None
+        self.apply_ui_refresh()
+        return False  # Don't repeat
         
-        if network_count > 0:
-            self.export_button.set_sensitive(True)
+    def _on_refresh_tick(self, widget, frame_clock):
+        """Apply pending UI state from the frame clock"""
+        self.refresh_tick_id = None
+        self.apply_ui_refresh()
+        return GLib.SOURCE_REMOVE
+        
+    def apply_ui_refresh(self):
+        """Apply all pending list, count and location changes at once"""
+        started = metrics.start()
+        if self.pending_networks:
+            pending = self.pending_networks
+            self.pending_networks = {}
+            added = []
+            for network_data in pending.values():
+                self.add_network_to_list(network_data, added)
+            if added:
+                # One splice notifies the list view once for all new rows
+                self.network_store.splice(self.network_store.get_n_items(), 0, added)
+                
+        if self.networks_count_dirty:
+            self.networks_count_dirty = False
+            network_count = self.data_manager.get_network_count()
+            self.update_networks_count(network_count)
+            self.export_button.set_sensitive(network_count > 0)
+            if network_count:
+                self.networks_summary_row.set_subtitle(
+                    format_summary(self.data_manager.get_statistics()))
+            else:
+                self.networks_summary_row.set_subtitle('')
+            
+        if self.pending_location_text is not None:
+            self.location_label.set_text(self.pending_location_text)
+            self.pending_location_text = None
+        metrics.stop('ui_refresh', started)
             
+    def on_scan_tick(self, scanner):
+        """Persist everything collected during this scan tick"""
+        self.data_manager.flush()
+        
+    def on_close_request(self, window):
+        """Finish the session cleanly when the window is closed"""
+        if self.collector:
+            # The collector keeps collecting without the window
+            self.collector.stop()
+        elif self.wifi_scanner.is_scanning:
+            self.wifi_scanner.stop_scan()
+        self.data_manager.close()
+        if self.metrics_reporter:
+            self.metrics_reporter.stop()
+        return False
+        
+    def on_aps_expired(self, scanner, expired):
+        """Handle networks that are no longer visible"""
+        self.data_manager.expire_networks(expired)
+        
+    def on_scan_started(self, collector):
+        """Show that the collector process is scanning"""
+        self.set_scanning_active(True)
+        
     def on_scan_completed(self, scanner):
         """Handle scan completion"""
         self.set_scanning_active(False)
         network_count = self.data_manager.get_network_count()
         self.update_networks_count(network_count)
         
+    def on_scan_error(self, scanner, message):
+        """Report why scanning could not start or stopped"""
+        logger.error("❌ Scan error: %s", message)
+        self.toast_overlay.add_toast(Adw.Toast(title=message))
+        self.set_scanning_active(self.wifi_scanner.is_scanning)
+        
     def on_location_updated(self, service, latitude, longitude, accuracy):
         """Handle location update"""
         # Update location display with lat, long, and accuracy
@@ -204,7 +468,8 @@ class WardriveWindow(Adw.ApplicationWindow):
         else:
             location_text = f"{latitude:.4f}, {longitude:.4f}"
         
-        self.location_label.set_text(location_text)
+        self.pending_location_text = location_text
+        self.queue_ui_refresh()
         
         # Update mobile accuracy display
         if accuracy == 0:
@@ -216,44 +481,57 @@ class WardriveWindow(Adw.ApplicationWindow):
         self.update_location_accuracy(accuracy_text)
         
         self.data_manager.update_location(latitude, longitude, accuracy)
+        self.wifi_scanner.update_location(latitude, longitude)
         
-    def add_network_to_list(self, network_data):
-        """Add a network to the networks list"""
-        row = Adw.ActionRow()
-        
-        # Set network name
-        ssid = network_data.get('ssid', 'Hidden Network')
-        row.set_title(ssid)
+        # Without scan ticks to batch on, persist the fix right away
+        if not self.wifi_scanner.is_scanning:
+            self.data_manager.flush()
         
-        # Create mobile-friendly subtitle
-        bssid = network_data.get('bssid', 'Unknown')
-        signal = network_data.get('signal_strength', 0)
-        security = network_data.get('security', 'Unknown')
+    def add_network_to_list(self, network_data, added):
+        """Update a network's row, or collect a new item for it in added"""
+        bssid = network_data.get('bssid')
+        if not bssid:
+            return
+            
+        item = self.network_items.get(bssid)
+        if item is None:
+            item = NetworkItem(bssid)
+            self.network_items[bssid] = item
+            added.append(item)
+            
+        item.update(network_data)
         
-        subtitle = f"{bssid[-8:]} • {signal}% • {security}"
-        row.set_subtitle(subtitle)
+    def on_network_row_setup(self, factory, list_item):
+        """Build a reusable row widget for the networks list"""
+        row = Adw.ActionRow()
         
-        # Set network type icon
-        if security == 'Open':
-            row.set_icon_name('network-wireless-symbolic')
-        else:
-            row.set_icon_name('network-wireless-encrypted-symbolic')
-            
-        # Add signal strength indicator
         signal_icon = Gtk.Image()
-        if signal >= 70:
-            signal_icon.set_from_icon_name('network-wireless-signal-excellent-symbolic')
-        elif signal >= 50:
-            signal_icon.set_from_icon_name('network-wireless-signal-good-symbolic')
-        elif signal >= 30:
-            signal_icon.set_from_icon_name('network-wireless-signal-ok-symbolic')
-        else:
-            signal_icon.set_from_icon_name('network-wireless-signal-weak-symbolic')
-            
         signal_icon.add_css_class('dim-label')
         row.add_suffix(signal_icon)
-            
-        self.networks_listbox.append(row)
+        
+        row.signal_icon = signal_icon
+        row.bindings = []
+        list_item.set_child(row)
+        
+    def on_network_row_bind(self, factory, list_item):
+        """Attach a recycled row to the network item it now displays"""
+        item = list_item.get_item()
+        row = list_item.get_child()
+        flags = GObject.BindingFlags.SYNC_CREATE
+        
+        row.bindings = [
+            item.bind_property('title', row, 'title', flags),
+            item.bind_property('subtitle', row, 'subtitle', flags),
+            item.bind_property('icon-name', row, 'icon-name', flags),
+            item.bind_property('signal-icon-name', row.signal_icon, 'icon-name', flags),
+        ]
+        
+    def on_network_row_unbind(self, factory, list_item):
+        """Detach a row from its network item before it is recycled"""
+        row = list_item.get_child()
+        for binding in row.bindings:
+            binding.unbind()
+        row.bindings = []
         
     def show_export_dialog(self):
         """Show export format selection dialog"""
@@ -266,6 +544,7 @@ class WardriveWindow(Adw.ApplicationWindow):
         dialog.add_response('cancel', 'Cancel')
         dialog.add_response('csv', 'CSV')
         dialog.add_response('kml', 'KML')
+        dialog.add_response('kmz', 'KMZ')
         dialog.add_response('gpx', 'GPX')
         
         dialog.set_response_appearance('csv', Adw.ResponseAppearance.SUGGESTED)
@@ -275,7 +554,7 @@ class WardriveWindow(Adw.ApplicationWindow):
         
     def on_export_dialog_response(self, dialog, response):
         """Handle export dialog response"""
-        if response in ['csv', 'kml', 'gpx']:
+        if response in ['csv', 'kml', 'kmz', 'gpx']:
             self.export_data(response)
             
     def export_data(self, format_type):
@@ -289,6 +568,8 @@ class WardriveWindow(Adw.ApplicationWindow):
             file_dialog.set_initial_name('wardrive_data.csv')
         elif format_type == 'kml':
             file_dialog.set_initial_name('wardrive_data.kml')
+        elif format_type == 'kmz':
+            file_dialog.set_initial_name('wardrive_data.kmz')
         elif format_type == 'gpx':
             file_dialog.set_initial_name('wardrive_data.gpx')
             
@@ -298,18 +579,67 @@ class WardriveWindow(Adw.ApplicationWindow):
         """Handle export file selection"""
         try:
             file = dialog.save_finish(result)
-            if file:
-                file_path = file.get_path()
-                success = self.data_manager.export_data(file_path, format_type)
-                
-                if success:
-                    toast = Adw.Toast(title=f'Data exported to {file_path}')
-                else:
-                    toast = Adw.Toast(title='Export failed')
-                    
-                # Add toast to window (requires a ToastOverlay in the UI)
-                # self.toast_overlay.add_toast(toast)
-        except Exception as e:
-            print(f"Export error: {e}")
+        except GLib.Error as e:
+            if not e.matches(Gtk.DialogError.quark(), Gtk.DialogError.DISMISSED):
+                logger.error("Export error: %s", e)
+                self.toast_overlay.add_toast(Adw.Toast(title='Export failed'))
+            return
+            
+        if file:
+            self.start_export(file.get_path(), format_type)
+            
+    def start_export(self, file_path, format_type):
+        """Export a snapshot of the collected data from a worker thread"""
+        snapshot = self.data_manager.snapshot()
+        self.export_cancel_event = threading.Event()
+        
+        # Turn the export button into a cancel button while exporting
+        self.export_button.set_icon_name('process-stop-symbolic')
+        self.export_button.set_tooltip_text('Cancel Export')
+        self.export_progress_bar.set_fraction(0.0)
+        self.export_progress_bar.set_visible(True)
+        
+        thread = threading.Thread(
+            target=self._run_export,
+            args=(snapshot, file_path, format_type, self.export_cancel_event),
+            daemon=True,
+        )
+        thread.start()
+        
+    def _run_export(self, snapshot, file_path, format_type, cancel_event):
+        """Write the export file (runs in the worker thread)"""
+        def report_progress(fraction):
+            GLib.idle_add(self._on_export_progress, fraction)
+            
+        cancelled = False
+        try:
+            success = snapshot.export_data(
+                file_path, format_type, progress=report_progress, cancel_event=cancel_event)
+        except ExportCancelled:
+            success = False
+            cancelled = True
+            
+        GLib.idle_add(self._on_export_finished, snapshot, file_path, success, cancelled)
+        
+    def _on_export_progress(self, fraction):
+        """Show export progress (runs in the main loop)"""
+        if self.export_cancel_event:
+            self.export_progress_bar.set_fraction(fraction)
+        return False  # Don't repeat
+        
+    def _on_export_finished(self, snapshot, file_path, success, cancelled):
+        """Restore the export button and report the result (runs in the main loop)"""
+        self.data_manager.adopt_positions(snapshot)
+        self.export_cancel_event = None
+        self.export_button.set_icon_name('document-save-symbolic')
+        self.export_button.set_tooltip_text('Export Data')
+        self.export_progress_bar.set_visible(False)
+        
+        if cancelled:
+            toast = Adw.Toast(title='Export cancelled')
+        elif success:
+            toast = Adw.Toast(title=f'Data exported to {file_path}')
+        else:
             toast = Adw.Toast(title='Export failed')
-            # self.toast_overlay.add_toast(toast)
\ No newline at end of file
+        self.toast_overlay.add_toast(toast)
+        return False  # Don't repeat
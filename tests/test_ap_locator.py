@@ -0,0 +1,132 @@
+"""
+Tests for the AP position estimation
+"""
+
+import math
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import ap_locator
+from ap_locator import APLocator, METRES_PER_DEGREE, strength_to_dbm
+from observations import ObservationLog
+
+AP = (52.0, 13.0)
+
+def strength_at(locator, distance):
+    """The signal quality the path loss model predicts at a distance"""
+    dbm = locator.reference_dbm - 10 * locator.path_loss_exponent * math.log10(distance)
+    return (dbm + 100.0) / 0.6
+
+def offset(position, east, north):
+    """Move a position by metres"""
+    latitude, longitude = position
+    return (latitude + north / METRES_PER_DEGREE,
+            longitude + east / (METRES_PER_DEGREE * math.cos(math.radians(latitude))))
+
+def error(position, expected):
+    """Distance in metres between two nearby positions"""
+    north = (position[0] - expected[0]) * METRES_PER_DEGREE
+    east = (position[1] - expected[1]) * METRES_PER_DEGREE * math.cos(math.radians(expected[0]))
+    return math.hypot(east, north)
+
+class TestAPLocator(unittest.TestCase):
+
+    def setUp(self):
+        self.locator = APLocator()
+        self.observations = {}
+
+    def sight(self, bssid, position, strength, timestamp=0.0):
+        log = self.observations.setdefault(bssid, ObservationLog())
+        log.append(timestamp, position[0], position[1], 5.0, int(round(strength)), 'wlan0')
+        self.locator.add_sighting(bssid, position[0], position[1], int(round(strength)))
+
+    def drive_past(self, bssid, ap, generator):
+        """Sight an AP from a road passing 30 m south of it, and from a side street"""
+        for east in range(-150, 151, 10):
+            position = offset(ap, east, -30.0)
+            distance = math.hypot(east, 30.0)
+            self.sight(bssid, position, strength_at(self.locator, distance) + generator.gauss(0, 1))
+        for north in range(-20, 80, 10):
+            position = offset(ap, 60.0, north)
+            distance = math.hypot(60.0, north)
+            self.sight(bssid, position, strength_at(self.locator, distance) + generator.gauss(0, 1))
+
+    def test_strength_to_dbm(self):
+        self.assertEqual(strength_to_dbm(0), -100.0)
+        self.assertEqual(strength_to_dbm(100), -40.0)
+        self.assertEqual(strength_to_dbm(150), -40.0)
+
+    @unittest.skipIf(ap_locator.np is None, "needs NumPy")
+    def test_refine_finds_a_known_ap(self):
+        generator = random.Random(6)
+        aps = {f'AP{number}': offset(AP, 500.0 * number, 200.0 * number) for number in range(5)}
+        for bssid, ap in aps.items():
+            self.drive_past(bssid, ap, generator)
+
+        centroids = {bssid: self.locator.estimate(bssid) for bssid in aps}
+        self.assertEqual(self.locator.refine(self.observations), len(aps))
+        self.assertEqual(self.locator.dirty, set())
+        for bssid, ap in aps.items():
+            refined = self.locator.estimate(bssid)
+            # The centroid is pulled towards the road; trilateration isn't
+            self.assertLess(error(refined, ap), 10.0, bssid)
+            self.assertLess(error(refined, ap), error(centroids[bssid], ap), bssid)
+
+    def test_centroid_is_weighted_by_signal(self):
+        west = offset(AP, -50.0, 0.0)
+        east = offset(AP, 50.0, 0.0)
+        self.sight('AP', west, 80)
+        self.sight('AP', east, 20)
+        centroid = self.locator.centroid('AP')
+        self.assertLess(error(centroid, west), error(centroid, east))
+        self.assertEqual(self.locator.estimate('AP'), centroid)
+
+    def test_too_few_sightings_keep_the_centroid(self):
+        self.sight('AP', offset(AP, -20.0, 0.0), 60)
+        self.sight('AP', offset(AP, 20.0, 0.0), 60)
+        self.assertEqual(self.locator.refine(self.observations), 0)
+        self.assertNotIn('AP', self.locator.positions)
+        self.assertLess(error(self.locator.estimate('AP'), AP), 1e-6)
+
+    def test_sightings_without_position_are_ignored(self):
+        self.locator.add_sighting('AP', None, None, 60)
+        self.assertIsNone(self.locator.estimate('AP'))
+
+    @unittest.skipIf(ap_locator.np is None, "needs NumPy")
+    def test_new_sightings_fall_back_to_the_centroid_until_refined(self):
+        self.drive_past('AP', AP, random.Random(1))
+        self.locator.refine(self.observations)
+        refined = self.locator.estimate('AP')
+        self.sight('AP', offset(AP, 0.0, 100.0), strength_at(self.locator, 100.0))
+        self.assertEqual(self.locator.estimate('AP'), self.locator.centroid('AP'))
+        self.locator.refine(self.observations)
+        self.assertNotEqual(self.locator.estimate('AP'), self.locator.centroid('AP'))
+        self.assertLess(error(self.locator.estimate('AP'), refined), 10.0)
+
+    def test_without_numpy(self):
+        self.drive_past('AP', AP, random.Random(2))
+        numpy = ap_locator.np
+        ap_locator.np = None
+        try:
+            self.assertEqual(self.locator.refine(self.observations), 0)
+        finally:
+            ap_locator.np = numpy
+        self.assertEqual(self.locator.estimate('AP'), self.locator.centroid('AP'))
+
+    @unittest.skipIf(ap_locator.np is None, "needs NumPy")
+    def test_copy_refines_what_it_gathered(self):
+        self.drive_past('AP', AP, random.Random(3))
+        copy = self.locator.copy(self.observations)
+        # Later sightings don't reach the copy
+        self.sight('AP', offset(AP, 0.0, 500.0), 90)
+        self.assertEqual(copy.refine({}), 1)
+        self.assertLess(error(copy.estimate('AP'), AP), 10.0)
+        self.assertIn('AP', self.locator.dirty)
+        self.assertNotIn('AP', self.locator.positions)
+
+if __name__ == '__main__':
+    unittest.main()
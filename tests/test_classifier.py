@@ -0,0 +1,78 @@
+"""
+Tests for the channel and security lookup tables
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from classifier import (
+    PRIVACY, KEY_MGMT_PSK, KEY_MGMT_802_1X, KEY_MGMT_SAE, KEY_MGMT_OWE, KEY_MGMT_OWE_TM,
+    KEY_MGMT_SUITE_B, SECURITY_CATEGORIES, frequency_to_channel, classify_security,
+    security_category)
+
+class TestChannels(unittest.TestCase):
+
+    def assert_channels(self, expected):
+        for frequency, channel in expected.items():
+            self.assertEqual(frequency_to_channel(frequency), channel, frequency)
+
+    def test_2_4_ghz(self):
+        self.assert_channels({2412: 1, 2437: 6, 2462: 11, 2472: 13, 2484: 14})
+
+    def test_4_9_ghz(self):
+        self.assert_channels({4915: 183, 4940: 188, 4980: 196})
+
+    def test_5_ghz(self):
+        self.assert_channels({5160: 32, 5180: 36, 5500: 100, 5825: 165, 5885: 177})
+
+    def test_6_ghz(self):
+        # Channel 2 sits below channel 1, and 20 MHz channels go up in fours to 233
+        self.assert_channels({5935: 2, 5955: 1, 5975: 5, 6115: 33, 7115: 233})
+
+    def test_unknown_frequencies(self):
+        self.assert_channels({0: 0, 2400: 0, 2477: 0, 4910: 0, 5950: 0, 5960: 0, 7120: 0})
+
+class TestSecurity(unittest.TestCase):
+
+    def test_labels(self):
+        cases = [
+            ((0, 0, 0), 'Open'),
+            ((PRIVACY, 0, 0), 'WEP'),
+            ((PRIVACY, KEY_MGMT_PSK, 0), 'WPA'),
+            ((PRIVACY, KEY_MGMT_802_1X, 0), 'WPA-Enterprise'),
+            ((PRIVACY, 0, KEY_MGMT_PSK), 'WPA2'),
+            ((PRIVACY, KEY_MGMT_PSK, KEY_MGMT_PSK), 'WPA/WPA2'),
+            ((PRIVACY, 0, KEY_MGMT_802_1X), 'WPA2-Enterprise'),
+            ((PRIVACY, 0, KEY_MGMT_SAE), 'WPA3-SAE'),
+            ((PRIVACY, 0, KEY_MGMT_SAE | KEY_MGMT_PSK), 'WPA2/WPA3-Transition'),
+            ((PRIVACY, 0, KEY_MGMT_802_1X | KEY_MGMT_SUITE_B), 'WPA3-Enterprise'),
+            ((PRIVACY, 0, KEY_MGMT_OWE), 'OWE'),
+            ((0, 0, KEY_MGMT_OWE_TM), 'OWE-Transition'),
+        ]
+        for flags, label in cases:
+            self.assertEqual(classify_security(*flags), label, flags)
+            # Answered from the cache the second time
+            self.assertEqual(classify_security(*flags), label, flags)
+
+    def test_every_label_has_a_category(self):
+        for flags in range(2):
+            for wpa_flags in (0, KEY_MGMT_PSK, KEY_MGMT_802_1X):
+                for rsn_flags in (0, KEY_MGMT_PSK, KEY_MGMT_SAE, KEY_MGMT_OWE, KEY_MGMT_OWE_TM,
+                                  KEY_MGMT_SUITE_B, KEY_MGMT_SAE | KEY_MGMT_PSK):
+                    label = classify_security(flags * PRIVACY, wpa_flags, rsn_flags)
+                    self.assertIn(label, SECURITY_CATEGORIES)
+
+    def test_categories(self):
+        self.assertEqual(security_category('Open'), 'open')
+        self.assertEqual(security_category('OWE-Transition'), 'open')
+        self.assertEqual(security_category('WEP'), 'wep')
+        self.assertEqual(security_category('OWE'), 'wpa')
+        self.assertEqual(security_category('WPA3-Enterprise'), 'wpa')
+        self.assertEqual(security_category('Unknown'), 'unknown')
+        self.assertEqual(security_category(None), 'unknown')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Tests for the collector socket server
+"""
+
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    from gi.repository import GLib
+except ImportError:
+    GLib = None
+
+from collector_protocol import SIGHTING, KIND_SNAPSHOT, KIND_TICK, split_frames
+from data_manager import DataManager
+
+class FakeService:
+    """Scanner and location service that never emit anything"""
+    is_scanning = False
+    wifi_devices = []
+
+    def connect(self, *args):
+        pass
+
+@unittest.skipIf(GLib is None, "needs PyGObject")
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        from collector_link import CollectorServer, MAX_CLIENT_BACKLOG
+        self.directory = tempfile.mkdtemp()
+        self.data_manager = DataManager()
+        # A session larger than a client may have queued at once
+        self.count = MAX_CLIENT_BACKLOG // SIGHTING.size + 5000
+        for number in range(self.count):
+            bssid = 'AA:BB:CC:%02X:%02X:%02X' % (number >> 16, number >> 8 & 0xff, number & 0xff)
+            self.data_manager.networks[bssid] = {
+                'ssid': f'net-{number}', 'bssid': bssid, 'signal_strength': 50,
+                'frequency': 2412, 'channel': 1, 'security': 'WPA2',
+                'device_interface': 'wlan0', 'timestamp': 1000.0, 'last_seen': 1000.0,
+            }
+        self.server = CollectorServer(os.path.join(self.directory, 'collector.sock'),
+                                      FakeService(), FakeService(), self.data_manager)
+
+    def tearDown(self):
+        self.server.close()
+        shutil.rmtree(self.directory)
+
+    def test_large_snapshot_keeps_the_client(self):
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(self.server.path)
+        client.setblocking(False)
+        context = GLib.MainContext.default()
+        while not self.server.clients:
+            context.iteration(True)
+        # Not reading yet: accepting must not queue more than the cap
+        while context.pending():
+            context.iteration(False)
+        self.assertEqual(len(self.server.clients), 1)
+
+        restored = 0
+        buffer = bytearray()
+        kinds = []
+        deadline = time.monotonic() + 60
+        while KIND_TICK not in kinds and time.monotonic() < deadline:
+            context.iteration(False)
+            try:
+                buffer += client.recv(65536)
+            except BlockingIOError:
+                continue
+            for kind, records in split_frames(buffer):
+                kinds.append(kind)
+                if kind == KIND_SNAPSHOT:
+                    restored += len(records)
+        client.close()
+
+        self.assertEqual(len(self.server.clients), 1)
+        self.assertEqual(restored, self.count)
+        self.assertEqual(kinds[-1], KIND_TICK)
+
+if __name__ == '__main__':
+    unittest.main()
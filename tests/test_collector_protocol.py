@@ -0,0 +1,171 @@
+"""
+Tests for the collector protocol frames
+"""
+
+import math
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from collector_protocol import (
+    HEADER, MAGIC, PROTOCOL_VERSION, MAX_BATCH, SIGHTING, FIX, SECURITY_LABELS, KIND_SIGHTINGS, KIND_FIXES, KIND_TICK,
+    KIND_SNAPSHOT, pack_frame, pack_records, pack_snapshot, pack_sighting, unpack_sighting, split_frames)
+
+def sighting(number, **fields):
+    """A network-found dict as emitted by the scanner"""
+    network_data = {
+        'ssid': f'net-{number}',
+        'bssid': 'AA:BB:CC:%02X:%02X:%02X' % (number >> 16 & 0xff, number >> 8 & 0xff, number & 0xff),
+        'signal_strength': 40 + number % 50,
+        'frequency': 5180,
+        'channel': 36,
+        'security': 'WPA2',
+        'device_interface': 'wlan1',
+        'timestamp': 1700000000.25 + number,
+        'last_seen': 1700000000.25 + number,
+    }
+    network_data.update(fields)
+    return network_data
+
+class TestSightings(unittest.TestCase):
+
+    def round_trip(self, network_data):
+        return unpack_sighting(SIGHTING.unpack(pack_sighting(network_data)))
+
+    def test_round_trip(self):
+        network_data = sighting(7, latitude=52.5, longitude=13.25, accuracy=8.0)
+        self.assertEqual(self.round_trip(network_data), network_data)
+
+    def test_without_position(self):
+        network_data = sighting(7)
+        unpacked = self.round_trip(network_data)
+        self.assertNotIn('latitude', unpacked)
+        self.assertEqual(unpacked, network_data)
+
+    def test_position_without_accuracy(self):
+        unpacked = self.round_trip(sighting(7, latitude=1.0, longitude=2.0, accuracy=None))
+        self.assertIsNone(unpacked['accuracy'])
+
+    def test_hidden_ssid(self):
+        network_data = sighting(7)
+        network_data['ssid'] = f"Hidden_{network_data['bssid']}"
+        self.assertEqual(self.round_trip(network_data)['ssid'], network_data['ssid'])
+
+    def test_every_security_label(self):
+        for label in SECURITY_LABELS:
+            self.assertEqual(self.round_trip(sighting(1, security=label))['security'], label)
+        self.assertEqual(self.round_trip(sighting(1, security='Something new'))['security'],
+                         'Unknown')
+
+    def test_long_and_unicode_ssids(self):
+        self.assertEqual(self.round_trip(sighting(1, ssid='Café ☕'))['ssid'], 'Café ☕')
+        self.assertEqual(self.round_trip(sighting(1, ssid='x' * 40))['ssid'], 'x' * 32)
+
+    def test_signal_is_clamped(self):
+        self.assertEqual(self.round_trip(sighting(1, signal_strength=300))['signal_strength'], 255)
+        self.assertEqual(self.round_trip(sighting(1, signal_strength=-5))['signal_strength'], 0)
+
+class TestFrames(unittest.TestCase):
+
+    def setUp(self):
+        self.sightings = [sighting(number) for number in range(2500)]
+        self.stream = (
+            pack_records(KIND_SNAPSHOT, [pack_sighting(sighting(9999))])
+            + pack_records(KIND_SIGHTINGS, [pack_sighting(network) for network in self.sightings])
+            + pack_frame(KIND_FIXES, FIX.pack(1.0, 2.0, 3.0, 4.0), 1)
+            + pack_frame(KIND_TICK))
+
+    def decode(self, frames):
+        """Turn parsed frames back into (kind, [record]) with unpacked sightings"""
+        return [(kind, [unpack_sighting(fields) if kind in (KIND_SIGHTINGS, KIND_SNAPSHOT)
+                        else fields for fields in records])
+                for kind, records in frames]
+
+    def test_batches_are_split(self):
+        frames = split_frames(bytearray(self.stream))
+        kinds = [kind for kind, _ in frames]
+        self.assertEqual(kinds, [KIND_SNAPSHOT] + [KIND_SIGHTINGS] * 3 + [KIND_FIXES, KIND_TICK])
+        self.assertEqual([len(records) for _, records in frames[1:4]],
+                         [MAX_BATCH, MAX_BATCH, 2500 - 2 * MAX_BATCH])
+
+    def test_round_trip(self):
+        buffer = bytearray(self.stream)
+        decoded = self.decode(split_frames(buffer))
+        self.assertEqual(buffer, bytearray())
+        self.assertEqual(decoded[0], (KIND_SNAPSHOT, [sighting(9999)]))
+        received = [network for kind, records in decoded if kind == KIND_SIGHTINGS
+                    for network in records]
+        self.assertEqual(received, self.sightings)
+        self.assertEqual(decoded[-2], (KIND_FIXES, [(1.0, 2.0, 3.0, 4.0)]))
+        self.assertEqual(decoded[-1], (KIND_TICK, []))
+
+    def test_partial_frames(self):
+        # Feed the stream in awkward pieces, as a socket might deliver it
+        expected = self.decode(split_frames(bytearray(self.stream)))
+        for piece in (13, HEADER.size, SIGHTING.size + 1, 4096):
+            buffer = bytearray()
+            frames = []
+            for start in range(0, len(self.stream), piece):
+                buffer += self.stream[start:start + piece]
+                frames += split_frames(buffer)
+            self.assertEqual(buffer, bytearray(), piece)
+            self.assertEqual(self.decode(frames), expected, piece)
+
+    def test_missing_accuracy(self):
+        buffer = bytearray(pack_frame(KIND_FIXES, FIX.pack(1.0, 2.0, 3.0, math.nan), 1))
+        [(kind, [fix])] = split_frames(buffer)
+        self.assertEqual(fix[:3], (1.0, 2.0, 3.0))
+        self.assertTrue(math.isnan(fix[3]))
+
+    def test_incomplete_frame_is_kept(self):
+        buffer = bytearray(pack_frame(KIND_TICK) + self.stream[:HEADER.size + 10])
+        self.assertEqual(split_frames(buffer), [(KIND_TICK, [])])
+        self.assertEqual(len(buffer), HEADER.size + 10)
+
+    def test_foreign_stream(self):
+        with self.assertRaises(ValueError):
+            split_frames(bytearray(b'GET / HTTP/1.1\r\n\r\n'))
+        with self.assertRaises(ValueError):
+            split_frames(bytearray(HEADER.pack(MAGIC, PROTOCOL_VERSION - 1, KIND_TICK, 0)))
+        with self.assertRaises(ValueError):
+            split_frames(bytearray(HEADER.pack(MAGIC, PROTOCOL_VERSION, 99, 1) + b'\0' * 16))
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_large_snapshot_is_streamed_in_bounded_frames(self):
+        # More than a client may have queued at once, as in a long session
+        count = 4 * 1024 * 1024 // SIGHTING.size + 5000
+        networks = [sighting(number) for number in range(count)]
+        frames = list(pack_snapshot(networks))
+        self.assertGreater(sum(len(frame) for frame in frames), 4 * 1024 * 1024)
+        self.assertLessEqual(max(len(frame) for frame in frames),
+                             HEADER.size + MAX_BATCH * SIGHTING.size)
+
+        received = []
+        buffer = bytearray()
+        for frame in frames:
+            buffer += frame
+            for kind, records in split_frames(buffer):
+                self.assertEqual(kind, KIND_SNAPSHOT)
+                received += [unpack_sighting(fields)['bssid'] for fields in records]
+        self.assertEqual(received, [network['bssid'] for network in networks])
+
+    def test_frames_are_packed_when_asked_for(self):
+        networks = [sighting(number) for number in range(MAX_BATCH + 1)]
+        frames = pack_snapshot(networks)
+        next(frames)
+        networks[-1]['signal_strength'] = 99
+        [(kind, [fields])] = split_frames(bytearray(next(frames)))
+        self.assertEqual(unpack_sighting(fields)['signal_strength'], 99)
+        self.assertIsNone(next(frames, None))
+
+    def test_unpackable_networks_are_skipped(self):
+        networks = [sighting(1), {'bssid': 'not a bssid', 'timestamp': 0.0}, {'ssid': 'x'}]
+        [(kind, records)] = split_frames(bytearray(b''.join(pack_snapshot(networks))))
+        self.assertEqual(len(records), 1)
+        self.assertEqual(list(pack_snapshot([])), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+Tests for sighting tagging and storage in the data manager
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from data_manager import DataManager, MAX_TAG_DELAY
+from session_store import SessionStore
+
+def sighting(bssid, timestamp, signal=60):
+    """A network-found dict as emitted by the scanner"""
+    return {
+        'ssid': f'net-{bssid[-2:]}',
+        'bssid': bssid,
+        'signal_strength': signal,
+        'frequency': 2412,
+        'channel': 1,
+        'security': 'WPA2',
+        'device_interface': 'wlan0',
+        'timestamp': timestamp,
+        'last_seen': timestamp,
+    }
+
+class ClockedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.data_manager = DataManager(store=self.make_store())
+        self.data_manager.clock = lambda: self.now
+        self.data_manager.open_session(resume=False)
+
+    def make_store(self):
+        return None
+
+    def fix(self, timestamp, latitude, longitude, accuracy=5.0):
+        self.now = timestamp
+        self.data_manager.update_location(latitude, longitude, accuracy)
+
+class TestDeferredTagging(ClockedTest):
+
+    def test_sighting_between_fixes_is_interpolated(self):
+        self.fix(1000.0, 50.0, 10.0)
+        self.data_manager.add_network(sighting('AA:00:00:00:00:01', 1002.5))
+        self.assertEqual(len(self.data_manager.deferred), 1)
+
+        self.fix(1005.0, 51.0, 11.0)
+        self.assertEqual(self.data_manager.deferred, [])
+        network = self.data_manager.networks['AA:00:00:00:00:01']
+        self.assertAlmostEqual(network['latitude'], 50.5)
+        self.assertAlmostEqual(network['longitude'], 10.5)
+        self.assertEqual(network['accuracy'], 5.0)
+
+    def test_sighting_covered_by_a_fix_is_tagged_at_once(self):
+        self.fix(1000.0, 50.0, 10.0)
+        self.fix(1010.0, 51.0, 11.0)
+        self.data_manager.add_network(sighting('AA:00:00:00:00:01', 1005.0))
+        self.assertEqual(self.data_manager.deferred, [])
+        self.assertAlmostEqual(self.data_manager.networks['AA:00:00:00:00:01']['latitude'], 50.5)
+
+    def test_sightings_stay_in_time_order(self):
+        self.fix(1000.0, 50.0, 10.0)
+        self.data_manager.add_network(sighting('AA:00:00:00:00:01', 1002.0))
+        # Covered by the last fix, but queued behind an earlier deferred sighting
+        self.data_manager.add_network(sighting('AA:00:00:00:00:02', 1003.0))
+        self.assertEqual(len(self.data_manager.deferred), 2)
+        self.fix(1004.0, 50.4, 10.4)
+        self.assertAlmostEqual(self.data_manager.networks['AA:00:00:00:00:02']['latitude'], 50.3)
+
+    def test_stale_sighting_falls_back_to_last_fix(self):
+        self.fix(1000.0, 50.0, 10.0)
+        self.data_manager.add_network(sighting('AA:00:00:00:00:01', 1001.0))
+        self.now = 1001.0 + MAX_TAG_DELAY + 1
+        self.data_manager.flush()
+        self.assertEqual(self.data_manager.deferred, [])
+        network = self.data_manager.networks['AA:00:00:00:00:01']
+        self.assertEqual((network['latitude'], network['longitude']), (50.0, 10.0))
+
+    def test_sighting_without_any_fix(self):
+        self.data_manager.add_network(sighting('AA:00:00:00:00:01', 1001.0))
+        self.data_manager.tag_deferred(final=True)
+        self.assertNotIn('latitude', self.data_manager.networks['AA:00:00:00:00:01'])
+        self.assertEqual(len(self.data_manager.observations['AA:00:00:00:00:01']), 1)
+
+class TestRestoredNetworks(ClockedTest):
+
+    def test_restoring_records_no_sighting(self):
+        self.fix(1000.0, 50.0, 10.0)
+        self.fix(1010.0, 50.0, 10.0)
+        self.data_manager.add_network(sighting('AA:00:00:00:00:01', 1005.0))
+
+        # A reconnecting collector sends its summary of the same network
+        summary = dict(sighting('AA:00:00:00:00:01', 1001.0, signal=90), latitude=49.0, longitude=9.0)
+        self.data_manager.restore_network(summary)
+        self.data_manager.restore_network(sighting('AA:00:00:00:00:02', 1002.0))
+
+        self.assertEqual(len(self.data_manager.observations['AA:00:00:00:00:01']), 1)
+        self.assertNotIn('AA:00:00:00:00:02', self.data_manager.observations)
+        network = self.data_manager.networks['AA:00:00:00:00:01']
+        self.assertEqual((network['signal_strength'], network['last_seen']), (90, 1005.0))
+        self.assertEqual(self.data_manager.get_statistics()['total_networks'], 2)
+        self.assertEqual(self.data_manager.get_statistics()['new_per_minute'], 1.0)
+
+class TestExportSnapshot(ClockedTest):
+
+    def setUp(self):
+        super().setUp()
+        # Drive past two access points, sighting each from several places
+        for step in range(10):
+            self.fix(1000.0 + step, 50.0, 10.0 + step * 0.0001)
+            for number in (1, 2):
+                self.data_manager.add_network(
+                    sighting(f'AA:00:00:00:00:0{number}', 1000.0 + step, signal=40 + step))
+
+    def test_snapshot_leaves_refining_to_the_export(self):
+        snapshot = self.data_manager.snapshot()
+        self.assertEqual(self.data_manager.locator.dirty, {'AA:00:00:00:00:01', 'AA:00:00:00:00:02'})
+        self.assertEqual(self.data_manager.locator.positions, {})
+        self.assertEqual(snapshot.observations, {})
+
+        # Sightings after the snapshot don't reach it
+        self.data_manager.add_network(sighting('AA:00:00:00:00:01', 1010.0))
+        self.fix(1011.0, 50.0, 10.0011)
+        self.assertEqual(snapshot.locator.sums['AA:00:00:00:00:01'][3], 10)
+        self.assertEqual(self.data_manager.locator.sums['AA:00:00:00:00:01'][3], 11)
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertTrue(snapshot.export_data(os.path.join(directory, 'export.csv'), 'csv'))
+        self.assertEqual(set(snapshot.locator.positions), {'AA:00:00:00:00:01', 'AA:00:00:00:00:02'})
+
+        # Only the AP not seen since the snapshot takes its refined position
+        self.data_manager.adopt_positions(snapshot)
+        self.assertEqual(set(self.data_manager.locator.positions), {'AA:00:00:00:00:02'})
+        self.assertEqual(self.data_manager.locator.dirty, {'AA:00:00:00:00:01'})
+        self.assertEqual(self.data_manager.index.get('AA:00:00:00:00:02'),
+                         snapshot.locator.positions['AA:00:00:00:00:02'])
+
+class TestDeferredStorage(ClockedTest):
+
+    def make_store(self):
+        return SessionStore(':memory:')
+
+    def stored_observations(self):
+        return [tuple(row) for row in self.data_manager.store.connection.execute(
+            'SELECT bssid, timestamp, latitude, longitude FROM observations ORDER BY timestamp')]
+
+    def test_waiting_sightings_are_stored_at_every_flush(self):
+        self.fix(1000.0, 50.0, 10.0)
+        self.data_manager.add_network(sighting('AA:00:00:00:00:01', 1002.0))
+        self.data_manager.flush()
+        self.assertEqual(self.stored_observations(),
+                         [('AA:00:00:00:00:01', 1002.0, None, None)])
+
+        # Flushing again doesn't store it twice
+        self.data_manager.add_network(sighting('AA:00:00:00:00:02', 1003.0))
+        self.data_manager.flush()
+        self.assertEqual(len(self.stored_observations()), 2)
+
+        # The fix tags them in memory and in the store
+        self.fix(1004.0, 50.4, 10.4)
+        self.data_manager.flush()
+        observations = self.stored_observations()
+        self.assertEqual([row[0] for row in observations],
+                         ['AA:00:00:00:00:01', 'AA:00:00:00:00:02'])
+        self.assertAlmostEqual(observations[0][2], 50.2)
+        self.assertAlmostEqual(observations[1][3], 10.3)
+
+    def test_tagged_and_untagged_sightings_mix(self):
+        self.fix(1000.0, 50.0, 10.0)
+        self.data_manager.add_network(sighting('AA:00:00:00:00:01', 1001.0))
+        self.data_manager.flush()
+        self.data_manager.add_network(sighting('AA:00:00:00:00:02', 1002.0))
+        self.fix(1002.0, 50.2, 10.2)
+        self.data_manager.flush()
+
+        observations = self.stored_observations()
+        self.assertEqual(len(observations), 2)
+        self.assertAlmostEqual(observations[0][2], 50.1)
+        self.assertAlmostEqual(observations[1][2], 50.2)
+        self.assertEqual(self.data_manager.deferred_stored, 0)
+
+if __name__ == '__main__':
+    unittest.main()
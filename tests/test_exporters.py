@@ -0,0 +1,133 @@
+"""
+Tests for the streaming KML, KMZ and GPX writers
+"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+from xml.etree import ElementTree
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from exporters import KMLWriter, KMZStream, GPXWriter, cdata, format_gpx_time
+
+KML = '{http://www.opengis.net/kml/2.2}'
+GPX = '{http://www.topografix.com/GPX/1/1}'
+
+NETWORK = {
+    'ssid': 'Tom & Jerry\'s <"Cafe">',
+    'bssid': 'AA:BB:CC:DD:EE:FF',
+    'security': 'WPA2',
+    'signal_strength': 70,
+    'frequency': 2412,
+    'channel': 1,
+    'timestamp': 1700000000.0,
+    'accuracy': 12.5,
+}
+
+def write_kml(stream, networks):
+    writer = KMLWriter(stream)
+    writer.begin('Session <1>', 'Networks & more')
+    for network in networks:
+        writer.add_network(network, (52.5, 13.25))
+    writer.end()
+
+class TestKML(unittest.TestCase):
+
+    def parse(self, networks):
+        stream = io.StringIO()
+        write_kml(stream, networks)
+        return ElementTree.fromstring(stream.getvalue())
+
+    def test_escaping(self):
+        document = self.parse([NETWORK])[0]
+        self.assertEqual(document.find(f'{KML}name').text, 'Session <1>')
+        self.assertEqual(document.find(f'{KML}description').text, 'Networks & more')
+
+        placemark = document.find(f'{KML}Placemark')
+        self.assertEqual(placemark.find(f'{KML}name').text, NETWORK['ssid'])
+        self.assertEqual(placemark.find(f'{KML}styleUrl').text, '#wpa_style')
+        self.assertEqual(placemark.find(f'{KML}Point/{KML}coordinates').text, '13.25,52.5,0')
+
+        # The description is HTML, so the SSID is escaped once more inside the CDATA
+        description = placemark.find(f'{KML}description').text
+        self.assertIn('Tom &amp; Jerry\'s &lt;"Cafe"&gt;', description)
+        self.assertIn('<b>Accuracy:</b> ±12.5m', description)
+
+    def test_missing_fields(self):
+        placemark = self.parse([{'bssid': 'AA:BB:CC:DD:EE:FF', 'accuracy': None}])[0][-1]
+        self.assertEqual(placemark.find(f'{KML}name').text, 'Hidden Network')
+        self.assertEqual(placemark.find(f'{KML}styleUrl').text, '#unknown_style')
+        self.assertIn('<b>Accuracy:</b> Unknown', placemark.find(f'{KML}description').text)
+
+    def test_cdata_terminator_is_split(self):
+        for text in ('a]]>b', ']]>', 'x]]>]]>y', ']]]>', 'plain'):
+            element = ElementTree.fromstring(f'<d>{cdata(text)}</d>')
+            self.assertEqual(element.text, text)
+
+class TestKMZ(unittest.TestCase):
+
+    def test_archive(self):
+        networks = [dict(NETWORK, bssid=f'AA:BB:CC:DD:{number // 256:02X}:{number % 256:02X}')
+                    for number in range(3000)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'export.kmz')
+            with KMZStream(path) as stream:
+                write_kml(stream, networks)
+
+            self.assertTrue(zipfile.is_zipfile(path))
+            with zipfile.ZipFile(path) as archive:
+                self.assertIsNone(archive.testzip())
+                self.assertEqual(archive.namelist(), ['doc.kml'])
+                document = ElementTree.fromstring(archive.read('doc.kml'))[0]
+        self.assertEqual(len(document.findall(f'{KML}Placemark')), len(networks))
+
+class TestGPX(unittest.TestCase):
+
+    def write(self, timestamps, segment_gap=120):
+        stream = io.StringIO()
+        writer = GPXWriter(stream, segment_gap)
+        writer.begin('Drive & scan', 'A <test>')
+        writer.add_waypoint(52.5, 13.25, NETWORK['ssid'], 'BSSID: AA & BB', 1700000000.0)
+        writer.add_waypoint(52.5, 13.25, 'No time', '')
+        writer.begin_track('Route')
+        for timestamp in timestamps:
+            writer.add_track_point(52.5, 13.25 + timestamp * 1e-5, timestamp)
+        writer.end_track()
+        writer.end()
+        return ElementTree.fromstring(stream.getvalue())
+
+    def segments(self, gpx):
+        return [[point.find(f'{GPX}time').text for point in segment]
+                for segment in gpx.findall(f'{GPX}trk/{GPX}trkseg')]
+
+    def test_waypoints(self):
+        gpx = self.write([])
+        self.assertEqual(gpx.find(f'{GPX}metadata/{GPX}name').text, 'Drive & scan')
+        first, second = gpx.findall(f'{GPX}wpt')
+        self.assertEqual(first.find(f'{GPX}name').text, NETWORK['ssid'])
+        self.assertEqual(first.find(f'{GPX}desc').text, 'BSSID: AA & BB')
+        self.assertEqual(first.find(f'{GPX}time').text, '2023-11-14T22:13:20Z')
+        self.assertEqual((first.get('lat'), first.get('lon')), ('52.5', '13.25'))
+        self.assertIsNone(second.find(f'{GPX}time'))
+
+    def test_segments_split_on_gaps(self):
+        start = 1700000000.0
+        offsets = [0, 1, 2, 200, 201, 321, 442, 443]
+        segments = self.segments(self.write([start + offset for offset in offsets]))
+        # A gap of exactly 120 s stays in the segment, 121 s starts a new one
+        self.assertEqual([len(segment) for segment in segments], [3, 3, 2])
+        self.assertEqual(segments[1][0], format_gpx_time(start + 200))
+
+    def test_one_segment_without_gaps(self):
+        segments = self.segments(self.write([float(second) for second in range(500)]))
+        self.assertEqual([len(segment) for segment in segments], [500])
+
+    def test_empty_track(self):
+        self.assertEqual(self.segments(self.write([])), [[]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Tests for the rate-limited logging
+"""
+
+import logging
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from log import RateLimitFilter
+
+def make_record(created, message="Error on %s", args=('wlan0',), lineno=10, key=None):
+    """A warning record created at a given time"""
+    record = logging.LogRecord('gnome_wardrive.test', logging.WARNING, __file__, lineno,
+                               message, args, None)
+    record.created = created
+    if key is not None:
+        record.key = key
+    return record
+
+class TestRateLimitFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.filter = RateLimitFilter(burst=3, period=60.0)
+
+    def test_burst_then_drop(self):
+        passed = [self.filter.filter(make_record(t)) for t in range(10)]
+        self.assertEqual(passed, [True] * 3 + [False] * 7)
+
+    def test_next_window_reports_drops(self):
+        for t in range(10):
+            self.filter.filter(make_record(t))
+        record = make_record(60.0)
+        self.assertTrue(self.filter.filter(record))
+        self.assertEqual(record.getMessage(), "Error on wlan0 (7 similar messages suppressed)")
+        self.assertEqual(self.filter.expire(200.0), [])
+
+    def test_quiet_key_reports_drops_on_expiry(self):
+        for t in range(5):
+            self.filter.filter(make_record(t, args=(f'wlan{t}',)))
+        self.assertEqual(self.filter.expire(30.0), [])
+
+        expired = self.filter.expire(61.0)
+        self.assertEqual(len(expired), 1)
+        record, count = expired[0]
+        self.assertEqual(count, 2)
+        self.assertEqual(record.getMessage(), "Error on wlan4")
+        self.assertEqual(self.filter.windows, {})
+
+    def test_keys_are_separate(self):
+        for t in range(3):
+            self.filter.filter(make_record(t, lineno=1, key=('extract', 'wlan0')))
+        self.assertTrue(self.filter.filter(make_record(5, lineno=1, key=('extract', 'wlan1'))))
+        self.assertTrue(self.filter.filter(make_record(5, lineno=2)))
+        self.assertFalse(self.filter.filter(make_record(6, lineno=1, key=('extract', 'wlan0'))))
+
+    def test_exempt_records_pass_and_do_not_count(self):
+        for t in range(10):
+            record = make_record(t)
+            record.rate_limit = False
+            self.assertTrue(self.filter.filter(record))
+        self.assertEqual(self.filter.windows, {})
+        self.assertTrue(self.filter.filter(make_record(10)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Tests for the hot-path metrics
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from metrics import Histogram, Metrics, LATENCY_BUCKETS
+
+class TestHistogram(unittest.TestCase):
+
+    def test_percentiles_are_bucket_bounds(self):
+        histogram = Histogram()
+        # 90 fast measurements, 9 slower ones and one outlier
+        for _ in range(90):
+            histogram.observe(0.3)
+        for _ in range(9):
+            histogram.observe(4.0)
+        histogram.observe(3000.0)
+
+        self.assertEqual(histogram.percentile(0.5), 0.5)
+        self.assertEqual(histogram.percentile(0.9), 0.5)
+        self.assertEqual(histogram.percentile(0.95), 5)
+        self.assertEqual(histogram.percentile(0.99), 5)
+        # Beyond the last bucket the maximum is all there is
+        self.assertEqual(histogram.percentile(1.0), 3000.0)
+
+    def test_bucket_bounds_are_inclusive(self):
+        histogram = Histogram()
+        histogram.observe(1.0)
+        self.assertEqual(histogram.counts[LATENCY_BUCKETS.index(1)], 1)
+        self.assertEqual(histogram.percentile(0.5), 1)
+
+    def test_single_measurement(self):
+        histogram = Histogram()
+        histogram.observe(0.02)
+        for fraction in (0.0, 0.5, 0.99, 1.0):
+            self.assertEqual(histogram.percentile(fraction), 0.025)
+
+    def test_empty(self):
+        histogram = Histogram()
+        self.assertEqual(histogram.percentile(0.5), 0.0)
+        self.assertEqual(histogram.snapshot()['mean_ms'], 0.0)
+
+    def test_snapshot(self):
+        histogram = Histogram()
+        for milliseconds in (1.0, 2.0, 3.0, 2000.0):
+            histogram.observe(milliseconds)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot['count'], 4)
+        self.assertEqual(snapshot['mean_ms'], 501.5)
+        self.assertEqual((snapshot['p50_ms'], snapshot['p95_ms']), (2.5, 2000.0))
+        self.assertEqual(snapshot['max_ms'], 2000.0)
+        self.assertEqual(snapshot['buckets'], {'1': 1, '2.5': 1, '5': 1, 'inf': 1})
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = Metrics()
+
+    def test_disabled_records_nothing(self):
+        self.assertEqual(self.metrics.start(), 0)
+        self.metrics.stop('section', 0)
+        self.metrics.observe('section', 1.0)
+        self.metrics.count('items')
+        report = self.metrics.snapshot()
+        self.assertEqual((report['latency'], report['counts']), ({}, {}))
+
+    def test_snapshot_resets(self):
+        self.metrics.enable()
+        self.metrics.stop('section', self.metrics.start())
+        self.metrics.count('items', 5)
+        self.metrics.watch('queue', lambda: 7)
+        self.metrics.watch('broken', lambda: 1 / 0)
+
+        report = self.metrics.snapshot()
+        self.assertEqual(report['latency']['section']['count'], 1)
+        self.assertEqual(report['counts'], {'items': 5})
+        self.assertGreater(report['rates']['items'], 0)
+        self.assertEqual(report['gauges'], {'queue': 7, 'broken': None})
+
+        report = self.metrics.snapshot(reset=False)
+        self.assertEqual((report['latency'], report['counts']), ({}, {}))
+        self.metrics.unwatch('broken')
+        self.assertEqual(self.metrics.snapshot()['gauges'], {'queue': 7})
+
+    def test_measurements_from_other_threads(self):
+        self.metrics.enable()
+        per_thread = 20000
+
+        def work(number):
+            for step in range(per_thread):
+                self.metrics.count('items')
+                self.metrics.observe(f'worker{number}_{step % 20}', 1.0)
+
+        threads = [threading.Thread(target=work, args=(number,)) for number in range(4)]
+        for thread in threads:
+            thread.start()
+
+        # Nothing is lost or counted twice across the intervals
+        counted = 0
+        observed = 0
+        while any(thread.is_alive() for thread in threads):
+            report = self.metrics.snapshot()
+            counted += report['counts'].get('items', 0)
+            observed += sum(histogram['count'] for histogram in report['latency'].values())
+        for thread in threads:
+            thread.join()
+        report = self.metrics.snapshot()
+        counted += report['counts'].get('items', 0)
+        observed += sum(histogram['count'] for histogram in report['latency'].values())
+        self.assertEqual(counted, len(threads) * per_thread)
+        self.assertEqual(observed, len(threads) * per_thread)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Tests for the incremental network statistics
+"""
+
+from collections import Counter
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from data_manager import DataManager
+from classifier import security_category
+from scan_scheduler import frequency_band
+
+SECURITY = ('Open', 'WEP', 'WPA', 'WPA2', 'WPA3-SAE', 'WPA2-Enterprise', 'Unknown')
+CHANNELS = ((2412, 1), (2437, 6), (2462, 11), (5180, 36), (5745, 149), (5955, 1))
+
+def recompute(networks):
+    """Count the networks from scratch, the way get_statistics() used to"""
+    categories = Counter(security_category(network.get('security', 'Unknown'))
+                         for network in networks)
+    ssids = {network['ssid'] for network in networks
+             if network.get('ssid') and not network['ssid'].startswith('Hidden_')}
+    return {
+        'total_networks': len(networks),
+        'open_networks': categories['open'],
+        'wep_networks': categories['wep'],
+        'wpa_networks': categories['wpa'],
+        'by_security': dict(Counter(network.get('security', 'Unknown') for network in networks)),
+        'by_band': dict(Counter(frequency_band(network.get('frequency')) for network in networks)),
+        'by_channel': dict(Counter(network.get('channel', 0) for network in networks)),
+        'distinct_ssids': len(ssids),
+    }
+
+class TestIncrementalStatistics(unittest.TestCase):
+
+    def test_matches_recomputation(self):
+        generator = random.Random(17)
+        data_manager = DataManager()
+        data_manager.clock = lambda: 1000.0
+        data_manager.update_location(50.0, 10.0, 5.0)
+
+        for step in range(3000):
+            bssid = 'AA:BB:CC:00:%02X:%02X' % divmod(generator.randrange(400), 256)
+            frequency, channel = generator.choice(CHANNELS)
+            ssid = generator.choice(('home', 'cafe', 'office', f'Hidden_{bssid}', f'net{step % 50}'))
+            data_manager.add_network({
+                'ssid': ssid,
+                'bssid': bssid,
+                'signal_strength': generator.randrange(10, 100),
+                'frequency': frequency,
+                'channel': channel,
+                'security': generator.choice(SECURITY),
+                'device_interface': 'wlan0',
+                'timestamp': 1000.0,
+            })
+
+            if step % 500 == 0:
+                self.assert_consistent(data_manager)
+        self.assert_consistent(data_manager)
+
+    def assert_consistent(self, data_manager):
+        statistics = data_manager.get_statistics()
+        expected = recompute(data_manager.get_networks_list())
+        for field, value in expected.items():
+            self.assertEqual(statistics[field], value, field)
+
+    def test_new_per_minute(self):
+        now = [1000.0]
+        data_manager = DataManager()
+        data_manager.clock = lambda: now[0]
+        for second in range(90):
+            now[0] = 1000.0 + second
+            data_manager.add_network({'bssid': f'AA:00:00:00:00:{second:02X}', 'ssid': 'x',
+                                      'timestamp': now[0]})
+        self.assertEqual(data_manager.get_statistics()['new_per_minute'], 61.0)
+
+    def test_clear(self):
+        data_manager = DataManager()
+        data_manager.add_network({'bssid': 'AA:00:00:00:00:01', 'ssid': 'x', 'security': 'WEP'})
+        data_manager.clear_data()
+        self.assertEqual(data_manager.get_statistics()['total_networks'], 0)
+        self.assertEqual(data_manager.get_statistics()['by_security'], {})
+
+if __name__ == '__main__':
+    unittest.main()
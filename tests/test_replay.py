@@ -0,0 +1,121 @@
+"""
+Tests for recording and replaying scan traces
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    import gi
+    gi.require_version('NM', '1.0')
+    from gi.repository import NM
+except (ImportError, ValueError):
+    NM = None
+
+if NM is not None:
+    from replay import TraceRecorder, ReplaySource, ReplayAccessPoint, read_trace
+
+CAFE = 'AA:BB:CC:00:00:01'
+HIDDEN = 'AA:BB:CC:00:00:02'
+OFFICE = 'AA:BB:CC:00:00:03'
+
+def access_point(bssid, ssid, strength, frequency=2412, flags=0, wpa_flags=0, rsn_flags=0):
+    return ReplayAccessPoint(bssid, ssid, strength, frequency, flags, wpa_flags, rsn_flags)
+
+@unittest.skipIf(NM is None, "needs PyGObject and the NM typelib")
+class TestRoundTrip(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'trace.jsonl.gz')
+
+        recorder = TraceRecorder(self.path)
+        recorder.record_location(100.0, 52.0, 13.0, 5.0)
+        recorder.record_access_points('wlan0', 100.0, [
+            access_point(CAFE, 'Café', 70, flags=0x1, rsn_flags=0x100),
+            access_point(HIDDEN, None, 40, 5180),
+        ])
+        # The cafe's signal changes, and a second adapter sees the office
+        recorder.record_access_points('wlan0', 101.0, [
+            access_point(CAFE, 'Café', 72, flags=0x1, rsn_flags=0x100),
+            access_point(HIDDEN, None, 40, 5180),
+        ])
+        recorder.record_access_points('wlan1', 101.0, [access_point(OFFICE, 'Office', 55, 5955)])
+        recorder.record_location(102.0, 52.001, 13.0, None)
+        # The hidden network drops out of view
+        recorder.record_access_points('wlan0', 103.0, [
+            access_point(CAFE, 'Café', 72, flags=0x1, rsn_flags=0x100),
+        ])
+        recorder.close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_trace_records(self):
+        records = list(read_trace(self.path))
+        self.assertEqual(len(records), 6)
+        self.assertEqual(records[0], {'t': 100.0, 'f': [52.0, 13.0, 5.0]})
+        self.assertEqual(records[1]['i'], 'wlan0')
+        self.assertEqual(records[1]['a'], [
+            [CAFE, 'Café', 70, 2412, 1, 0, 0x100],
+            [HIDDEN, None, 40, 5180, 0, 0, 0],
+        ])
+
+    def test_replay(self):
+        source = ReplaySource(self.path)
+        self.assertEqual(sorted(source.devices), ['wlan0', 'wlan1'])
+
+        found = []
+        expired = []
+        fixes = []
+        ticks = []
+        finished = []
+        source.scanner.connect('network-found', lambda scanner, network: found.append(network))
+        source.scanner.connect('aps-expired', lambda scanner, entries: expired.extend(entries))
+        source.scanner.connect('scan-tick', lambda scanner: ticks.append(source.clock()))
+        source.connect('location-updated', lambda source, *fix: fixes.append(fix))
+        source.connect('replay-finished', lambda source: finished.append(True))
+        source.start()
+
+        self.assertEqual(finished, [True])
+        self.assertFalse(source.scanner.is_scanning)
+        self.assertEqual((source.ticks, source.fixes), (3, 2))
+        self.assertEqual(ticks, [100.0, 101.0, 103.0])
+        self.assertEqual(fixes, [(52.0, 13.0, 5.0), (52.001, 13.0, 0.0)])
+
+        # Only new or changed access points, stamped with the trace time
+        self.assertEqual([(network['timestamp'], network['bssid'], network['signal_strength'])
+                          for network in found],
+                         [(100.0, CAFE, 70), (100.0, HIDDEN, 40), (101.0, CAFE, 72),
+                          (101.0, OFFICE, 55)])
+        cafe, hidden = found[:2]
+        self.assertEqual((cafe['ssid'], cafe['security'], cafe['channel']), ('Café', 'WPA2', 1))
+        self.assertEqual((hidden['ssid'], hidden['security'], hidden['channel']),
+                         (f'Hidden_{HIDDEN}', 'Open', 36))
+        self.assertEqual((found[3]['device_interface'], found[3]['channel']), ('wlan1', 1))
+
+        self.assertEqual(expired, [{'bssid': HIDDEN, 'device_interface': 'wlan0',
+                                    'last_seen': 101.0}])
+
+    def test_rerecording_a_replay(self):
+        # Recording while replaying reproduces the access point snapshots
+        copy = os.path.join(self.directory.name, 'copy.jsonl.gz')
+        source = ReplaySource(self.path)
+        source.scanner.recorder = TraceRecorder(copy)
+        source.start()
+        source.scanner.recorder.close()
+
+        original = [record for record in read_trace(self.path) if 'a' in record]
+        replayed = [record for record in read_trace(copy)]
+        self.assertEqual([(record['t'], record['i']) for record in replayed],
+                         [(100.0, 'wlan0'), (100.0, 'wlan1'), (101.0, 'wlan0'), (101.0, 'wlan1'),
+                          (103.0, 'wlan0'), (103.0, 'wlan1')])
+        self.assertEqual(replayed[2]['a'], original[1]['a'])
+        self.assertEqual(replayed[4]['a'], original[3]['a'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+"""
+Tests for the adaptive scan cadence and the scan coordination across adapters
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from scan_scheduler import (
+    ScanScheduler, ScanCoordinator, MIN_POLL_INTERVAL, MAX_POLL_INTERVAL,
+    MAX_POLL_INTERVAL_BATTERY, MIN_ACTIVE_SCAN_INTERVAL, MAX_ACTIVE_SCAN_INTERVAL,
+    MAX_ACTIVE_SCAN_INTERVAL_BATTERY, RESCAN_DISTANCE, distance_between)
+
+# About 100 m of latitude
+STEP = RESCAN_DISTANCE / 111195.0
+
+class TestPollInterval(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = ScanScheduler()
+
+    def quiet_down(self, ticks):
+        for _ in range(ticks):
+            self.scheduler.record_tick(0, 20)
+
+    def test_busy_start_is_clamped_to_the_minimum(self):
+        # Everything is new at first
+        self.assertEqual(self.scheduler.poll_interval(), MIN_POLL_INTERVAL)
+
+    def test_speed_shortens_the_interval(self):
+        self.scheduler.churn = 0.0
+        self.scheduler.speed = 5.0
+        self.assertEqual(self.scheduler.poll_interval(), 0.7)
+        self.scheduler.speed = 40.0
+        self.assertEqual(self.scheduler.poll_interval(), MIN_POLL_INTERVAL)
+
+    def test_churn_shortens_the_interval(self):
+        self.scheduler.churn = 0.1
+        self.assertEqual(self.scheduler.poll_interval(), 0.7)
+
+    def test_quiet_backs_off_to_the_maximum(self):
+        self.quiet_down(4)
+        self.scheduler.churn = 0.0
+        self.assertEqual(self.scheduler.poll_interval(), 1.0)
+        self.quiet_down(1)
+        self.assertEqual(self.scheduler.poll_interval(), 2.0)
+        self.quiet_down(100)
+        self.assertEqual(self.scheduler.poll_interval(), MAX_POLL_INTERVAL)
+
+        self.scheduler.record_tick(1, 20)
+        self.assertEqual(self.scheduler.quiet_ticks, 0)
+
+    def test_battery(self):
+        self.quiet_down(100)
+        self.scheduler.set_on_battery(True)
+        self.assertEqual(self.scheduler.poll_interval(), MAX_POLL_INTERVAL_BATTERY)
+
+        self.scheduler.quiet_ticks = 0
+        self.assertEqual(self.scheduler.poll_interval(), 1.5)
+
+        # Even moving fast on battery stays above the minimum
+        self.scheduler.speed = 40.0
+        self.assertEqual(self.scheduler.poll_interval(), MIN_POLL_INTERVAL)
+
+    def test_speed_from_fixes(self):
+        self.scheduler.update_location(50.0, 10.0, 100.0)
+        self.scheduler.update_location(50.0 + STEP, 10.0, 110.0)
+        self.assertAlmostEqual(self.scheduler.speed, 0.3 * 10.0, places=2)
+        # A repeated timestamp moves the devices but leaves the speed alone
+        self.scheduler.device_state('wlan0')
+        self.scheduler.update_location(50.0 + 2 * STEP, 10.0, 110.0)
+        self.assertAlmostEqual(self.scheduler.speed, 0.3 * 10.0, places=2)
+        self.assertAlmostEqual(self.scheduler.devices['wlan0']['distance'], 100.0, places=0)
+
+    def test_distance(self):
+        self.assertAlmostEqual(distance_between(50.0, 10.0, 50.0 + STEP, 10.0), 100.0, places=3)
+        self.assertEqual(distance_between(50.0, 10.0, 50.0, 10.0), 0.0)
+
+class TestActiveScans(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = ScanScheduler()
+
+    def test_first_scan_is_immediate(self):
+        self.assertTrue(self.scheduler.should_active_scan('wlan0', 0.0))
+
+    def test_minimum_interval(self):
+        self.scheduler.record_active_scan('wlan0', 0.0)
+        self.scheduler.device_state('wlan0')['distance'] = 10 * RESCAN_DISTANCE
+        self.assertFalse(self.scheduler.should_active_scan('wlan0', MIN_ACTIVE_SCAN_INTERVAL - 0.1))
+        self.assertTrue(self.scheduler.should_active_scan('wlan0', MIN_ACTIVE_SCAN_INTERVAL))
+
+    def test_distance_gate(self):
+        self.scheduler.record_active_scan('wlan0', 0.0)
+        self.scheduler.update_location(50.0, 10.0, 0.0)
+        self.scheduler.update_location(50.0 + STEP * 0.9, 10.0, 5.0)
+        self.assertFalse(self.scheduler.should_active_scan('wlan0', 20.0))
+        self.scheduler.update_location(50.0 + STEP * 1.1, 10.0, 6.0)
+        self.assertTrue(self.scheduler.should_active_scan('wlan0', 20.0))
+
+        # Scanning resets the distance
+        self.scheduler.record_active_scan('wlan0', 20.0)
+        self.assertEqual(self.scheduler.devices['wlan0']['distance'], 0.0)
+
+    def test_stationary_rescans_at_the_maximum_interval(self):
+        self.scheduler.record_active_scan('wlan0', 0.0)
+        self.assertFalse(self.scheduler.should_active_scan('wlan0', MAX_ACTIVE_SCAN_INTERVAL - 1))
+        self.assertTrue(self.scheduler.should_active_scan('wlan0', MAX_ACTIVE_SCAN_INTERVAL))
+
+        self.scheduler.set_on_battery(True)
+        self.assertFalse(self.scheduler.should_active_scan('wlan0', MAX_ACTIVE_SCAN_INTERVAL))
+        self.assertTrue(self.scheduler.should_active_scan('wlan0', MAX_ACTIVE_SCAN_INTERVAL_BATTERY))
+
+    def test_denied_device_never_scans(self):
+        self.scheduler.record_scan_denied('wlan0')
+        self.assertFalse(self.scheduler.should_active_scan('wlan0', 0.0))
+        self.assertTrue(self.scheduler.should_active_scan('wlan1', 0.0))
+
+class TestCoordinator(unittest.TestCase):
+
+    def run_drive(self, count, duration=120.0, tick=0.1):
+        """Drive fast with count adapters, returning (time, iface) of each scan"""
+        scheduler = ScanScheduler()
+        coordinator = ScanCoordinator(scheduler)
+        ifaces = [f'wlan{number}' for number in range(count)]
+        for iface in ifaces:
+            scheduler.device_state(iface)
+
+        scans = []
+        for step in range(int(duration / tick)):
+            now = step * tick
+            # Far enough between ticks that distance never holds a scan back
+            scheduler.update_location(50.0 + step * STEP * 2, 10.0, now)
+            for iface in ifaces:
+                if coordinator.should_scan(iface, now):
+                    coordinator.record_scan(iface, now)
+                    scans.append((now, iface))
+        return coordinator, scans
+
+    def test_stagger_spacing(self):
+        for count in (1, 2, 3, 4):
+            coordinator, scans = self.run_drive(count)
+            gap = MIN_ACTIVE_SCAN_INTERVAL / count
+            self.assertAlmostEqual(coordinator.stagger_gap(), gap)
+
+            times = [now for now, _ in scans]
+            spacing = [later - earlier for earlier, later in zip(times, times[1:])]
+            self.assertGreaterEqual(min(spacing), gap - 1e-6, count)
+            # Evenly spread: no adapter waits much longer than its turn
+            self.assertLessEqual(max(spacing), gap + 0.1 + 1e-6, count)
+
+            # Adapters take turns, each at most once per minimum interval
+            ifaces = [iface for _, iface in scans]
+            self.assertEqual(len(set(ifaces[:count])), count)
+            for iface in set(ifaces):
+                own = [now for now, scanned in scans if scanned == iface]
+                own_spacing = [later - earlier for earlier, later in zip(own, own[1:])]
+                self.assertGreaterEqual(min(own_spacing), MIN_ACTIVE_SCAN_INTERVAL - 1e-6)
+
+            yields = coordinator.get_yield()['interfaces']
+            self.assertEqual(sum(stats['scans'] for stats in yields.values()), len(scans))
+
+    def test_yield(self):
+        coordinator = ScanCoordinator(ScanScheduler())
+        coordinator.record_sighting('wlan0', 'AA', 2412)
+        coordinator.record_sighting('wlan0', 'AA', 2412)
+        coordinator.record_sighting('wlan0', 'BB', 5180)
+        coordinator.record_sighting('wlan1', 'BB', 5180)
+        coordinator.record_sighting('wlan1', 'CC', 6115)
+
+        result = coordinator.get_yield()
+        self.assertEqual(result['combined'], 3)
+        self.assertEqual(result['interfaces']['wlan0'],
+                         {'unique': 2, 'first_found': 2, 'bands': {'2.4GHz': 1, '5GHz': 1},
+                          'scans': 0})
+        self.assertEqual(result['interfaces']['wlan1'],
+                         {'unique': 2, 'first_found': 1, 'bands': {'5GHz': 1, '6GHz': 1},
+                          'scans': 0})
+
+        coordinator.clear()
+        self.assertEqual(coordinator.get_yield(), {'interfaces': {}, 'combined': 0})
+
+if __name__ == '__main__':
+    unittest.main()
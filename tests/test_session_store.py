@@ -0,0 +1,73 @@
+"""
+Tests for the SQLite session store
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from session_store import SessionStore
+
+NETWORK = {
+    'bssid': '00:11:22:33:44:55',
+    'ssid': 'Cafe',
+    'security': 'WPA2',
+    'signal_strength': 70,
+    'timestamp': 200.0,
+    'first_seen': 150.0,
+    'last_seen': 200.0,
+}
+
+class TestSessionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'sessions.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_new_database(self):
+        store = SessionStore(self.path)
+        store.start_session()
+        store.update_network(NETWORK)
+        store.flush()
+        [network] = store.load_networks()
+        self.assertEqual(network['first_seen'], 150.0)
+        store.close()
+
+    def test_reopening_keeps_data(self):
+        store = SessionStore(self.path)
+        store.start_session()
+        store.update_network(NETWORK)
+        store.add_track_point({'timestamp': 1.0, 'latitude': 2.0, 'longitude': 3.0})
+        store.close()
+
+        store = SessionStore(self.path)
+        store.start_session(resume=True)
+        self.assertEqual([network['bssid'] for network in store.load_networks()],
+                         [NETWORK['bssid']])
+        self.assertEqual(len(list(store.load_track())), 1)
+        store.close()
+
+    def test_tagging_a_stored_sighting_uses_an_index(self):
+        store = SessionStore(self.path)
+        store.start_session()
+        plan = store.connection.execute(
+            'EXPLAIN QUERY PLAN UPDATE observations SET latitude = 1.0 '
+            'WHERE session_id = 1 AND bssid = ? AND timestamp = ?', ('x', 1.0)).fetchall()
+        self.assertIn('(session_id=? AND bssid=? AND timestamp=?)', plan[0][-1])
+
+        sighting = dict(NETWORK, timestamp=300.0)
+        store.add_observation(sighting)
+        store.flush()
+        store.update_position(dict(sighting, latitude=1.0, longitude=2.0, accuracy=3.0))
+        store.flush()
+        self.assertEqual(list(store.load_observations())[0][2:5], (1.0, 2.0, 3.0))
+        store.close()
+
+if __name__ == '__main__':
+    unittest.main()
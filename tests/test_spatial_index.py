@@ -0,0 +1,87 @@
+"""
+Tests for the spatial index of access point positions
+"""
+
+import math
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from spatial_index import SpatialIndex, METRES_PER_DEGREE
+
+def distance(latitude, longitude, point):
+    """Distance in metres as the index measures it"""
+    y = point[0] - latitude
+    x = (point[1] - longitude) * math.cos(math.radians(latitude))
+    return math.hypot(x, y) * METRES_PER_DEGREE
+
+class TestSpatialIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.generator = random.Random(20)
+        self.index = SpatialIndex(cell_size=100.0)
+        self.points = {}
+        # A dense town and a few outliers far away
+        for number in range(2000):
+            if number % 100 == 0:
+                point = (self.generator.uniform(40, 60), self.generator.uniform(-10, 30))
+            else:
+                point = (self.generator.gauss(52.0, 0.01), self.generator.gauss(13.0, 0.02))
+            bssid = f'AP{number}'
+            self.points[bssid] = point
+            self.index.update(bssid, *point)
+
+    def brute_nearest(self, latitude, longitude, k):
+        ranked = sorted((distance(latitude, longitude, point), bssid)
+                        for bssid, point in self.points.items())
+        return ranked[:k]
+
+    def assert_same_ranking(self, found, expected):
+        self.assertEqual([bssid for _, bssid in found], [bssid for _, bssid in expected])
+        for (found_distance, _), (expected_distance, _) in zip(found, expected):
+            self.assertAlmostEqual(found_distance, expected_distance, places=6)
+
+    def test_nearest_matches_brute_force(self):
+        queries = [(self.generator.gauss(52.0, 0.02), self.generator.gauss(13.0, 0.04))
+                   for _ in range(50)]
+        queries += [(45.0, 0.0), (70.0, 100.0), (52.0, 13.0)]
+        for latitude, longitude in queries:
+            for k in (1, 5, 40):
+                self.assert_same_ranking(self.index.nearest(latitude, longitude, k),
+                                         self.brute_nearest(latitude, longitude, k))
+
+    def test_nearest_with_more_than_indexed(self):
+        self.assertEqual(len(self.index.nearest(52.0, 13.0, 5000)), len(self.points))
+        self.assertEqual(SpatialIndex().nearest(52.0, 13.0, 3), [])
+
+    def test_within_matches_brute_force(self):
+        for radius in (50.0, 500.0, 3000.0):
+            latitude, longitude = 52.001, 13.002
+            expected = [(d, bssid) for d, bssid in self.brute_nearest(latitude, longitude, len(self.points))
+                        if d <= radius]
+            self.assert_same_ranking(self.index.within(latitude, longitude, radius), expected)
+
+    def test_in_bbox_matches_brute_force(self):
+        south, west, north, east = 51.995, 12.99, 52.01, 13.02
+        expected = sorted(bssid for bssid, (latitude, longitude) in self.points.items()
+                          if south <= latitude <= north and west <= longitude <= east)
+        self.assertEqual(sorted(self.index.in_bbox(south, west, north, east)), expected)
+
+    def test_moving_and_removing(self):
+        self.index.update('AP1', 10.0, 10.0)
+        self.points['AP1'] = (10.0, 10.0)
+        self.assertEqual(self.index.nearest(10.0, 10.0)[0][1], 'AP1')
+        self.assertEqual(self.index.get('AP1'), (10.0, 10.0))
+
+        self.index.remove('AP1')
+        del self.points['AP1']
+        self.assertIsNone(self.index.get('AP1'))
+        self.assertEqual(len(self.index), len(self.points))
+        self.assert_same_ranking(self.index.nearest(10.0, 10.0, 3),
+                                 self.brute_nearest(10.0, 10.0, 3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Tests for the bounded, simplified location history
+"""
+
+import math
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from track import LocationTrack, METRES_PER_DEGREE, SEGMENT_GAP
+
+def distance(a, b):
+    """Approximate distance in metres between two (latitude, longitude) pairs"""
+    dlat = (a[0] - b[0]) * METRES_PER_DEGREE
+    dlon = (a[1] - b[1]) * METRES_PER_DEGREE * math.cos(math.radians(a[0]))
+    return math.hypot(dlat, dlon)
+
+def winding_route(seconds):
+    """A fix per second along a route that keeps turning"""
+    return [(float(t), 51.5 + 0.0001 * t, -0.1 + 0.0003 * math.sin(t / 20), 5.0)
+            for t in range(seconds)]
+
+class TestSimplification(unittest.TestCase):
+
+    def test_straight_route_collapses(self):
+        track = LocationTrack(recent_points=10)
+        for t in range(100):
+            track.append(float(t), 51.5 + 0.0001 * t, -0.1, 5.0)
+
+        self.assertEqual(track.received, 100)
+        self.assertLess(len(track), 20)
+        self.assertEqual(track.last(), (99.0, 51.5 + 0.0099, -0.1, 5.0))
+
+    def test_error_bound_is_kept(self):
+        route = winding_route(1000)
+        track = LocationTrack(error_bound=5.0, recent_points=20)
+        for point in route:
+            track.append(*point)
+
+        self.assertLess(len(track), len(route))
+        for timestamp, latitude, longitude, _ in route:
+            position = track.position_at(timestamp)
+            self.assertIsNotNone(position)
+            self.assertLessEqual(distance(position, (latitude, longitude)), 5.0 + 1e-6)
+
+    def test_kept_points_are_in_time_order(self):
+        track = LocationTrack(recent_points=5)
+        for point in winding_route(300):
+            track.append(*point)
+        timestamps = [point[0] for point in track]
+        self.assertEqual(timestamps, sorted(timestamps))
+
+    def test_gap_breaks_the_route(self):
+        track = LocationTrack(recent_points=2)
+        for t in (0, 1, 2, 3 + SEGMENT_GAP, 4 + SEGMENT_GAP, 5 + SEGMENT_GAP):
+            track.append(float(t), 51.5, -0.1 + 0.0001 * t, None)
+
+        # Halfway through the gap there is no segment and no recent fix
+        self.assertIsNone(track.position_at(3 + SEGMENT_GAP / 2))
+
+    def test_repeated_timestamps(self):
+        # Regression: a fix at the time of the last kept one used to retain None
+        track = LocationTrack(recent_points=2)
+        for t in (0, 0, 0, 1):
+            track.append(float(t), 1.0, 1.0, 5.0)
+        for t in range(2, 10):
+            track.append(float(t), 1.0, 1.0 + 0.0001 * t, 5.0)
+
+        self.assertEqual(track.received, 12)
+        timestamps = [point[0] for point in track]
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertEqual(track.position_at(9.0)[:2], (1.0, 1.0009))
+
+    def test_clock_stepping_back(self):
+        track = LocationTrack(recent_points=2)
+        for t in (10, 11, 12, 5, 6, 13, 14, 15, 16):
+            track.append(float(t), 1.0, 1.0, None)
+        self.assertEqual(track.last_time(), 16.0)
+        self.assertIsNotNone(track.position_at(14.5))
+
+class TestInterpolation(unittest.TestCase):
+
+    def setUp(self):
+        self.track = LocationTrack(recent_points=100)
+        self.track.append(0.0, 10.0, 20.0, 4.0)
+        self.track.append(10.0, 11.0, 22.0, 8.0)
+
+    def test_between_fixes(self):
+        latitude, longitude, accuracy = self.track.position_at(2.5)
+        self.assertAlmostEqual(latitude, 10.25)
+        self.assertAlmostEqual(longitude, 20.5)
+        self.assertEqual(accuracy, 8.0)
+
+    def test_at_a_fix(self):
+        self.assertEqual(self.track.position_at(10.0), (11.0, 22.0, 8.0))
+
+    def test_outside_the_track(self):
+        self.assertEqual(self.track.position_at(15.0), (11.0, 22.0, 8.0))
+        self.assertIsNone(self.track.position_at(30.0))
+        self.assertIsNone(self.track.position_at(-30.0))
+
+    def test_positions_at_matches_position_at(self):
+        track = LocationTrack(recent_points=10)
+        for point in winding_route(200):
+            track.append(*point)
+        times = [t / 3 for t in range(-30, 700)]
+        self.assertEqual(track.positions_at(times),
+                         [track.position_at(t) for t in times])
+
+    def test_copy_is_independent(self):
+        copy = self.track.copy()
+        self.track.append(20.0, 12.0, 24.0, None)
+        self.assertEqual(len(copy), 2)
+        self.assertEqual(copy.last_time(), 10.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+Tests for the delta emission and expiry of the scan loop
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    import gi
+    gi.require_version('NM', '1.0')
+    from gi.repository import NM
+except (ImportError, ValueError):
+    NM = None
+
+if NM is not None:
+    from replay import ReplayAccessPoint, ReplayClient, ReplayDevice
+    from wifi_scanner import WiFiScanner, INGEST_REPLAY
+
+def access_point(number, strength=60, frequency=2412):
+    return ReplayAccessPoint(f'AA:BB:CC:00:00:{number:02X}', f'net-{number}', strength,
+                             frequency, 0, 0, 0)
+
+@unittest.skipIf(NM is None, "needs PyGObject and the NM typelib")
+class TestScanLoop(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 100.0
+        self.wlan0 = ReplayDevice('wlan0')
+        self.wlan1 = ReplayDevice('wlan1')
+        self.client = ReplayClient([self.wlan0, self.wlan1])
+        self.found = []
+        self.expired = []
+
+    def make_scanner(self, delta_mode=True):
+        scanner = WiFiScanner(delta_mode, INGEST_REPLAY, self.client)
+        scanner.clock = lambda: self.now
+        scanner.connect('network-found', lambda scanner, network: self.found.append(
+            (network['device_interface'], network['bssid'], network['signal_strength'])))
+        scanner.connect('aps-expired', lambda scanner, entries: self.expired.append(
+            [(entry['device_interface'], entry['bssid'], entry['last_seen']) for entry in entries]))
+        scanner.start_scan()
+        return scanner
+
+    def tick(self, scanner, now):
+        self.now = now
+        self.found.clear()
+        self.expired.clear()
+        scanner.update_scan_results()
+
+    def test_only_new_or_changed_access_points_are_emitted(self):
+        scanner = self.make_scanner()
+        self.wlan0.access_points = [access_point(1), access_point(2)]
+        self.tick(scanner, 100.0)
+        self.assertEqual(self.found, [('wlan0', 'AA:BB:CC:00:00:01', 60),
+                                      ('wlan0', 'AA:BB:CC:00:00:02', 60)])
+
+        self.tick(scanner, 101.0)
+        self.assertEqual(self.found, [])
+
+        self.wlan0.access_points = [access_point(1, strength=61), access_point(2)]
+        self.tick(scanner, 102.0)
+        self.assertEqual(self.found, [('wlan0', 'AA:BB:CC:00:00:01', 61)])
+
+        # A channel change counts as a change too
+        self.wlan0.access_points = [access_point(1, strength=61), access_point(2, frequency=2437)]
+        self.tick(scanner, 103.0)
+        self.assertEqual(self.found, [('wlan0', 'AA:BB:CC:00:00:02', 60)])
+        self.assertEqual(scanner.visible_aps, 2)
+
+    def test_each_adapter_has_its_own_state(self):
+        scanner = self.make_scanner()
+        self.wlan0.access_points = [access_point(1)]
+        self.tick(scanner, 100.0)
+        self.wlan1.access_points = [access_point(1)]
+        self.tick(scanner, 101.0)
+        self.assertEqual(self.found, [('wlan1', 'AA:BB:CC:00:00:01', 60)])
+        self.assertEqual(scanner.visible_aps, 2)
+
+    def test_expiry_happens_on_the_first_tick_without_the_access_point(self):
+        scanner = self.make_scanner()
+        self.wlan0.access_points = [access_point(1), access_point(2)]
+        self.tick(scanner, 100.0)
+        self.tick(scanner, 105.0)
+        self.assertEqual(self.expired, [])
+
+        self.wlan0.access_points = [access_point(1)]
+        self.tick(scanner, 110.0)
+        # Last seen at the previous tick, in one batch
+        self.assertEqual(self.expired, [[('wlan0', 'AA:BB:CC:00:00:02', 105.0)]])
+
+        self.tick(scanner, 115.0)
+        self.assertEqual(self.expired, [])
+
+        # Coming back makes it new again
+        self.wlan0.access_points = [access_point(1), access_point(2)]
+        self.tick(scanner, 120.0)
+        self.assertEqual(self.found, [('wlan0', 'AA:BB:CC:00:00:02', 60)])
+
+    def test_removed_adapter_expires_its_access_points(self):
+        scanner = self.make_scanner()
+        self.wlan0.access_points = [access_point(1)]
+        self.wlan1.access_points = [access_point(2), access_point(3)]
+        self.tick(scanner, 100.0)
+
+        self.now = 130.0
+        self.client.devices.remove(self.wlan1)
+        self.client.emit('device-removed', self.wlan1)
+        self.assertEqual(sorted(self.expired[0]), [('wlan1', 'AA:BB:CC:00:00:02', 130.0),
+                                                   ('wlan1', 'AA:BB:CC:00:00:03', 130.0)])
+        self.tick(scanner, 131.0)
+        self.assertEqual((self.found, self.expired), ([], []))
+
+    def test_without_delta_mode_everything_is_emitted(self):
+        scanner = self.make_scanner(delta_mode=False)
+        self.wlan0.access_points = [access_point(1), access_point(2)]
+        self.tick(scanner, 100.0)
+        self.tick(scanner, 101.0)
+        self.assertEqual(len(self.found), 2)
+        self.wlan0.access_points = []
+        self.tick(scanner, 102.0)
+        self.assertEqual(self.expired, [])
+
+    def test_restarting_forgets_what_was_seen(self):
+        scanner = self.make_scanner()
+        self.wlan0.access_points = [access_point(1)]
+        self.tick(scanner, 100.0)
+        scanner.stop_scan()
+        scanner.start_scan()
+        self.tick(scanner, 101.0)
+        self.assertEqual(self.found, [('wlan0', 'AA:BB:CC:00:00:01', 60)])
+
+if __name__ == '__main__':
+    unittest.main()